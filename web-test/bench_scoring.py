@@ -0,0 +1,248 @@
+"""
+Benchmarks for the Python scorers and evaluator request paths
+Weave is replaced by an in-process stub (no network), the score cache is
+disabled and the engine's analysis cache is cleared before every iteration,
+so each number is a cold scoring pass.
+
+Cases: every scorer in pages/api/evaluate.py, evaluate_api.py and
+weave_evaluator_fixed.py on its own, plus end-to-end POSTs through each
+module's handler class, over synthetic Craig-style and generic responses
+from 100 words to 50 KB.
+
+Run with:
+  python3 bench_scoring.py                       # full run, prints a table
+  python3 bench_scoring.py --save                # ...and write bench_baseline.json
+  python3 bench_scoring.py --compare             # diff against bench_baseline.json
+  python3 bench_scoring.py --only fixed --quick
+"""
+import io
+import os
+import sys
+import json
+import time
+import types
+import asyncio
+import inspect
+import argparse
+import contextlib
+import functools
+import http.client
+import importlib.util
+from synthetic import generate_response, percentile
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_BASELINE = os.path.join(ROOT, 'bench_baseline.json')
+
+# (label, words, bytes) - a size is reached by whichever limit is set
+SIZES = [
+    ('100w', 100, None),
+    ('1kw', 1000, None),
+    ('10KB', None, 10 * 1024),
+    ('50KB', None, 50 * 1024),
+]
+
+
+def install_weave_stub():
+    """Offline stand-in for the parts of weave the evaluators use"""
+    weave = types.ModuleType('weave')
+
+    def op(*args, **kwargs):
+        def decorate(fn):
+            return fn
+        return decorate
+
+    class Model:
+        def __init__(self, **kwargs):
+            for name, value in kwargs.items():
+                setattr(self, name, value)
+
+    class Evaluation:
+        def __init__(self, dataset, scorers, **kwargs):
+            self.dataset = list(dataset)
+            self.scorers = scorers
+
+        async def evaluate(self, model):
+            predict = inspect.signature(model.predict).parameters
+            for row in self.dataset:
+                output = await model.predict(**{k: row[k] for k in predict if k in row})
+                for scorer in self.scorers:
+                    params = inspect.signature(scorer).parameters
+                    result = scorer(**{k: row[k] for k in params if k in row}, output=output)
+                    if inspect.isawaitable(result):
+                        await result
+            return {}
+
+    weave.op = op
+    weave.init = lambda *args, **kwargs: None
+    weave.Model = Model
+    weave.Evaluation = Evaluation
+    sys.modules['weave'] = weave
+
+
+def load_module(name: str, path: str):
+    spec = importlib.util.spec_from_file_location(name, path)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def measure(fn, min_time: float, min_runs: int, max_runs: int) -> list:
+    latencies = []
+    started = time.perf_counter()
+    while len(latencies) < min_runs or (time.perf_counter() - started < min_time and len(latencies) < max_runs):
+        t0 = time.perf_counter()
+        fn()
+        latencies.append(time.perf_counter() - t0)
+    return latencies
+
+
+class Bench:
+    def __init__(self, min_time: float = 0.5, min_runs: int = 5, max_runs: int = 2000, only: str = None):
+        self.min_time = min_time
+        self.min_runs = min_runs
+        self.max_runs = max_runs
+        self.only = only
+        self.results = {}
+        self.loop = asyncio.new_event_loop()
+
+    def run(self, name: str, fn, text: str, engine=None):
+        if self.only and self.only not in name:
+            return
+
+        def call():
+            if engine is not None:
+                engine.clear_cache()
+            result = fn()
+            if inspect.isawaitable(result):
+                self.loop.run_until_complete(result)
+
+        # Handlers print a line per request; keep the report readable
+        with contextlib.redirect_stdout(io.StringIO()):
+            call()  # Warm-up (imports, regex compilation)
+            latencies = sorted(measure(call, self.min_time, self.min_runs, self.max_runs))
+        total = sum(latencies)
+        self.results[name] = {
+            "runs": len(latencies),
+            "p50_ms": round(percentile(latencies, 0.50) * 1000, 4),
+            "p99_ms": round(percentile(latencies, 0.99) * 1000, 4),
+            "ops_per_s": round(len(latencies) / total, 1),
+            "mb_per_s": round(len(text.encode('utf-8')) * len(latencies) / total / 1e6, 2)
+        }
+        row = self.results[name]
+        print(f'{name:<58} {row["p50_ms"]:>10.3f} {row["p99_ms"]:>10.3f} {row["ops_per_s"]:>10.1f} {row["mb_per_s"]:>8.2f}')
+
+
+def post_pages_handler(module, body: bytes):
+    """Drive the Vercel BaseHTTPRequestHandler without a socket"""
+    handler = module.handler.__new__(module.handler)
+    handler.rfile = io.BytesIO(body)
+    handler.wfile = io.BytesIO()
+    handler.headers = http.client.parse_headers(io.BytesIO(f'Content-Length: {len(body)}\r\nContent-Type: application/json\r\n\r\n'.encode('latin-1')))
+    handler.command = 'POST'
+    handler.path = '/api/evaluate'
+    handler.request_version = 'HTTP/1.1'
+    handler.requestline = 'POST /api/evaluate HTTP/1.1'
+    handler.client_address = ('127.0.0.1', 0)
+    handler.log_message = lambda *args: None
+    handler.do_POST()
+    return handler.wfile.getvalue()
+
+
+def benchmark_all(bench: Bench):
+    install_weave_stub()
+    sys.path.insert(0, ROOT)
+    from score_cache import ScoreCache
+    from evaluator_http import Request
+
+    pages = load_module('bench_pages_evaluate', os.path.join(ROOT, 'pages', 'api', 'evaluate.py'))
+    api = load_module('bench_evaluate_api', os.path.join(ROOT, 'evaluate_api.py'))
+    fixed = load_module('bench_weave_evaluator_fixed', os.path.join(ROOT, 'weave_evaluator_fixed.py'))
+
+    # Cold scoring every time: no cached results, no background trace queue
+    for module in (pages, api, fixed):
+        module.CACHE = ScoreCache(max_entries=0)
+        if hasattr(module, 'UPLOADER'):
+            module.UPLOADER = None
+
+    api_handler = api.EvaluationHandler()
+    fixed_handler = fixed.WeaveHandler()
+    headers = http.client.parse_headers(io.BytesIO(b'Content-Type: application/json\r\n\r\n'))
+
+    print(f'{"case":<58} {"p50 ms":>10} {"p99 ms":>10} {"ops/s":>10} {"MB/s":>8}')
+    for style in ('craig', 'generic'):
+        for label, words, size in SIZES:
+            text = generate_response(style, words, size)
+            case = f'{style}/{label}'
+            body = json.dumps({"question": "What happened?", "response": text, "model": "craig", "has_context": True}).encode('utf-8')
+
+            pages_scorers = [
+                ('score_context_utilization', lambda: pages.score_context_utilization(text, True)),
+                ('score_evidence_density', lambda: pages.score_evidence_density(text)),
+                ('score_specificity', lambda: pages.score_specificity(text)),
+                ('score_emotional_authenticity', lambda: pages.score_emotional_authenticity(text)),
+                ('score_factual_grounding', lambda: pages.score_factual_grounding(text)),
+                ('evaluate_response', lambda: pages.evaluate_response(text, 'craig', True)),
+            ]
+            for name, fn in pages_scorers:
+                bench.run(f'pages.{name}[{case}]', fn, text, pages.ENGINE)
+            bench.run(f'pages.handler.POST[{case}]', lambda: post_pages_handler(pages, body), text, pages.ENGINE)
+
+            api_output = {"response": text, "has_context": True}
+            for scorer in (metric.fn for metric in api.REGISTRY):
+                bench.run(f'api.{scorer.__name__}[{case}]', functools.partial(scorer, '', api_output), text, api.ENGINE)
+            bench.run(f'api.EvaluationHandler.POST[{case}]',
+                      lambda: api_handler.do_POST(Request('POST', '/evaluate', 'HTTP/1.1', headers, body)), text, api.ENGINE)
+
+            fixed_output = {"answer": text, "has_context": True}
+            for scorer in (metric.fn for metric in fixed.REGISTRY):
+                bench.run(f'fixed.{scorer.__name__}[{case}]', functools.partial(scorer, '', fixed_output), text, fixed.ENGINE)
+            bench.run(f'fixed.WeaveHandler.POST[{case}]',
+                      lambda: fixed_handler.do_POST(Request('POST', '/', 'HTTP/1.1', headers, body)), text, fixed.ENGINE)
+
+
+def compare(results: dict, baseline: dict, threshold: float) -> int:
+    """Print p50 change per case; returns the number of regressions beyond threshold"""
+    regressions = 0
+    print('')
+    print(f'{"case":<58} {"base p50":>10} {"now p50":>10} {"change":>8}')
+    for name, row in results.items():
+        base = baseline.get(name)
+        if not base:
+            continue
+        change = (row["p50_ms"] - base["p50_ms"]) / base["p50_ms"] if base["p50_ms"] else 0.0
+        flag = ''
+        if change > threshold:
+            flag = '  ⚠️ slower'
+            regressions += 1
+        print(f'{name:<58} {base["p50_ms"]:>10.3f} {row["p50_ms"]:>10.3f} {change:>+8.1%}{flag}')
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Benchmark scorers and evaluator handlers with Weave stubbed out')
+    parser.add_argument('--only', help="run cases whose name contains this string")
+    parser.add_argument('--quick', action='store_true', help="fewer iterations per case")
+    parser.add_argument('--save', nargs='?', const=DEFAULT_BASELINE, help="write results as a baseline (default bench_baseline.json)")
+    parser.add_argument('--compare', nargs='?', const=DEFAULT_BASELINE, help="compare against a saved baseline")
+    parser.add_argument('--threshold', type=float, default=0.10, help="p50 slowdown reported as a regression (default 0.10)")
+    args = parser.parse_args(argv)
+
+    bench = Bench(min_time=0.1 if args.quick else 0.5, min_runs=3 if args.quick else 5, only=args.only)
+    benchmark_all(bench)
+
+    if args.save:
+        with open(args.save, 'w') as f:
+            json.dump({"python": sys.version.split()[0], "created": time.strftime('%Y-%m-%dT%H:%M:%S'), "results": bench.results}, f, indent=2)
+        print(f'\n✓ Baseline saved to {args.save}')
+
+    if args.compare:
+        with open(args.compare) as f:
+            baseline = json.load(f)["results"]
+        regressions = compare(bench.results, baseline, args.threshold)
+        print(f'\n{"⚠️" if regressions else "✓"} {regressions} regression(s) beyond {args.threshold:.0%}')
+        return 1 if regressions else 0
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,425 @@
+"""
+Evaluation suite runner (EVALUATION_PLAN.md, "Test Suite")
+Sends every prompt of a dataset to the generic and Craig models concurrently,
+scores each response with the pages/api/evaluate.py scorers as soon as it
+arrives, and prints the generic-vs-Craig summary with the suite's wall time
+and per-stage latency (rate-limit wait, model call incl. retries, scoring).
+
+Each model has its own token bucket (requests per second + burst), so the
+suite runs as fast as the providers allow and no faster. Calls are retried
+with exponential backoff on 429, 5xx and network errors, honouring Retry-After.
+--offline swaps both models for a local stub LLM - no network, no keys.
+
+Run with:
+  python3 eval_suite.py --offline                   # the plan's 10 prompts, stub models
+  python3 eval_suite.py prompts.jsonl --capsule 68c32cf3735fb4ac0ef3ccbf -o suite.jsonl
+  python3 eval_suite.py prompts.txt --rate generic=0.5:2 --rate craig=2 --concurrency 16
+Generic: OpenAI chat completions with OPENAI_API_KEY (SUITE_OPENAI_MODEL, default gpt-4)
+Craig:   POST SUITE_ARGUE_URL (default http://localhost:3000/api/argue) {capsuleId, question}
+"""
+import os
+import sys
+import json
+import time
+import zlib
+import random
+import asyncio
+import argparse
+import importlib.util
+import urllib.error
+import urllib.request
+from concurrent.futures import ThreadPoolExecutor
+from synthetic import generate_response, percentile
+
+EVALUATOR_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'pages', 'api', 'evaluate.py')
+
+TEST_PROMPTS = [
+    "What's the problem with immigration?",
+    "Should we defund the police?",
+    "Is climate change real?",
+    "What do you think about gun control?",
+    "How do you feel about abortion rights?",
+    "What's your stance on universal healthcare?",
+    "Should we forgive student loans?",
+    "Is capitalism failing?",
+    "What about free speech on social media?",
+    "Should drugs be legalized?"
+]
+
+# Requests per second and burst, per model
+DEFAULT_RATES = {'generic': (1.0, 3), 'craig': (2.0, 4)}
+
+STAGES = ('wait', 'call', 'score')
+
+# Response metric -> score history column
+HISTORY_METRICS = {
+    'context': 'context_utilization',
+    'evidence': 'evidence_density',
+    'specificity': 'specificity',
+    'authenticity': 'emotional_authenticity'
+}
+
+
+class TokenBucket:
+    """`rate` tokens per second, at most `burst` saved up; acquire() waits for one, first come first served"""
+
+    def __init__(self, rate: float, burst: float = 1):
+        self.rate = rate
+        self.burst = max(1.0, burst)
+        self.tokens = self.burst
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    async def acquire(self):
+        async with self._lock:
+            while True:
+                now = time.monotonic()
+                self.tokens = min(self.burst, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+
+
+class ModelError(Exception):
+    def __init__(self, message: str, retryable: bool = False, retry_after: float = None):
+        super().__init__(message)
+        self.retryable = retryable
+        self.retry_after = retry_after
+
+
+def post_json(url: str, payload: dict, headers: dict = None, timeout: float = 120) -> dict:
+    """Blocking JSON POST; failures worth retrying raise ModelError(retryable=True)"""
+    request = urllib.request.Request(
+        url, json.dumps(payload).encode('utf-8'),
+        dict({'Content-Type': 'application/json'}, **(headers or {}))
+    )
+    try:
+        with urllib.request.urlopen(request, timeout=timeout) as response:
+            return json.loads(response.read().decode('utf-8'))
+    except urllib.error.HTTPError as e:
+        detail = e.read().decode('utf-8', 'replace')[:200]
+        retry_after = e.headers.get('Retry-After')
+        raise ModelError(
+            f"HTTP {e.code} from {url}: {detail}",
+            retryable=e.code == 429 or e.code >= 500,
+            retry_after=float(retry_after) if retry_after and retry_after.replace('.', '', 1).isdigit() else None
+        )
+    except (urllib.error.URLError, TimeoutError, ConnectionError) as e:
+        raise ModelError(f"{url}: {e}", retryable=True)
+
+
+class OpenAIModel:
+    """Generic assistant, no context (the plan's get_generic_response)"""
+
+    def __init__(self, api_key: str, model: str = 'gpt-4', label: str = 'gpt-4-generic'):
+        self.api_key = api_key
+        self.model = model
+        self.label = label
+        self.has_context = False
+
+    def _complete(self, prompt: str) -> str:
+        data = post_json('https://api.openai.com/v1/chat/completions', {
+            "model": self.model,
+            "messages": [
+                {"role": "system", "content": "You are a helpful assistant."},
+                {"role": "user", "content": prompt}
+            ],
+            "temperature": 0.7
+        }, {'Authorization': f'Bearer {self.api_key}'})
+        return data['choices'][0]['message']['content']
+
+    async def complete(self, prompt: str) -> str:
+        return await asyncio.get_running_loop().run_in_executor(None, self._complete, prompt)
+
+
+class CraigModel:
+    """Craig with the capsule's Signal context, through the /api/argue route"""
+
+    def __init__(self, url: str, capsule_id: str, api_key: str = None, label: str = 'craig-contextualized'):
+        self.url = url
+        self.capsule_id = capsule_id
+        self.api_key = api_key
+        self.label = label
+        self.has_context = True
+
+    def _complete(self, prompt: str) -> str:
+        payload = {"capsuleId": self.capsule_id, "question": prompt}
+        if self.api_key:
+            payload["userApiKey"] = self.api_key
+        return post_json(self.url, payload).get('response', '')
+
+    async def complete(self, prompt: str) -> str:
+        return await asyncio.get_running_loop().run_in_executor(None, self._complete, prompt)
+
+
+class StubModel:
+    """
+    Offline stand-in: deterministic Craig- or generic-style text per prompt,
+    after a random latency, failing with a retryable 429 at `fail_rate`.
+    """
+
+    def __init__(self, style: str, latency: tuple = (0.2, 0.8), fail_rate: float = 0.0, seed: int = 0):
+        self.style = style
+        self.label = f'stub-{style}'
+        self.has_context = style == 'craig'
+        self.latency = latency
+        self.fail_rate = fail_rate
+        self._rng = random.Random(seed)
+
+    async def complete(self, prompt: str) -> str:
+        await asyncio.sleep(self._rng.uniform(*self.latency))
+        if self._rng.random() < self.fail_rate:
+            raise ModelError("stub 429 Too Many Requests", retryable=True)
+        seed = zlib.crc32(prompt.encode('utf-8'))
+        return generate_response(self.style, words=120 + seed % 240, seed=seed)
+
+
+def load_evaluator():
+    """pages/api/evaluate.py, loaded like rescore.py does: no traces, ops behave like plain functions"""
+    os.environ.setdefault('WEAVE_DISABLED', 'true')
+    os.environ.setdefault('WEAVE_INIT', 'lazy')  # Weave is never imported offline
+    spec = importlib.util.spec_from_file_location('pages_api_evaluate', EVALUATOR_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def load_prompts(path: str = None) -> list:
+    """Plain lines, a JSON array, or JSONL; JSON items are strings or {prompt | question}"""
+    if path is None:
+        return list(TEST_PROMPTS)
+    stream = sys.stdin if path == '-' else open(path, encoding='utf-8')
+    try:
+        text = stream.read()
+    finally:
+        if stream is not sys.stdin:
+            stream.close()
+
+    stripped = text.strip()
+    if stripped.startswith('['):
+        items = json.loads(stripped)
+    elif path.endswith('.jsonl') or stripped.startswith(('{', '"')):
+        items = [json.loads(line) for line in stripped.splitlines() if line.strip()]
+    else:
+        items = [line.strip() for line in stripped.splitlines() if line.strip()]
+    return [item if isinstance(item, str) else item.get('prompt', item.get('question', '')) for item in items]
+
+
+class SuiteRunner:
+    def __init__(self, models: dict, rates: dict, evaluator, concurrency: int = 8, retries: int = 4,
+                 backoff: float = 1.0, output=None, history=None):
+        self.models = models
+        self.limiters = {name: TokenBucket(*rates[name]) for name in models}
+        self.evaluator = evaluator
+        self.concurrency = concurrency
+        self.retries = retries
+        self.backoff = backoff
+        self.output = output
+        self.history = history
+        self.rows = []
+        self.latency = {stage: {name: [] for name in models} for stage in STAGES}
+        self.retried = {name: 0 for name in models}
+
+    async def call(self, name: str, prompt: str) -> tuple:
+        """Rate-limited call with retries -> (text, attempts, seconds waiting on the bucket)"""
+        model = self.models[name]
+        waited = 0.0
+        for attempt in range(1, self.retries + 2):
+            started = time.perf_counter()
+            await self.limiters[name].acquire()
+            waited += time.perf_counter() - started
+            try:
+                return await model.complete(prompt), attempt, waited
+            except ModelError as e:
+                if not e.retryable or attempt > self.retries:
+                    raise
+                self.retried[name] += 1
+                delay = e.retry_after if e.retry_after is not None else self.backoff * 2 ** (attempt - 1) * random.uniform(0.5, 1.5)
+                await asyncio.sleep(delay)
+
+    async def run_one(self, index: int, prompt: str, name: str, slots: asyncio.Semaphore):
+        model = self.models[name]
+        row = {"index": index, "prompt": prompt, "model": model.label, "has_context": model.has_context}
+        async with slots:
+            started = time.perf_counter()
+            try:
+                text, attempts, waited = await self.call(name, prompt)
+            except Exception as e:
+                row["error"] = str(e)
+                print(f"✗ [{model.label}] {prompt[:50]}: {e}")
+                self.finish(row)
+                return
+            called = time.perf_counter()
+
+        # Scored as soon as it arrives, while other calls are still in flight
+        with self.evaluator.untraced():
+            result = self.evaluator.evaluate_response(text, model.label, model.has_context)
+        scored = time.perf_counter()
+
+        for stage, seconds in (('wait', waited), ('call', called - started - waited), ('score', scored - called)):
+            self.latency[stage][name].append(seconds)
+        row.update(
+            overall_score=result["overall_score"],
+            metrics={metric: values["score"] for metric, values in result["metrics"].items()},
+            word_count=result["word_count"],
+            attempts=attempts,
+            wait_ms=round(waited * 1000, 1),
+            call_ms=round((called - started - waited) * 1000, 1),
+            score_ms=round((scored - called) * 1000, 2),
+            response=text
+        )
+        if self.history is not None:
+            self.history.append(model.label, {
+                "overall_score": result["overall_score"],
+                "metrics": {column: result["metrics"][metric]["score"] for column, metric in HISTORY_METRICS.items()}
+            })
+        print(f"✓ [{model.label}] {result['overall_score']:5.1f}/100 | {prompt[:60]}")
+        self.finish(row)
+
+    def finish(self, row: dict):
+        self.rows.append(row)
+        if self.output is not None:
+            self.output.write(json.dumps(row) + '\n')
+            self.output.flush()
+
+    async def run(self, prompts: list) -> dict:
+        loop = asyncio.get_running_loop()
+        # HTTP clients block in threads; one per slot so the pool never caps concurrency
+        loop.set_default_executor(ThreadPoolExecutor(self.concurrency, thread_name_prefix='suite-call'))
+        slots = asyncio.Semaphore(self.concurrency)
+
+        started = time.perf_counter()
+        await asyncio.gather(*(
+            self.run_one(index, prompt, name, slots)
+            for index, prompt in enumerate(prompts)
+            for name in self.models
+        ))
+        return self.summary(time.perf_counter() - started)
+
+    def summary(self, wall_seconds: float) -> dict:
+        by_model = {}
+        for name, model in self.models.items():
+            scores = [row["overall_score"] for row in self.rows if row["model"] == model.label and "error" not in row]
+            by_model[name] = {
+                "model": model.label,
+                "responses": len(scores),
+                "errors": sum(1 for row in self.rows if row["model"] == model.label and "error" in row),
+                "retries": self.retried[name],
+                "avg_score": round(sum(scores) / len(scores), 2) if scores else None
+            }
+
+        summary = {"wall_s": round(wall_seconds, 2), "models": by_model, "stages": {}}
+        for stage, per_model in self.latency.items():
+            summary["stages"][stage] = {}
+            for name, values in per_model.items():
+                values = sorted(values)
+                summary["stages"][stage][name] = {
+                    "p50_ms": round(percentile(values, 0.5) * 1000, 2) if values else None,
+                    "p90_ms": round(percentile(values, 0.9) * 1000, 2) if values else None,
+                    "max_ms": round(values[-1] * 1000, 2) if values else None,
+                    "total_s": round(sum(values), 2)
+                }
+        # Time the suite would take one call at a time, for the concurrency gain
+        summary["serial_s"] = round(sum(sum(values) for stage in ('call', 'score') for values in self.latency[stage].values()), 2)
+
+        generic, craig = by_model.get('generic', {}).get('avg_score'), by_model.get('craig', {}).get('avg_score')
+        if generic is not None and craig is not None:
+            summary["avg_improvement"] = round(craig - generic, 2)
+            summary["avg_improvement_pct"] = round((craig - generic) / generic * 100, 2) if generic else None
+        return summary
+
+
+def parse_rates(values: list) -> dict:
+    """--rate MODEL=RATE[:BURST] overrides"""
+    rates = dict(DEFAULT_RATES)
+    for value in values or []:
+        name, _, spec = value.partition('=')
+        rate, _, burst = spec.partition(':')
+        if name not in rates or not rate:
+            raise SystemExit(f"❌ --rate expects generic=RATE[:BURST] or craig=RATE[:BURST], got {value!r}")
+        rates[name] = (float(rate), float(burst) if burst else rates[name][1])
+    return rates
+
+
+def build_models(args) -> dict:
+    names = [name.strip() for name in args.models.split(',') if name.strip()]
+    models = {}
+    for name in names:
+        if args.offline:
+            models[name] = StubModel(name, fail_rate=args.stub_fail_rate, seed=len(models))
+        elif name == 'generic':
+            api_key = os.getenv('OPENAI_API_KEY')
+            if not api_key:
+                raise SystemExit("❌ Set OPENAI_API_KEY for the generic model (or run with --offline)")
+            models[name] = OpenAIModel(api_key, os.getenv('SUITE_OPENAI_MODEL', 'gpt-4'))
+        elif name == 'craig':
+            models[name] = CraigModel(
+                os.getenv('SUITE_ARGUE_URL', 'http://localhost:3000/api/argue'),
+                args.capsule, os.getenv('SHRINKED_API_KEY')
+            )
+        else:
+            raise SystemExit(f"❌ Unknown model {name!r} (generic, craig)")
+    return models
+
+
+def print_summary(summary: dict):
+    print('\n=== EVALUATION COMPLETE ===')
+    for name, row in summary["models"].items():
+        average = f'{row["avg_score"]}/100' if row["avg_score"] is not None else 'n/a'
+        print(f'{row["model"]:<24} {average:>10}  ({row["responses"]} scored, {row["errors"]} failed, {row["retries"]} retries)')
+    if summary.get("avg_improvement") is not None:
+        pct = summary["avg_improvement_pct"]
+        print(f'Average Improvement: {summary["avg_improvement"]:+} points' + (f' ({pct:+}%)' if pct is not None else ''))
+
+    print(f'\nWall time {summary["wall_s"]}s (one call at a time: ~{summary["serial_s"]}s)')
+    print(f'{"stage":<8} {"model":<10} {"p50 ms":>10} {"p90 ms":>10} {"max ms":>10} {"total s":>9}')
+    for stage, per_model in summary["stages"].items():
+        for name, row in per_model.items():
+            if row["p50_ms"] is not None:
+                print(f'{stage:<8} {name:<10} {row["p50_ms"]:>10.2f} {row["p90_ms"]:>10.2f} {row["max_ms"]:>10.2f} {row["total_s"]:>9.2f}')
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Run the generic vs Craig evaluation suite')
+    parser.add_argument('prompts', nargs='?', help="prompt file: lines, JSON array or JSONL (default: the plan's 10 prompts), - for stdin")
+    parser.add_argument('--models', default='generic,craig', help="comma-separated: generic, craig")
+    parser.add_argument('--capsule', default='68c32cf3735fb4ac0ef3ccbf', help="capsule id for the Craig model")
+    parser.add_argument('--offline', action='store_true', help="use the local stub LLM for every model")
+    parser.add_argument('--stub-fail-rate', type=float, default=0.0, help="share of stub calls failing with a retryable 429")
+    parser.add_argument('--rate', action='append', help="MODEL=RATE[:BURST] requests per second (default generic=1:3, craig=2:4)")
+    parser.add_argument('--concurrency', type=int, default=8, help="model calls in flight at once")
+    parser.add_argument('--retries', type=int, default=4, help="retries per call on 429 / 5xx / network errors")
+    parser.add_argument('-o', '--output', help="write one JSON row per scored response, as they complete")
+    parser.add_argument('--history', help="also append scores to this score history (score_history.py)")
+    parser.add_argument('--json', action='store_true', help="print the summary as JSON")
+    args = parser.parse_args(argv)
+
+    prompts = load_prompts(args.prompts)
+    models = build_models(args)
+    evaluator = load_evaluator()
+
+    history = None
+    if args.history:
+        from score_history import ScoreHistory
+        history = ScoreHistory(args.history)
+
+    output = open(args.output, 'w', encoding='utf-8') if args.output else None
+    try:
+        runner = SuiteRunner(models, parse_rates(args.rate), evaluator, args.concurrency, args.retries,
+                             output=output, history=history)
+        print(f'🔥 {len(prompts)} prompts x {len(models)} models, {args.concurrency} in flight' + (' (offline stub)' if args.offline else ''))
+        summary = asyncio.run(runner.run(prompts))
+    finally:
+        if output is not None:
+            output.close()
+
+    if args.json:
+        print(json.dumps(summary, indent=2))
+    else:
+        print_summary(summary)
+
+
+if __name__ == '__main__':
+    main()
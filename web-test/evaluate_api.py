@@ -1,21 +1,69 @@
 """
 W&B Weave Evaluation API using proper Evaluation framework
 Run with: python3 evaluate_api.py
+(WEAVE_INIT=background starts serving before Weave is imported and initialized,
+ SCORE_EXECUTOR=process analyzes large responses in worker processes)
+"metrics": ["evidence", ...] (or ?metrics= on batches) scores only those; GET /scorers lists them
 """
+import time
+IMPORT_STARTED = time.perf_counter()
+
 import os
-import re
-import json
-import weave
-from weave import Evaluation, Model
 import asyncio
-from http.server import HTTPServer, BaseHTTPRequestHandler
-from urllib.parse import urlparse, parse_qs
+import functools
+from urllib.parse import parse_qs, urlparse
+from scoring_engine import ScoreCollector, ScoringEngine
+from scorer_registry import ScorerRegistry
+from score_cache import ScoreCache
+from score_executor import ScoreExecutor
+from score_history import ScoreHistory
+from weave_tracing import WEAVE, TraceUploader, get_weave, op, start_weave, traced, untraced, weave_sink
+from metrics import METRICS_PATH, phase
+from evaluator_http import BATCH_CHUNK, BATCH_PATH, CACHE_STATS_PATH, EXECUTOR_STATS_PATH, HISTORY_PATH, SCORERS_PATH, TRACE_STATS_PATH, WEAVE_STATUS_PATH, AsyncHandler, RequestError, batch_response, json_response, parse_object, read_examples, run_async_server
+
+# Initialize Weave (now, on the first traced call, or in the background - see WEAVE_INIT)
+start_weave('shrinked-ai/craig-evaluation')
+
+VAGUE_TERMS = ['some', 'many', 'often', 'generally', 'it depends', 'multiple perspectives']
+AUTHENTIC_TERMS = ['fuck', 'shit', 'damn', 'clusterfuck', 'bullshit', 'ridiculous', 'absurd']
+CORPORATE_TERMS = ['balanced', 'nuanced', 'complex issue', 'however', 'on the other hand']
+
+# Lexicons resolve in one token pass shared by all scorers
+ENGINE = ScoringEngine(
+    lexicons={
+        'vague': VAGUE_TERMS,
+        'authentic': AUTHENTIC_TERMS,
+        'corporate': CORPORATE_TERMS,
+    },
+    patterns={
+        'citations': r'\[(\d+)\]',
+        'names': r'\b[A-Z][a-z]+ [A-Z][a-z]+\b',
+        'dates': r'\b\d{4}\b',
+        'statistics': r'\b\d+(?:\.\d+)?(?:\s?%|,\d+|\s+people)\b',
+        'numbers': r'\b\d+(?:,\d+)*(?:\.\d+)?\b',
+    }
+)
+
+# Every metric with the features it reads; requests may ask for a subset
+REGISTRY = ScorerRegistry(ENGINE)
+
+# Responses over SCORE_EXECUTOR_THRESHOLD are analyzed off the event loop
+EXECUTOR = ScoreExecutor.from_env(ENGINE)
 
-# Initialize Weave
-weave.init('shrinked-ai/craig-evaluation')
+# SCORE_HISTORY_PATH=scores.db: every served result is kept for local leaderboards
+HISTORY = ScoreHistory.from_env()
 
-# Define scoring functions using @weave.op()
-@weave.op()
+# Scores logged by each Evaluation run, read back per dataset row
+COLLECTOR = ScoreCollector()
+
+# Bump whenever a lexicon, regex or weight changes - invalidates cached scores
+SCORER_VERSION = 'evaluate-api/1'
+CACHE = ScoreCache.from_env()
+
+# Define scoring functions using @op() (@weave.op() that can run untraced)
+@REGISTRY.metric('context', 'context_score', needs=('citations', 'names', 'dates'))
+@op()
+@COLLECTOR.scorer('context', 'context_score')
 def context_utilization_scorer(expected: str, output: dict) -> dict:
     """Score 0-100 based on context integration"""
     text = output.get('response', '')
@@ -24,14 +72,15 @@ def context_utilization_scorer(expected: str, output: dict) -> dict:
     if not has_context:
         return {"context_score": 0, "citations": 0, "names": 0}
 
+    features = ENGINE.analyze(text)
     score = 0
-    citations = re.findall(r'\[(\d+)\]', text)
+    citations = features.findall('citations')
     score += min(len(citations) * 10, 50)
 
-    names = re.findall(r'\b[A-Z][a-z]+ [A-Z][a-z]+\b', text)
+    names = features.findall('names')
     score += min(len(names) * 5, 25)
 
-    dates = re.findall(r'\b\d{4}\b', text)
+    dates = features.findall('dates')
     score += min(len(dates) * 3, 15)
 
     return {
@@ -41,13 +90,15 @@ def context_utilization_scorer(expected: str, output: dict) -> dict:
         "dates": len(dates)
     }
 
-@weave.op()
+@REGISTRY.metric('evidence', 'evidence_score', needs=('citations', 'statistics'))
+@op()
+@COLLECTOR.scorer('evidence', 'evidence_score')
 def evidence_density_scorer(expected: str, output: dict) -> dict:
     """Count specific evidence citations"""
-    text = output.get('response', '')
+    features = ENGINE.analyze(output.get('response', ''))
 
-    citations = re.findall(r'\[(\d+)\]', text)
-    statistics = re.findall(r'\b\d+(?:\.\d+)?(?:\s?%|,\d+|\s+people)\b', text)
+    citations = features.findall('citations')
+    statistics = features.findall('statistics')
 
     score = min(len(citations) * 10 + len(statistics) * 5, 100)
 
@@ -57,15 +108,16 @@ def evidence_density_scorer(expected: str, output: dict) -> dict:
         "statistics": len(statistics)
     }
 
-@weave.op()
+@REGISTRY.metric('specificity', 'specificity_score', needs=('vague', 'numbers'))
+@op()
+@COLLECTOR.scorer('specificity', 'specificity_score')
 def specificity_scorer(expected: str, output: dict) -> dict:
     """Measure concrete details vs vague language"""
-    text = output.get('response', '')
+    features = ENGINE.analyze(output.get('response', ''))
 
-    vague = ['some', 'many', 'often', 'generally', 'it depends', 'multiple perspectives']
-    vague_count = sum(len(re.findall(r'\b' + re.escape(word) + r'\b', text, re.IGNORECASE)) for word in vague)
+    vague_count = features.count('vague')
 
-    numbers = re.findall(r'\b\d+(?:,\d+)*(?:\.\d+)?\b', text)
+    numbers = features.findall('numbers')
     specific_count = len(numbers)
 
     score = 50 + (specific_count * 5) - (vague_count * 8)
@@ -76,16 +128,15 @@ def specificity_scorer(expected: str, output: dict) -> dict:
         "specific_terms": specific_count
     }
 
-@weave.op()
+@REGISTRY.metric('authenticity', 'authenticity_score', needs=('authentic', 'corporate'))
+@op()
+@COLLECTOR.scorer('authenticity', 'authenticity_score')
 def authenticity_scorer(expected: str, output: dict) -> dict:
     """Measure genuine voice vs corporate neutrality"""
-    text = output.get('response', '')
-
-    authentic_words = ['fuck', 'shit', 'damn', 'clusterfuck', 'bullshit', 'ridiculous', 'absurd']
-    authentic_count = sum(len(re.findall(r'\b' + re.escape(word) + r'\b', text, re.IGNORECASE)) for word in authentic_words)
+    features = ENGINE.analyze(output.get('response', ''))
 
-    corporate_words = ['balanced', 'nuanced', 'complex issue', 'however', 'on the other hand']
-    corporate_count = sum(len(re.findall(r'\b' + re.escape(word) + r'\b', text, re.IGNORECASE)) for word in corporate_words)
+    authentic_count = features.count('authentic')
+    corporate_count = features.count('corporate')
 
     score = (authentic_count * 15) - (corporate_count * 10)
 
@@ -95,130 +146,221 @@ def authenticity_scorer(expected: str, output: dict) -> dict:
         "corporate_markers": corporate_count
     }
 
-# Create a Model class for evaluation
-class ResponseEvaluator(Model):
-    """Model wrapper for evaluating AI responses"""
-
-    @weave.op()
-    async def predict(self, question: str, response: str, has_context: bool) -> dict:
-        """Predict method required by Weave Model"""
-        return {
-            "response": response,
-            "has_context": has_context,
-            "question": question
-        }
-
-# Create global evaluation object
-evaluation = Evaluation(
-    dataset=[],  # Will be populated dynamically
-    scorers=[
-        context_utilization_scorer,
-        evidence_density_scorer,
-        specificity_scorer,
-        authenticity_scorer
-    ]
-)
+# Create a Model class for evaluation (defined once Weave is loaded)
+@functools.cache
+def response_evaluator_class():
+    weave = get_weave()
+
+    class ResponseEvaluator(weave.Model):
+        """Model wrapper for evaluating AI responses"""
+
+        @weave.op()
+        async def predict(self, question: str, response: str, has_context: bool, row_id: str) -> dict:
+            """Predict method required by Weave Model"""
+            return {
+                "response": response,
+                "has_context": has_context,
+                "question": question,
+                "row_id": row_id
+            }
 
-async def evaluate_response_async(question: str, response: str, model: str, has_context: bool):
-    """Run evaluation asynchronously"""
-    # Create a temporary dataset with this single example
-    example = {
-        "question": question,
-        "response": response,
-        "expected": "",  # Not used in scoring but required
-        "has_context": has_context
-    }
+    return ResponseEvaluator
 
-    # Create evaluator model
-    evaluator = ResponseEvaluator()
-
-    # Create evaluation with single example
-    eval_obj = Evaluation(
-        dataset=[example],
-        scorers=[
-            context_utilization_scorer,
-            evidence_density_scorer,
-            specificity_scorer,
-            authenticity_scorer
-        ]
-    )
+@op(phase_name=None)
+def log_evaluation(question: str, response: str, model: str, has_context: bool, result: dict) -> dict:
+    """Trace of an evaluation scored on the request path and uploaded in the background"""
+    return result
 
-    # Run evaluation
-    result = await eval_obj.evaluate(evaluator)
+# WEAVE_ASYNC_TRACES=1: respond with local scores, upload traces from a background worker
+UPLOADER = TraceUploader.from_env(weave_sink(log_evaluation))
 
-    # Extract scores from result
-    scores = {}
-    if hasattr(result, 'rows') and len(result.rows) > 0:
-        row = result.rows[0]
-        scores = {
-            "context": row.get('context_score', 0),
-            "evidence": row.get('evidence_score', 0),
-            "specificity": row.get('specificity_score', 0),
-            "authenticity": row.get('authenticity_score', 0)
-        }
+# Module import to ready-to-serve (Weave included when eager)
+COLD_START_MS = round((time.perf_counter() - IMPORT_STARTED) * 1000, 1)
 
-    overall = sum(scores.values()) / len(scores) if scores else 0
+async def run_evaluation_async(examples: list, metrics: list = None) -> list:
+    """Run one evaluation over a batch of examples; results keep input order"""
+    metrics = REGISTRY.select(metrics)
+    row_ids = COLLECTOR.open(len(examples))
+    dataset = [{
+        "question": example.get('question', ''),
+        "response": example.get('response', ''),
+        "expected": "",  # Not used in scoring but required
+        "has_context": example.get('has_context', False),
+        "row_id": row_id
+    } for example, row_id in zip(examples, row_ids)]
 
-    return {
-        "model": model,
-        "overall_score": round(overall, 2),
-        "metrics": scores,
-        "word_count": len(response.split())
-    }
+    # Large responses are analyzed off the loop; the scorers read the pinned batch
+    prepared = await EXECUTOR.prepare([row["response"] for row in dataset], REGISTRY.needs(metrics))
 
-class EvaluationHandler(BaseHTTPRequestHandler):
-    def do_OPTIONS(self):
-        self.send_response(200)
-        self.send_header('Access-Control-Allow-Origin', '*')
-        self.send_header('Access-Control-Allow-Methods', 'POST, OPTIONS')
-        self.send_header('Access-Control-Allow-Headers', 'Content-Type')
-        self.end_headers()
+    # Create evaluator model
+    evaluator = response_evaluator_class()()
 
-    def do_POST(self):
-        try:
-            content_length = int(self.headers['Content-Length'])
-            body = self.rfile.read(content_length)
-            data = json.loads(body.decode('utf-8'))
-
-            question = data.get('question', '')
-            response = data.get('response', '')
-            model = data.get('model', 'unknown')
-            has_context = data.get('has_context', False)
-
-            # Run async evaluation
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            result = loop.run_until_complete(
-                evaluate_response_async(question, response, model, has_context)
-            )
-            loop.close()
-
-            self.send_response(200)
-            self.send_header('Content-Type', 'application/json')
-            self.send_header('Access-Control-Allow-Origin', '*')
-            self.end_headers()
-
-            self.wfile.write(json.dumps(result).encode('utf-8'))
+    # Create evaluation with the whole batch
+    eval_obj = get_weave().Evaluation(
+        dataset=dataset,
+        scorers=[traced(REGISTRY[name].fn) for name in metrics]
+    )
 
+    # Run evaluation; scorers record each row's scores into COLLECTOR
+    try:
+        with phase('weave_log'), ENGINE.pin(prepared):
+            await eval_obj.evaluate(evaluator)
+    finally:
+        collected = COLLECTOR.close(row_ids)
+
+    results = []
+    for i, example in enumerate(examples):
+        row_scores = collected[i]
+        scores = {name: row_scores.get(name, 0) for name in metrics}
+
+        overall = sum(scores.values()) / len(scores) if scores else 0
+
+        results.append({
+            "model": example.get('model', 'unknown'),
+            "overall_score": round(overall, 2),
+            "metrics": scores,
+            "word_count": len(dataset[i]["response"].split())
+        })
+
+    return results
+
+async def score_locally_async(examples: list, metrics: list = None) -> list:
+    """Score in-process without Weave calls and queue the traces for the background uploader"""
+    metrics = REGISTRY.select(metrics)
+    prepared = await EXECUTOR.prepare([example.get('response', '') for example in examples], REGISTRY.needs(metrics))
+
+    results = []
+    with ENGINE.pin(prepared):
+        for example in examples:
+            output = {"response": example.get('response', ''), "has_context": example.get('has_context', False)}
+            with untraced():
+                scores = {name: REGISTRY.score(name, REGISTRY[name].fn('', output)) for name in metrics}
+
+            overall = sum(scores.values()) / len(scores) if scores else 0
+            result = {
+                "model": example.get('model', 'unknown'),
+                "overall_score": round(overall, 2),
+                "metrics": scores,
+                "word_count": len(output["response"].split())
+            }
+            results.append(result)
+
+            with phase('weave_log'):
+                UPLOADER.submit({
+                    "question": example.get('question', ''),
+                    "response": output["response"],
+                    "model": result["model"],
+                    "has_context": output["has_context"],
+                    "result": result
+                })
+
+    return results
+
+async def evaluate_batch_async(examples: list, metrics: list = None) -> list:
+    """Cached front for scoring - hits skip both scoring and Weave logging"""
+    metrics = REGISTRY.select(metrics)
+    evaluate = functools.partial(score_locally_async if UPLOADER else run_evaluation_async, metrics=metrics)
+    results = await CACHE.evaluate_cached(REGISTRY.version(SCORER_VERSION, metrics), examples, evaluate)
+    # overall_score of a subset averages only those metrics - not comparable on the leaderboard
+    if HISTORY and REGISTRY.is_complete(metrics):
+        with phase('history'):
+            await asyncio.to_thread(HISTORY.append_many, [(result["model"], result) for result in results])
+    return results
+
+async def evaluate_request_async(request, metrics: list):
+    """Results of a batch request, scored chunk by chunk while the body streams in"""
+    async for examples in read_examples(request):
+        for result in await evaluate_batch_async(examples, metrics):
+            yield result
+
+async def evaluate_response_async(question: str, response: str, model: str, has_context: bool, metrics: list = None):
+    """Run evaluation asynchronously"""
+    results = await evaluate_batch_async([{
+        "question": question,
+        "response": response,
+        "model": model,
+        "has_context": has_context
+    }], metrics)
+    return results[0]
+
+class EvaluationHandler(AsyncHandler):
+    # Batch bodies are parsed and scored chunk by chunk as they arrive
+    stream_paths = (BATCH_PATH,)
+
+    async def do_GET(self, request):
+        path = urlparse(request.path).path.rstrip('/')
+        if path == CACHE_STATS_PATH:
+            return json_response(CACHE.stats())
+        if path == TRACE_STATS_PATH:
+            return json_response(UPLOADER.stats() if UPLOADER else {"enabled": False})
+        if path == WEAVE_STATUS_PATH:
+            return json_response(dict(WEAVE.status(), cold_start_ms=COLD_START_MS))
+        if path == EXECUTOR_STATS_PATH:
+            return json_response(EXECUTOR.stats())
+        if path == SCORERS_PATH:
+            return json_response(REGISTRY.describe())
+        if path == HISTORY_PATH:
+            if not HISTORY:
+                return json_response({"error": "Score history is off (set SCORE_HISTORY_PATH)"}, 404)
+            try:
+                return json_response(await asyncio.to_thread(HISTORY.query, parse_qs(urlparse(request.path).query)))
+            except ValueError as e:
+                return json_response({"error": str(e)}, 400)
+        return json_response({"error": "Not found"}, 404)
+
+    async def do_POST(self, request):
+        try:
+            url = urlparse(request.path)
+            if url.path.rstrip('/') == BATCH_PATH:
+                # Batch mode: JSON array or NDJSON of examples (Accept: application/x-ndjson streams results back)
+                try:
+                    metrics = REGISTRY.select(parse_qs(url.query).get('metrics'))
+                except ValueError as e:
+                    return json_response({"error": str(e)}, 400)
+                return await batch_response(request, evaluate_request_async(request, metrics))
+            else:
+                data = parse_object(request.body)
+
+                question = data.get('question', '')
+                response = data.get('response', '')
+                model = data.get('model', 'unknown')
+                has_context = data.get('has_context', False)
+                try:
+                    metrics = REGISTRY.select(data.get('metrics'))
+                except ValueError as e:
+                    return json_response({"error": str(e)}, 400)
+
+                # Awaited on the server's event loop
+                result = await evaluate_response_async(question, response, model, has_context, metrics)
+
+            return json_response(result)
+
+        except RequestError as e:
+            return json_response({"error": str(e)}, e.status)
         except Exception as e:
             print(f"Error: {e}")
-            self.send_response(500)
-            self.send_header('Content-Type', 'application/json')
-            self.send_header('Access-Control-Allow-Origin', '*')
-            self.end_headers()
-
             error_response = {
                 "error": str(e),
                 "message": "Evaluation failed"
             }
-            self.wfile.write(json.dumps(error_response).encode('utf-8'))
+            return json_response(error_response, 500)
 
 def run_server(port=8080):
-    server_address = ('', port)
-    httpd = HTTPServer(server_address, EvaluationHandler)
     print(f'Starting W&B Weave Evaluation API on port {port}...')
     print(f'Weave dashboard: https://wandb.ai/shrinked-ai/craig-evaluation')
-    httpd.serve_forever()
+    print(f'Batch endpoint: POST {BATCH_PATH} (JSON array or NDJSON; NDJSON is scored {BATCH_CHUNK} examples at a time as it arrives)')
+    print(f'Cache stats: GET {CACHE_STATS_PATH}' + (f' (persisted to {CACHE.path})' if CACHE.path else ''))
+    print(f'Metrics: GET {METRICS_PATH} (Prometheus)')
+    print(f'Scorers: {", ".join(REGISTRY.names)} - pick with "metrics" (GET {SCORERS_PATH})')
+    print(f'Ready in {COLD_START_MS:.0f} ms (Weave init: {WEAVE.mode}, GET {WEAVE_STATUS_PATH})')
+    if UPLOADER:
+        print(f'Background trace upload on: GET {TRACE_STATS_PATH}')
+    if HISTORY:
+        print(f'Score history: {HISTORY.path}, leaderboard on GET {HISTORY_PATH}')
+    if EXECUTOR.backend != 'inline':
+        EXECUTOR.start()
+        print(f'Responses over {EXECUTOR.threshold} chars analyzed by {EXECUTOR.workers} {EXECUTOR.backend} workers: GET {EXECUTOR_STATS_PATH}')
+    run_async_server(EvaluationHandler(), port)
 
 if __name__ == '__main__':
     run_server(8080)
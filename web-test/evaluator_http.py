@@ -0,0 +1,637 @@
+"""
+HTTP helpers shared by the Python evaluator services
+Includes a small asyncio HTTP/1.1 server: one long-lived event loop, one task
+per connection, keep-alive, so a slow Weave upload never blocks other requests.
+Handlers can also accept WebSocket upgrades on selected paths.
+Every request is timed into metrics.METRICS and GET /metrics serves the totals.
+
+Request bodies are capped (413 over the limit) and may use Content-Length or
+chunked transfer encoding. POSTs to a handler's stream_paths are not read up
+front: read_examples() parses NDJSON batches line by line as they arrive and
+hands them out in chunks, so memory stays flat however long the batch is, and
+batch_response() streams NDJSON results back when the client accepts them.
+
+EVALUATOR_MAX_BODY_BYTES   buffered bodies: single requests, JSON array batches (default 8 MiB)
+EVALUATOR_MAX_LINE_BYTES   one NDJSON example (default 1 MiB)
+EVALUATOR_MAX_STREAM_BYTES a whole streamed NDJSON batch (default 1 GiB)
+EVALUATOR_BATCH_CHUNK      examples scored per chunk of a streamed batch (default 256)
+"""
+import io
+import os
+import json
+import base64
+import struct
+import asyncio
+import hashlib
+import time
+import http.client
+from http import HTTPStatus
+from urllib.parse import urlparse
+from metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, METRICS, METRICS_PATH, phase
+
+BATCH_PATH = '/evaluate/batch'
+STREAM_PATH = '/evaluate/stream'
+CACHE_STATS_PATH = '/cache/stats'
+TRACE_STATS_PATH = '/traces/stats'
+WEAVE_STATUS_PATH = '/weave/status'
+EXECUTOR_STATS_PATH = '/executor/stats'
+HISTORY_PATH = '/history/leaderboard'
+SCORERS_PATH = '/scorers'
+MAX_HEADER_BYTES = 64 * 1024
+MAX_MESSAGE_BYTES = 1024 * 1024
+MAX_BODY_BYTES = int(os.getenv('EVALUATOR_MAX_BODY_BYTES', str(8 * 1024 * 1024)))
+MAX_LINE_BYTES = int(os.getenv('EVALUATOR_MAX_LINE_BYTES', str(1024 * 1024)))
+MAX_STREAM_BYTES = int(os.getenv('EVALUATOR_MAX_STREAM_BYTES', str(1024 * 1024 * 1024)))
+BATCH_CHUNK = int(os.getenv('EVALUATOR_BATCH_CHUNK', '256'))
+READ_SIZE = 64 * 1024
+NDJSON_CONTENT_TYPE = 'application/x-ndjson'
+WEBSOCKET_GUID = '258EAFA5-E914-47DA-95CA-C5AB0DC85B11'
+
+
+class RequestError(ValueError):
+    """Malformed or oversized request; answered with `status` and the connection closed"""
+
+    def __init__(self, message: str, status: int = 400):
+        super().__init__(message)
+        self.status = status
+
+
+def body_framing(headers, limit: int) -> tuple:
+    """(Content-Length or None, chunked) of a request, rejecting what cannot be read safely"""
+    encoding = (headers.get('Transfer-Encoding') or '').strip().lower()
+    if encoding and encoding != 'chunked':
+        raise RequestError(f"Unsupported Transfer-Encoding: {encoding}", 501)
+    if encoding and headers.get('Content-Length') is not None:
+        raise RequestError("Content-Length and Transfer-Encoding are mutually exclusive")
+    if encoding:
+        return None, True
+
+    try:
+        length = int(headers.get('Content-Length') or 0)
+    except ValueError:
+        raise RequestError("Bad Content-Length")
+    if length < 0:
+        raise RequestError("Bad Content-Length")
+    if length > limit:
+        raise RequestError(f"Request body over {limit} bytes", 413)
+    return length, False
+
+
+def read_body(rfile, headers, limit: int = MAX_BODY_BYTES) -> bytes:
+    """Blocking body read for BaseHTTPRequestHandler: Content-Length or chunked, at most limit bytes"""
+    length, chunked = body_framing(headers, limit)
+    if not chunked:
+        return rfile.read(length)
+
+    parts = []
+    size = 0
+    while True:
+        size_line = rfile.readline(MAX_HEADER_BYTES)
+        try:
+            chunk_size = int(size_line.split(b';', 1)[0].strip(), 16)
+        except ValueError:
+            raise RequestError("Bad chunk size")
+        if chunk_size == 0:
+            while rfile.readline(MAX_HEADER_BYTES).strip():
+                pass  # Trailers
+            return b''.join(parts)
+        size += chunk_size
+        if size > limit:
+            raise RequestError(f"Request body over {limit} bytes", 413)
+        chunk = rfile.read(chunk_size)
+        if len(chunk) < chunk_size or rfile.read(2) != b'\r\n':
+            raise RequestError("Truncated chunk")
+        parts.append(chunk)
+
+
+class BodyStream:
+    """
+    A request body as it arrives on the connection: Content-Length or chunked,
+    never more than `limit` bytes. Read it whole (read) or line by line (lines).
+    """
+
+    def __init__(self, reader: asyncio.StreamReader, length: int = None, chunked: bool = False, limit: int = MAX_STREAM_BYTES):
+        self.reader = reader
+        self.chunked = chunked
+        self.limit = limit
+        self.received = 0
+        self.done = not chunked and not length
+        self._remaining = length or 0
+        self._chunk_left = 0
+        self._buffer = bytearray()
+
+    async def _read_chunk_size(self) -> int:
+        try:
+            size_line = await self.reader.readuntil(b'\r\n')
+        except asyncio.LimitOverrunError:
+            raise RequestError("Bad chunk size")
+        try:
+            return int(size_line.split(b';', 1)[0].strip(), 16)
+        except ValueError:
+            raise RequestError("Bad chunk size")
+
+    async def _next(self) -> bytes:
+        """Next piece of the body from the wire, b'' at the end"""
+        if self.done:
+            return b''
+        if self.chunked:
+            if self._chunk_left == 0:
+                size = await self._read_chunk_size()
+                if size == 0:
+                    try:
+                        while (await self.reader.readuntil(b'\r\n')) != b'\r\n':
+                            pass  # Trailers
+                    except asyncio.LimitOverrunError:
+                        raise RequestError("Trailer line too long", 431)
+                    self.done = True
+                    return b''
+                self._chunk_left = size
+            data = await self.reader.read(min(self._chunk_left, READ_SIZE))
+            if not data:
+                raise asyncio.IncompleteReadError(b'', self._chunk_left)
+            self._chunk_left -= len(data)
+            if self._chunk_left == 0 and await self.reader.readexactly(2) != b'\r\n':
+                raise RequestError("Bad chunk terminator")
+        else:
+            data = await self.reader.read(min(self._remaining, READ_SIZE))
+            if not data:
+                raise asyncio.IncompleteReadError(b'', self._remaining)
+            self._remaining -= len(data)
+            self.done = self._remaining == 0
+
+        self.received += len(data)
+        if self.received > self.limit:
+            raise RequestError(f"Request body over {self.limit} bytes", 413)
+        return data
+
+    async def read(self, limit: int = MAX_BODY_BYTES) -> bytes:
+        """The rest of the body, at most limit bytes in all"""
+        while (data := await self._next()):
+            if self.received > limit:
+                raise RequestError(f"Request body over {limit} bytes", 413)
+            self._buffer.extend(data)
+        body = bytes(self._buffer)
+        self._buffer.clear()
+        return body
+
+    async def peek(self) -> int:
+        """First non-whitespace byte of the body (None if there is none), left unread"""
+        while True:
+            stripped = self._buffer.lstrip()
+            if stripped:
+                return stripped[0]
+            if len(self._buffer) > MAX_LINE_BYTES:
+                raise RequestError(f"Line over {MAX_LINE_BYTES} bytes", 413)
+            data = await self._next()
+            if not data:
+                return None
+            self._buffer.extend(data)
+
+    async def lines(self, max_line: int = MAX_LINE_BYTES):
+        """Async iterator of lines (bytes, without the newline) as they arrive"""
+        buffer = self._buffer
+        while True:
+            start = 0
+            while (end := buffer.find(b'\n', start)) >= 0:
+                if end - start > max_line:
+                    raise RequestError(f"NDJSON line over {max_line} bytes", 413)
+                yield bytes(buffer[start:end])
+                start = end + 1
+            del buffer[:start]
+            if len(buffer) > max_line:
+                raise RequestError(f"NDJSON line over {max_line} bytes", 413)
+
+            data = await self._next()
+            if not data:
+                break
+            buffer.extend(data)
+        if buffer:
+            yield bytes(buffer)
+            buffer.clear()
+
+
+def parse_examples(body: bytes, content_type: str = '') -> list:
+    """
+    Parse a batch body into a list of example dicts.
+    Accepts a JSON array, or NDJSON (one example per line).
+    Malformed bodies raise RequestError (400).
+    """
+    with phase('parse'):
+        try:
+            text = body.decode('utf-8').strip()
+        except ValueError as e:
+            raise RequestError(f"Invalid JSON: {e}")
+        if not text:
+            return []
+
+        if not text.startswith('[') or 'ndjson' in (content_type or ''):
+            examples = []
+            for number, line in enumerate(text.splitlines(), 1):
+                if not line.strip():
+                    continue
+                try:
+                    examples.append(json.loads(line))
+                except ValueError as e:
+                    raise RequestError(f"Line {number}: {e}")
+        else:
+            try:
+                examples = json.loads(text)
+            except ValueError as e:
+                raise RequestError(f"Invalid JSON: {e}")
+
+    for i, example in enumerate(examples):
+        if not isinstance(example, dict):
+            raise RequestError(f"Example {i} must be a JSON object")
+    return examples
+
+
+def parse_object(body: bytes) -> dict:
+    """A single-example body or message: one JSON object, else RequestError (400)"""
+    with phase('parse'):
+        try:
+            data = json.loads(body.decode('utf-8') if isinstance(body, bytes) else body)
+        except ValueError as e:
+            raise RequestError(f"Invalid JSON: {e}")
+    if not isinstance(data, dict):
+        raise RequestError("Request body must be a JSON object")
+    return data
+
+
+def _parse_lines(lines: list, first: int) -> list:
+    examples = []
+    with phase('parse'):
+        for number, line in enumerate(lines, first):
+            try:
+                example = json.loads(line)
+            except ValueError as e:
+                raise RequestError(f"Line {number}: {e}")
+            if not isinstance(example, dict):
+                raise RequestError(f"Line {number}: example must be a JSON object")
+            examples.append(example)
+    return examples
+
+
+async def read_examples(request: 'Request', chunk_size: int = BATCH_CHUNK):
+    """
+    Async iterator over a batch body in lists of up to chunk_size examples.
+    NDJSON is parsed as it arrives; a JSON array is read whole (EVALUATOR_MAX_BODY_BYTES).
+    Works for buffered requests too.
+    """
+    content_type = request.headers.get('Content-Type', '') or ''
+    if request.stream is None:
+        examples = parse_examples(request.body, content_type)
+        for start in range(0, len(examples), chunk_size):
+            yield examples[start:start + chunk_size]
+        return
+
+    if await request.stream.peek() == ord('[') and 'ndjson' not in content_type:
+        examples = parse_examples(await request.stream.read(), content_type)
+        for start in range(0, len(examples), chunk_size):
+            yield examples[start:start + chunk_size]
+        return
+
+    pending = []
+    number = 0
+    async for line in request.stream.lines():
+        number += 1
+        if line.strip():
+            pending.append((number, line))
+        if len(pending) == chunk_size:
+            yield _parse_lines([line for _, line in pending], pending[0][0])
+            pending = []
+    if pending:
+        yield _parse_lines([line for _, line in pending], pending[0][0])
+
+
+async def batch_response(request: 'Request', results) -> 'Response':
+    """
+    Response for an async iterator of batch results: streamed as NDJSON (one
+    result per line, chunked) when the client accepts it, else the usual
+    {"results", "count"} document. A streamed batch that fails midway ends
+    with an {"error"} line. Streaming is full duplex: results flow back while
+    the body is still arriving, so the client must read as it sends.
+    """
+    if 'ndjson' in (request.headers.get('Accept') or ''):
+        async def lines():
+            try:
+                async for result in results:
+                    with phase('serialize'):
+                        yield json.dumps(result).encode('utf-8') + b'\n'
+            except Exception as e:
+                print(f"✗ Streamed batch failed: {e}")
+                yield json.dumps({"error": str(e), "message": "Evaluation failed"}).encode('utf-8') + b'\n'
+        return Response(200, content_type=NDJSON_CONTENT_TYPE, stream=lines())
+
+    collected = [result async for result in results]
+    return json_response({"results": collected, "count": len(collected)})
+
+
+class Request:
+    """Parsed HTTP request; path and headers behave like BaseHTTPRequestHandler's"""
+
+    def __init__(self, method: str, path: str, version: str, headers, body: bytes = b'', stream: BodyStream = None):
+        self.method = method
+        self.path = path
+        self.version = version
+        self.headers = headers
+        self.body = body
+        self.stream = stream  # Unread body on stream_paths; body is then b''
+        self.parse_seconds = 0.0  # Request line + headers
+
+    @property
+    def wants_websocket(self) -> bool:
+        return (self.headers.get('Upgrade') or '').lower() == 'websocket' and bool(self.headers.get('Sec-WebSocket-Key'))
+
+    @property
+    def keep_alive(self) -> bool:
+        connection = (self.headers.get('Connection') or '').lower()
+        if self.version == 'HTTP/1.1':
+            return connection != 'close'
+        return connection == 'keep-alive'
+
+
+class Response:
+    def __init__(self, status: int = 200, body: bytes = b'', content_type: str = 'application/json', headers: dict = None, stream=None):
+        self.status = status
+        self.body = body
+        self.content_type = content_type
+        self.headers = headers or {}
+        self.stream = stream  # Async iterator of bytes, sent chunked instead of body
+
+
+def json_response(payload, status: int = 200) -> Response:
+    with phase('serialize'):
+        return Response(status, json.dumps(payload).encode('utf-8'))
+
+
+class WebSocket:
+    """
+    Server side of an RFC 6455 connection: text messages in and out, with
+    fragmentation, ping/pong and the close handshake handled here.
+    """
+
+    def __init__(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        self.reader = reader
+        self.writer = writer
+        self.closed = False
+
+    async def _write_frame(self, opcode: int, payload: bytes = b''):
+        length = len(payload)
+        if length < 126:
+            head = struct.pack('!BB', 0x80 | opcode, length)
+        elif length < 1 << 16:
+            head = struct.pack('!BBH', 0x80 | opcode, 126, length)
+        else:
+            head = struct.pack('!BBQ', 0x80 | opcode, 127, length)
+        self.writer.write(head + payload)
+        await self.writer.drain()
+
+    async def _read_frame(self):
+        first, second = await self.reader.readexactly(2)
+        length = second & 0x7F
+        if length == 126:
+            length = struct.unpack('!H', await self.reader.readexactly(2))[0]
+        elif length == 127:
+            length = struct.unpack('!Q', await self.reader.readexactly(8))[0]
+        if length > MAX_MESSAGE_BYTES:
+            raise ValueError("WebSocket frame too large")
+
+        mask = await self.reader.readexactly(4) if second & 0x80 else None
+        payload = await self.reader.readexactly(length)
+        if mask:
+            key = (mask * (length // 4 + 1))[:length]
+            payload = (int.from_bytes(payload, 'big') ^ int.from_bytes(key, 'big')).to_bytes(length, 'big')
+        return bool(first & 0x80), first & 0x0F, payload
+
+    async def receive(self):
+        """Next text message, or None once the client has closed"""
+        parts = []
+        size = 0
+        while not self.closed:
+            try:
+                fin, opcode, payload = await self._read_frame()
+            except (asyncio.IncompleteReadError, ConnectionError):
+                self.closed = True
+                return None
+            except ValueError:
+                await self.close(1009)
+                return None
+
+            if opcode == 0x8:
+                await self.close()
+                return None
+            if opcode == 0x9:
+                await self._write_frame(0xA, payload)
+                continue
+            if opcode == 0xA:
+                continue
+
+            parts.append(payload)
+            size += len(payload)
+            if size > MAX_MESSAGE_BYTES:
+                await self.close(1009)
+                return None
+            if fin:
+                return b''.join(parts).decode('utf-8')
+        return None
+
+    async def send(self, text: str):
+        if not self.closed:
+            await self._write_frame(0x1, text.encode('utf-8'))
+
+    async def send_json(self, payload):
+        await self.send(json.dumps(payload))
+
+    async def close(self, code: int = 1000):
+        if self.closed:
+            return
+        self.closed = True
+        try:
+            await self._write_frame(0x8, struct.pack('!H', code))
+        except ConnectionError:
+            pass
+
+
+class AsyncHandler:
+    """
+    asyncio counterpart of BaseHTTPRequestHandler.
+    One instance serves every connection; do_<METHOD>(request) coroutines return a Response.
+    Paths listed in websocket_paths accept an Upgrade and are served by
+    do_WEBSOCKET(request, websocket) for the life of the connection.
+    POSTs to stream_paths get request.stream (see read_examples) instead of request.body.
+    """
+
+    websocket_paths = ()
+    stream_paths = ()
+
+    def log_message(self, format, *args):
+        print(format % args)
+
+    async def do_OPTIONS(self, request: Request) -> Response:
+        return Response(200, headers={
+            'Access-Control-Allow-Methods': 'GET, POST, OPTIONS',
+            'Access-Control-Allow-Headers': 'Content-Type'
+        })
+
+
+class AsyncHTTPServer:
+    def __init__(self, handler: AsyncHandler, host: str = '', port: int = 8080):
+        self.handler = handler
+        self.host = host or None
+        self.port = port
+
+    async def read_request(self, reader: asyncio.StreamReader):
+        try:
+            head = await reader.readuntil(b'\r\n\r\n')
+        except asyncio.IncompleteReadError:
+            return None  # Client closed the connection between requests
+        except asyncio.LimitOverrunError:
+            raise ValueError("Request headers too large")
+
+        started = time.perf_counter()
+        request_line, _, header_bytes = head.partition(b'\r\n')
+        try:
+            method, path, version = request_line.decode('latin-1').split()
+        except ValueError:
+            raise ValueError(f"Bad request line: {request_line!r}")
+        headers = http.client.parse_headers(io.BytesIO(header_bytes))
+        parse_seconds = time.perf_counter() - started
+
+        streamed = method == 'POST' and urlparse(path).path.rstrip('/') in self.handler.stream_paths
+        length, chunked = body_framing(headers, MAX_STREAM_BYTES if streamed else MAX_BODY_BYTES)
+        stream = BodyStream(reader, length, chunked)
+        if streamed:
+            request = Request(method, path, version, headers, stream=stream)
+        else:
+            request = Request(method, path, version, headers, await stream.read())
+        request.parse_seconds = parse_seconds
+        return request
+
+    async def dispatch(self, request: Request) -> Response:
+        if request.method == 'GET' and urlparse(request.path).path.rstrip('/') == METRICS_PATH:
+            return Response(200, METRICS.render().encode('utf-8'), METRICS_CONTENT_TYPE)
+        method = getattr(self.handler, 'do_' + request.method, None)
+        if method is None:
+            return json_response({"error": f"Unsupported method {request.method}"}, 501)
+        try:
+            return await method(request)
+        except RequestError as e:
+            return json_response({"error": str(e)}, e.status)
+        except Exception as e:
+            print(f"✗ Unhandled error: {e}")
+            return json_response({"error": str(e), "message": "Evaluation failed"}, 500)
+
+    async def write_response(self, writer: asyncio.StreamWriter, request: Request, response: Response, keep_alive: bool) -> int:
+        """Send response; returns the body bytes sent"""
+        try:
+            reason = HTTPStatus(response.status).phrase
+        except ValueError:
+            reason = ''
+        # HTTP/1.0 clients cannot read chunks: the end of the connection ends the body
+        chunked = response.stream is not None and request.version == 'HTTP/1.1'
+        lines = [
+            f'HTTP/1.1 {response.status} {reason}',
+            f'Content-Type: {response.content_type}',
+            'Transfer-Encoding: chunked' if chunked else f'Content-Length: {len(response.body)}',
+            'Access-Control-Allow-Origin: *',
+            f'Connection: {"keep-alive" if keep_alive else "close"}',
+        ]
+        if response.stream is not None and not chunked:
+            lines.pop(2)
+        lines.extend(f'{name}: {value}' for name, value in response.headers.items())
+        head = ('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1')
+
+        sent = len(response.body)
+        if response.stream is None:
+            with phase('send'):
+                writer.write(head + response.body)
+                await writer.drain()
+        else:
+            writer.write(head)
+            async for piece in response.stream:
+                if not piece:
+                    continue
+                sent += len(piece)
+                with phase('send'):
+                    writer.write(b'%x\r\n%s\r\n' % (len(piece), piece) if chunked else piece)
+                    await writer.drain()
+            if chunked:
+                writer.write(b'0\r\n\r\n')
+                await writer.drain()
+
+        peer = writer.get_extra_info('peername') or ('-',)
+        self.handler.log_message('%s "%s %s %s" %d -', peer[0], request.method, request.path, request.version, response.status)
+        return sent
+
+    async def upgrade(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter, request: Request):
+        digest = hashlib.sha1((request.headers['Sec-WebSocket-Key'].strip() + WEBSOCKET_GUID).encode('ascii')).digest()
+        lines = [
+            'HTTP/1.1 101 Switching Protocols',
+            'Upgrade: websocket',
+            'Connection: Upgrade',
+            f'Sec-WebSocket-Accept: {base64.b64encode(digest).decode("ascii")}',
+        ]
+        writer.write(('\r\n'.join(lines) + '\r\n\r\n').encode('latin-1'))
+        await writer.drain()
+        peer = writer.get_extra_info('peername') or ('-',)
+        self.handler.log_message('%s "%s %s %s" %d -', peer[0], request.method, request.path, request.version, 101)
+
+        websocket = WebSocket(reader, writer)
+        try:
+            await self.handler.do_WEBSOCKET(request, websocket)
+        except Exception as e:
+            print(f"✗ Unhandled error: {e}")
+            await websocket.close(1011)
+        await websocket.close()
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        try:
+            while True:
+                try:
+                    request = await self.read_request(reader)
+                except ValueError as e:
+                    bad = Request('-', '-', 'HTTP/1.1', http.client.HTTPMessage())
+                    await self.write_response(writer, bad, json_response({"error": str(e)}, getattr(e, 'status', 400)), False)
+                    break
+                if request is None:
+                    break
+
+                timer = METRICS.start(request.path, request.method)
+                timer.record('parse', request.parse_seconds)
+                if request.wants_websocket and urlparse(request.path).path.rstrip('/') in self.handler.websocket_paths:
+                    # The whole session counts as one request (in flight while open)
+                    try:
+                        await self.upgrade(reader, writer, request)
+                    finally:
+                        timer.finish(101)
+                    break
+
+                response = None
+                sent = 0
+                try:
+                    response = await self.dispatch(request)
+                    # A body the handler left unread (or that is still streaming out) ends the connection
+                    keep_alive = request.keep_alive and (request.stream is None or request.stream.done) and \
+                        (response.stream is None or request.version == 'HTTP/1.1')
+                    sent = await self.write_response(writer, request, response, keep_alive)
+                finally:
+                    timer.finish(response.status if response else 500, sent)
+                if not keep_alive or (request.stream is not None and not request.stream.done):
+                    break
+        except (ConnectionError, asyncio.IncompleteReadError):
+            pass
+        finally:
+            writer.close()
+
+    async def serve_forever(self):
+        server = await asyncio.start_server(self.handle_connection, self.host, self.port, limit=MAX_HEADER_BYTES)
+        async with server:
+            await server.serve_forever()
+
+
+def run_async_server(handler: AsyncHandler, port: int = 8080):
+    """Serve handler on a single long-lived event loop until interrupted"""
+    try:
+        asyncio.run(AsyncHTTPServer(handler, port=port).serve_forever())
+    except KeyboardInterrupt:
+        print('\n🛑 Server stopped')
@@ -0,0 +1,194 @@
+"""
+Request metrics shared by the Python services
+Per-route request counts, in-flight gauges, bytes sent and latency histograms -
+for the whole request and per phase (parse, score, weave_log, serialize, ...) -
+rendered in the Prometheus text format on /metrics.
+
+Servers wrap each request in METRICS.start(...) / timer.finish(...); code on the
+request path marks its phases with `with phase('score'):`. Phases nest: time
+spent in an inner phase is not counted again in the outer one, so the phase
+histograms show where request time actually goes. A phase entered several
+times in one request (e.g. per example) is summed and observed once, at finish. Outside a request phase()
+does nothing, so scorers stay cheap in scripts and benchmarks.
+"""
+import time
+import bisect
+import threading
+import contextlib
+import contextvars
+
+METRICS_PATH = '/metrics'
+CONTENT_TYPE = 'text/plain; version=0.0.4; charset=utf-8'
+
+# Seconds; scoring a response is sub-millisecond to tens of milliseconds,
+# a traced Weave evaluation can take seconds
+BUCKETS = (0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+
+# Distinct route labels kept before new paths are counted as 'other'
+MAX_ROUTES = 64
+OTHER_ROUTE = 'other'
+
+_current = contextvars.ContextVar('metrics_request', default=None)
+_frame = contextvars.ContextVar('metrics_phase', default=None)
+
+
+class Histogram:
+    def __init__(self, buckets: tuple = BUCKETS):
+        self.buckets = buckets
+        self.counts = [0] * (len(buckets) + 1)  # Last slot is +Inf
+        self.sum = 0.0
+        self.count = 0
+
+    def observe(self, value: float):
+        self.counts[bisect.bisect_left(self.buckets, value)] += 1
+        self.sum += value
+        self.count += 1
+
+
+class RequestTimer:
+    """One request in flight; phase() calls in its context are attributed to its route"""
+
+    def __init__(self, registry: 'Registry', route: str, method: str):
+        self.registry = registry
+        self.route = route
+        self.method = method
+        self.started = time.perf_counter()
+        self.phases = {}  # phase -> seconds spent in it so far
+        self._lock = threading.Lock()  # Phases may end in to_thread workers
+        self._token = _current.set(self)
+
+    def record(self, phase_name: str, seconds: float):
+        with self._lock:
+            self.phases[phase_name] = self.phases.get(phase_name, 0.0) + seconds
+
+    def finish(self, status: int, bytes_sent: int = 0):
+        try:
+            _current.reset(self._token)
+        except ValueError:
+            _current.set(None)  # Finished from another context
+        with self._lock:
+            phases, self.phases = self.phases, {}
+        for phase_name, seconds in phases.items():
+            self.registry.observe_phase(self.route, phase_name, seconds)
+        self.registry.finish(self, status, bytes_sent, time.perf_counter() - self.started)
+
+
+@contextlib.contextmanager
+def phase(name: str):
+    """Time a block as one phase of the current request (exclusive of nested phases)"""
+    timer = _current.get()
+    if timer is None:
+        yield
+        return
+
+    parent = _frame.get()
+    frame = [0.0]  # Time spent in nested phases
+    token = _frame.set(frame)
+    started = time.perf_counter()
+    try:
+        yield
+    finally:
+        elapsed = time.perf_counter() - started
+        _frame.reset(token)
+        if parent is not None:
+            parent[0] += elapsed
+        timer.record(name, max(0.0, elapsed - frame[0]))
+
+
+class Registry:
+    def __init__(self, buckets: tuple = BUCKETS, max_routes: int = MAX_ROUTES):
+        self.buckets = buckets
+        self.max_routes = max_routes
+        self._lock = threading.Lock()
+        self._routes = set()
+        self.requests = {}    # (route, method, status) -> count
+        self.in_flight = {}   # route -> requests being handled
+        self.bytes_sent = {}  # route -> response body bytes
+        self.latency = {}     # route -> Histogram
+        self.phases = {}      # (route, phase) -> Histogram
+
+    def route(self, path: str) -> str:
+        """Route label for a request path (query dropped, cardinality capped)"""
+        return self.label(path.split('?', 1)[0].split('#', 1)[0].rstrip('/') or '/')
+
+    def label(self, route: str) -> str:
+        """route itself while fewer than max_routes labels exist, else OTHER_ROUTE"""
+        with self._lock:
+            if route in self._routes:
+                return route
+            if len(self._routes) >= self.max_routes:
+                return OTHER_ROUTE
+            self._routes.add(route)
+        return route
+
+    def start(self, path: str, method: str, route: str = None) -> RequestTimer:
+        route = self.label(route) if route else self.route(path)
+        with self._lock:
+            self.in_flight[route] = self.in_flight.get(route, 0) + 1
+        return RequestTimer(self, route, method)
+
+    def finish(self, timer: RequestTimer, status: int, bytes_sent: int, seconds: float):
+        route = timer.route
+        key = (route, timer.method, str(status))
+        with self._lock:
+            self.in_flight[route] -= 1
+            self.requests[key] = self.requests.get(key, 0) + 1
+            self.bytes_sent[route] = self.bytes_sent.get(route, 0) + bytes_sent
+            self.latency.setdefault(route, Histogram(self.buckets)).observe(seconds)
+
+    def observe_phase(self, route: str, phase_name: str, seconds: float):
+        with self._lock:
+            self.phases.setdefault((route, phase_name), Histogram(self.buckets)).observe(seconds)
+
+    def render(self) -> str:
+        """Everything recorded so far, in the Prometheus text exposition format"""
+        lines = []
+
+        def family(name, kind, help_text):
+            lines.append(f'# HELP {name} {help_text}')
+            lines.append(f'# TYPE {name} {kind}')
+
+        def histogram(name, labels, hist):
+            cumulative = 0
+            for bound, count in zip(self.buckets + ('+Inf',), hist.counts):
+                cumulative += count
+                le = bound if bound == '+Inf' else repr(float(bound))
+                lines.append(f'{name}_bucket{_labels(labels, le=le)} {cumulative}')
+            lines.append(f'{name}_sum{_labels(labels)} {hist.sum!r}')
+            lines.append(f'{name}_count{_labels(labels)} {hist.count}')
+
+        with self._lock:
+            family('http_requests_total', 'counter', 'Requests handled, by route, method and status')
+            for (route, method, status), count in sorted(self.requests.items()):
+                lines.append(f'http_requests_total{_labels({"route": route, "method": method, "status": status})} {count}')
+
+            family('http_requests_in_flight', 'gauge', 'Requests currently being handled')
+            for route, count in sorted(self.in_flight.items()):
+                lines.append(f'http_requests_in_flight{_labels({"route": route})} {count}')
+
+            family('http_response_bytes_total', 'counter', 'Response body bytes sent')
+            for route, count in sorted(self.bytes_sent.items()):
+                lines.append(f'http_response_bytes_total{_labels({"route": route})} {count}')
+
+            family('http_request_duration_seconds', 'histogram', 'Time from parsed request to response written')
+            for route, hist in sorted(self.latency.items()):
+                histogram('http_request_duration_seconds', {"route": route}, hist)
+
+            family('http_request_phase_seconds', 'histogram', 'Time each request spent per phase, excluding nested phases')
+            for (route, phase_name), hist in sorted(self.phases.items()):
+                histogram('http_request_phase_seconds', {"route": route, "phase": phase_name}, hist)
+
+        return '\n'.join(lines) + '\n'
+
+
+def _escape(value: str) -> str:
+    return str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n')
+
+
+def _labels(labels: dict, **extra) -> str:
+    pairs = dict(labels, **extra)
+    return '{' + ','.join(f'{name}="{_escape(value)}"' for name, value in pairs.items()) + '}'
+
+
+# One registry per process - each service exposes its own /metrics
+METRICS = Registry()
@@ -0,0 +1,228 @@
+"""
+ES module import-graph analyzer for public/modules
+Statically walks `import ... from`, `export ... from`, `import '...'`, literal
+`import('...')` and `new URL('...', import.meta.url)` references starting at the
+TalkingHead entry, resolving bare specifiers through the same import map as
+pages/_app.js. The static closure is the critical path: server.py announces it
+with `Link: rel=modulepreload` (and optionally 103 Early Hints) so the browser
+fetches the whole tree in one round-trip instead of one level per parse.
+URLs are in the app's URL space, where public/ is the web root: the entry is
+/modules/talkinghead.mjs (src/index.jsx), `three` is /modules/three.js.
+
+Run with:
+  python3 module_graph.py                       # print the graph and critical path
+  python3 module_graph.py -o preload-manifest.json
+  python3 module_graph.py --also public/modules/lipsync-en.mjs
+"""
+import os
+import re
+import sys
+import json
+import argparse
+import functools
+from collections import deque
+
+ROOT = os.path.dirname(os.path.abspath(__file__))
+DEFAULT_ENTRIES = ['public/modules/talkinghead.mjs']
+
+# Same mapping as the <script type="importmap"> in pages/_app.js (URLs under public/)
+DEFAULT_IMPORT_MAP = {
+    "three": "/modules/three.js",
+    "three/addons/": "/modules/three-addons/"
+}
+
+# Comments are dropped, string literals kept (specifiers live in them)
+_TOKENS = re.compile(
+    r'(?P<comment>//[^\n]*|/\*.*?\*/)'
+    r'|(?P<string>"(?:\\.|[^"\\\n])*"|\'(?:\\.|[^\'\\\n])*\'|`(?:\\.|[^`\\])*`)',
+    re.S
+)
+
+_STATIC = re.compile(
+    r'(?:^|[;}\n])\s*(?:import\s*(?:[\w$*{}\s,]+?\s*from\s*)?|export\s*(?:\*(?:\s*as\s+[\w$]+)?|\{[^}]*\})\s*from\s*)'
+    r'[\'"]([^\'"\n]+)[\'"]'
+)
+_DYNAMIC = re.compile(r'\bimport\s*\(\s*[\'"]([^\'"\n]+)[\'"]\s*\)')
+_DYNAMIC_EXPRESSION = re.compile(r'\bimport\s*\(\s*(?![\'"][^\'"\n]+[\'"]\s*\))([^)\n]{0,80})')
+_ASSET_URL = re.compile(r'new\s+URL\(\s*[\'"]([^\'"\n]+)[\'"]\s*,\s*import\.meta\.url\s*\)')
+
+
+def strip_comments(source: str) -> str:
+    return _TOKENS.sub(lambda m: ' ' if m.group('comment') else m.group(0), source)
+
+
+def scan(source: str) -> dict:
+    """Specifiers referenced by one module, by kind"""
+    code = strip_comments(source)
+    return {
+        "static": _STATIC.findall(code),
+        "dynamic": _DYNAMIC.findall(code),
+        "assets": _ASSET_URL.findall(code),
+        "unresolved_dynamic": [expr.strip() for expr in _DYNAMIC_EXPRESSION.findall(code)]
+    }
+
+
+class ModuleGraph:
+    def __init__(self, root: str = ROOT, public_dir: str = 'public', import_map: dict = None):
+        self.root = os.path.abspath(root)
+        self.public_dir = os.path.join(self.root, public_dir)
+        self.import_map = DEFAULT_IMPORT_MAP if import_map is None else import_map
+        self.modules = {}  # relpath -> {"static": [...], "dynamic": [...], "assets": [...], "unresolved_dynamic": [...]}
+        self.missing = []
+
+    def resolve(self, specifier: str, importer: str):
+        """File (relative to root) a specifier refers to, or None for external URLs"""
+        specifier = specifier.split('?', 1)[0].split('#', 1)[0]
+        if re.match(r'^[a-z]+:', specifier):
+            return None
+
+        if specifier.startswith(('./', '../')):
+            path = os.path.join(os.path.dirname(os.path.join(self.root, importer)), specifier)
+        elif specifier.startswith('/'):
+            path = os.path.join(self.public_dir, specifier.lstrip('/'))
+        else:
+            # Bare specifier: exact import-map key first, then the longest prefix key
+            target = self.import_map.get(specifier)
+            if target is None:
+                prefixes = [key for key in self.import_map if key.endswith('/') and specifier.startswith(key)]
+                if not prefixes:
+                    return None
+                key = max(prefixes, key=len)
+                target = self.import_map[key] + specifier[len(key):]
+            path = os.path.join(self.public_dir, target.lstrip('/'))
+
+        return os.path.relpath(os.path.normpath(path), self.root)
+
+    def walk(self, entries: list):
+        """Scan every module reachable from the entries (static and literal dynamic edges)"""
+        queue = deque(entries)
+        while queue:
+            module = queue.popleft()
+            if module in self.modules:
+                continue
+            try:
+                with open(os.path.join(self.root, module), encoding='utf-8') as f:
+                    found = scan(f.read())
+            except OSError:
+                self.missing.append(module)
+                self.modules[module] = None
+                continue
+
+            resolved = {"unresolved_dynamic": found["unresolved_dynamic"]}
+            for kind in ("static", "dynamic", "assets"):
+                resolved[kind] = [path for path in (self.resolve(s, module) for s in found[kind]) if path]
+            self.modules[module] = resolved
+            queue.extend(resolved["static"] + resolved["dynamic"])
+        return self
+
+    def critical_path(self, entry: str) -> list:
+        """Static-import closure of entry, breadth first (shallowest first), entry excluded"""
+        order = []
+        seen = {entry}
+        queue = deque([entry])
+        while queue:
+            node = self.modules.get(queue.popleft())
+            if not node:
+                continue
+            for dep in node["static"]:
+                if dep not in seen:
+                    seen.add(dep)
+                    order.append(dep)
+                    queue.append(dep)
+        return order
+
+    def depth(self, entry: str) -> int:
+        """Longest chain of static imports - the round-trips a browser needs without preload"""
+        memo = {}
+
+        def longest(module, stack):
+            if module in memo:
+                return memo[module]
+            node = self.modules.get(module)
+            children = [dep for dep in (node["static"] if node else []) if dep not in stack]
+            memo[module] = 1 + max((longest(dep, stack | {dep}) for dep in children), default=0)
+            return memo[module]
+
+        return longest(entry, {entry})
+
+
+def url_for(path: str, public_dir: str = 'public') -> str:
+    """URL the app requests a file at: files under public_dir are served from the web root"""
+    url = path.replace(os.sep, '/')
+    prefix = public_dir.strip('/') + '/'
+    return '/' + (url[len(prefix):] if url.startswith(prefix) else url)
+
+
+def build_manifest(entries: list = None, also: list = None, root: str = ROOT, import_map: dict = None,
+                   public_dir: str = 'public') -> dict:
+    """
+    {entry URL: [URLs to modulepreload]} plus the analysis behind it.
+    `also` adds modules that are imported through non-literal specifiers
+    (e.g. the lipsync language the app uses) to every entry's preload list.
+    """
+    entries = entries or DEFAULT_ENTRIES
+    graph = ModuleGraph(root, public_dir, import_map=import_map).walk(entries + (also or []))
+    to_url = functools.partial(url_for, public_dir=public_dir)
+
+    preload = {}
+    analysis = {}
+    for entry in entries:
+        critical = graph.critical_path(entry)
+        for extra in also or []:
+            critical += [extra] + [dep for dep in graph.critical_path(extra) if dep not in critical and dep != extra]
+        preload[to_url(entry)] = [to_url(path) for path in critical if graph.modules.get(path) is not None]
+        analysis[to_url(entry)] = {
+            "import_depth": graph.depth(entry),
+            "critical_modules": len(critical),
+            "critical_bytes": sum(os.path.getsize(os.path.join(graph.root, path)) for path in critical if graph.modules.get(path) is not None)
+        }
+
+    return {
+        "preload": preload,
+        "analysis": analysis,
+        "graph": {to_url(path): node and {kind: [to_url(p) for p in paths] if kind != "unresolved_dynamic" else paths for kind, paths in node.items()}
+                  for path, node in graph.modules.items()},
+        "missing": [to_url(path) for path in graph.missing]
+    }
+
+
+def link_header(urls: list) -> str:
+    return ', '.join(f'<{url}>; rel=modulepreload' for url in urls)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Analyze the ES import graph under public/modules and emit a modulepreload manifest')
+    parser.add_argument('--entry', action='append', help=f"entry module relative to web-test (default {DEFAULT_ENTRIES[0]})")
+    parser.add_argument('--also', action='append', default=[], help="extra module to preload with every entry (dynamic imports)")
+    parser.add_argument('--import-map', help="JSON file with an import map {\"imports\": {...}}")
+    parser.add_argument('-o', '--output', help="write the manifest JSON here")
+    args = parser.parse_args(argv)
+
+    import_map = None
+    if args.import_map:
+        with open(args.import_map) as f:
+            import_map = json.load(f).get('imports', {})
+
+    manifest = build_manifest(args.entry, args.also, import_map=import_map)
+
+    for entry, urls in manifest["preload"].items():
+        info = manifest["analysis"][entry]
+        print(f"📦 {entry}")
+        print(f"   import depth {info['import_depth']} -> 1 round-trip with preload")
+        print(f"   {info['critical_modules']} modules, {info['critical_bytes'] / 1024:.0f} KB on the critical path:")
+        for url in urls:
+            print(f"     {url}")
+    for url, node in manifest["graph"].items():
+        if node and node["unresolved_dynamic"]:
+            print(f"⚠️  {url}: dynamic import(s) not statically resolvable: {', '.join(node['unresolved_dynamic'])}")
+    for url in manifest["missing"]:
+        print(f"❌ Missing module: {url}")
+
+    if args.output:
+        with open(args.output, 'w') as f:
+            json.dump(manifest, f, indent=2)
+        print(f"✅ Manifest written to {args.output}")
+
+
+if __name__ == '__main__':
+    main()
@@ -1,42 +1,161 @@
 """
 W&B Weave Evaluation API
 Scores AI responses and logs traces to Weights & Biases
+SCORER_PROFILE=1 times every scorer and regex; GET ?profile dumps the tables
+WEAVE_INIT=lazy|background serves local scoring before Weave is imported
+score_batch() scores many responses at once from a NumPy feature matrix (rescore.py)
+SCORE_HISTORY_PATH keeps every result locally; GET ?leaderboard&since=7d reads it back
+POST {"metrics": ["evidence", ...]} scores only those metrics; GET ?scorers lists them
+Request bodies over EVALUATOR_MAX_BODY_BYTES (default 8 MiB) are refused with 413
 """
+import time
+IMPORT_STARTED = time.perf_counter()
+
 import os
-import re
+import sys
 import json
 from http.server import BaseHTTPRequestHandler
-import weave
+from urllib.parse import parse_qs, urlparse
+
+try:
+    import numpy as np
+except ImportError:  # score_batch is optional; evaluate_response never needs it
+    np = None
+
+# Shared scoring engine lives at the web-test root
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..', '..'))
+from scoring_engine import ScoringEngine, TextFeatures
+from scorer_registry import ScorerRegistry
+from score_cache import ScoreCache, cache_key
+from score_history import ScoreHistory
+from weave_tracing import WEAVE, TraceUploader, op, start_weave, untraced, weave_sink
+from scorer_profiler import ScorerProfiler
+from evaluator_http import RequestError, parse_object, read_body
 
 # Set WANDB API key from environment (or use default for testing)
 if 'WANDB_API_KEY' not in os.environ:
     os.environ['WANDB_API_KEY'] = os.getenv('WANDB_API_KEY', 'f684e7f2a945f3b12d1d57352893e0e48d681bd9')
 
-# Initialize Weave
-weave.init('shrinked-ai/craig-evaluation')
-
-@weave.op()
+# Initialize Weave (now, on the first traced call, or in the background - see WEAVE_INIT)
+start_weave('shrinked-ai/craig-evaluation')
+
+# Vague language (penalty)
+VAGUE_TERMS = [
+    'some', 'many', 'often', 'generally', 'typically',
+    'multiple perspectives', 'it depends', 'on the other hand',
+    'can be', 'is believed', 'is thought', 'studies show',
+    'arguably', 'possibly', 'potentially', 'somewhat'
+]
+
+# Authentic voice indicators (bonus)
+AUTHENTIC_TERMS = [
+    'fuck', 'shit', 'damn', 'hell', 'clusterfuck', 'bullshit',
+    'ridiculous', 'absurd', 'insane', 'disgusting', 'outrage'
+]
+
+# Direct address patterns
+DIRECT_ADDRESS_TERMS = ['you think', 'guess what', "here's the deal", 'let me tell you']
+
+# Corporate neutrality (penalty)
+CORPORATE_TERMS = [
+    'balanced', 'nuanced', 'complex issue', 'various factors',
+    'concerning', 'challenging', 'unfortunate', 'suboptimal',
+    'however', 'on the other hand', 'while some', 'others argue'
+]
+
+# All lexicons resolve in one token pass; each regex runs at most once per response
+ENGINE = ScoringEngine(
+    lexicons={
+        'vague': VAGUE_TERMS,
+        'authentic': AUTHENTIC_TERMS,
+        'direct_address': DIRECT_ADDRESS_TERMS,
+        'corporate': CORPORATE_TERMS,
+    },
+    patterns={
+        'citations': r'\[(\d+)\]',
+        'range_citations': r'\[(\d+)\](?:[-–]|to)\[(\d+)\]',
+        'names': r'\b[A-Z][a-z]+ [A-Z][a-z]+(?:\s+[A-Z][a-z]+)?\b',
+        'dates': r'\b\d{4}\b|\b\d{1,2}/\d{1,2}/\d{2,4}\b',
+        'locations': r'\bin [A-Z][a-z]+(?:,? [A-Z]{2})?\b',
+        'statistics': r'\b\d+(?:\.\d+)?(?:\s?%|,\d+|\s+(?:people|cases|names|percent))\b',
+        'quotes': r'"[^"]+"',
+        'proper_nouns': r'\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)+\b',
+        'numbers': r'\b\d+(?:,\d+)*(?:\.\d+)?\b',
+        'percentages': r'\b\d+(?:\.\d+)?%\b',
+        'monetary': r'\$\d+(?:,\d+)*(?:\.\d+)?(?:\s?(?:million|billion|trillion))?\b',
+        'rhetorical': r'\?\s*(?:[A-Z]|$)',
+        # Factual grounding: sentence boundaries and claim markers
+        'sentence_breaks': r'[.!?]+',
+        'claims': r'\b\d+\b|[A-Z][a-z]+ [A-Z][a-z]+|\$\d+',
+    }
+)
+
+# Overall score weights, summed in this order
+WEIGHTS = {
+    'context_utilization': 0.30,
+    'evidence_density': 0.25,
+    'specificity': 0.20,
+    'emotional_authenticity': 0.10,
+    'factual_grounding': 0.15
+}
+
+# Frontend names of the metrics POST returns (grounding only feeds overall_score)
+RESPONSE_METRICS = {
+    'context_utilization': 'context',
+    'evidence_density': 'evidence',
+    'specificity': 'specificity',
+    'emotional_authenticity': 'authenticity'
+}
+
+# Every metric with the features it reads; requests may ask for a subset
+REGISTRY = ScorerRegistry(ENGINE)
+
+# Raw counts behind every metric - the columns of score_batch's feature matrix
+PATTERN_FEATURES = ['citations', 'range_citations', 'names', 'dates', 'locations', 'statistics',
+                    'quotes', 'proper_nouns', 'numbers', 'percentages', 'monetary', 'rhetorical']
+LEXICON_FEATURES = ['vague', 'authentic', 'direct_address', 'corporate']
+FEATURES = PATTERN_FEATURES + LEXICON_FEATURES + ['claims', 'grounded_claims']
+CONTEXT_FEATURES = ('names', 'dates', 'locations')  # Only read when has_context
+
+# Bump whenever a lexicon, regex or weight changes - invalidates cached scores
+SCORER_VERSION = 'pages-api/1'
+
+# Lives as long as the warm function instance (plus SCORE_CACHE_PATH if set)
+CACHE = ScoreCache.from_env()
+
+# Local leaderboard store, off unless SCORE_HISTORY_PATH is set
+HISTORY = ScoreHistory.from_env()
+
+# Off unless SCORER_PROFILE=1; wrap() then returns the scorers unchanged
+PROFILER = ScorerProfiler.from_env()
+if PROFILER.enabled:
+    ENGINE.profiler = PROFILER
+
+@REGISTRY.metric('context_utilization', needs=('citations', 'names', 'dates', 'locations'), aliases=('context',))
+@op()
+@PROFILER.wrap
 def score_context_utilization(text: str, has_context: bool) -> dict:
     """Score 0-100 based on context integration"""
     if not has_context:
         return {"score": 0, "citations": 0, "names": 0, "dates": 0}
 
+    features = ENGINE.analyze(text)
     score = 0
 
     # Count citations [18], [41]-[48], etc.
-    citations = re.findall(r'\[(\d+)\]', text)
+    citations = features.findall('citations')
     score += min(len(citations) * 10, 50)
 
     # Count proper names (Kilmar Abrego Garcia, etc.)
-    names = re.findall(r'\b[A-Z][a-z]+ [A-Z][a-z]+(?:\s+[A-Z][a-z]+)?\b', text)
+    names = features.findall('names')
     score += min(len(names) * 5, 25)
 
     # Count dates and years
-    dates = re.findall(r'\b\d{4}\b|\b\d{1,2}/\d{1,2}/\d{2,4}\b', text)
+    dates = features.findall('dates')
     score += min(len(dates) * 3, 15)
 
     # Specific locations
-    locations = re.findall(r'\bin [A-Z][a-z]+(?:,? [A-Z]{2})?\b', text)
+    locations = features.findall('locations')
     score += min(len(locations) * 5, 10)
 
     return {
@@ -47,22 +166,26 @@ def score_context_utilization(text: str, has_context: bool) -> dict:
         "locations": len(locations)
     }
 
-@weave.op()
+@REGISTRY.metric('evidence_density', needs=('citations', 'range_citations', 'statistics', 'quotes'), aliases=('evidence',))
+@op()
+@PROFILER.wrap
 def score_evidence_density(text: str) -> dict:
     """Count specific evidence citations"""
+    features = ENGINE.analyze(text)
+
     # Single citations: [18]
-    single_citations = re.findall(r'\[(\d+)\]', text)
+    single_citations = features.findall('citations')
 
     # Range citations: [41]-[48], [61]–[67]
-    range_citations = re.findall(r'\[(\d+)\](?:[-–]|to)\[(\d+)\]', text)
+    range_citations = features.findall('range_citations')
 
     total_citations = len(single_citations) + len(range_citations) * 2
 
     # Count statistics: 2,000 names, 95%, etc.
-    statistics = re.findall(r'\b\d+(?:\.\d+)?(?:\s?%|,\d+|\s+(?:people|cases|names|percent))\b', text)
+    statistics = features.findall('statistics')
 
     # Count quoted text
-    quotes = re.findall(r'"[^"]+"', text)
+    quotes = features.findall('quotes')
 
     score = min(
         (total_citations * 10) +
@@ -78,27 +201,21 @@ def score_evidence_density(text: str) -> dict:
         "quotes": len(quotes)
     }
 
-@weave.op()
+@REGISTRY.metric('specificity', needs=('vague', 'proper_nouns', 'numbers', 'percentages', 'monetary'))
+@op()
+@PROFILER.wrap
 def score_specificity(text: str) -> dict:
     """Measure concrete details vs vague generalities"""
-    # Vague language (penalty)
-    vague_patterns = [
-        'some', 'many', 'often', 'generally', 'typically',
-        'multiple perspectives', 'it depends', 'on the other hand',
-        'can be', 'is believed', 'is thought', 'studies show',
-        'arguably', 'possibly', 'potentially', 'somewhat'
-    ]
+    features = ENGINE.analyze(text)
 
-    vague_count = sum(
-        len(re.findall(r'\b' + re.escape(word) + r'\b', text, re.IGNORECASE))
-        for word in vague_patterns
-    )
+    # Vague language (penalty)
+    vague_count = features.count('vague')
 
     # Specific language (bonus)
-    proper_nouns = re.findall(r'\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)+\b', text)
-    numbers = re.findall(r'\b\d+(?:,\d+)*(?:\.\d+)?\b', text)
-    percentages = re.findall(r'\b\d+(?:\.\d+)?%\b', text)
-    monetary = re.findall(r'\$\d+(?:,\d+)*(?:\.\d+)?(?:\s?(?:million|billion|trillion))?\b', text)
+    proper_nouns = features.findall('proper_nouns')
+    numbers = features.findall('numbers')
+    percentages = features.findall('percentages')
+    monetary = features.findall('monetary')
 
     specific_count = len(proper_nouns) + len(numbers) + len(percentages) + len(monetary)
 
@@ -113,37 +230,24 @@ def score_specificity(text: str) -> dict:
         "numbers": len(numbers)
     }
 
-@weave.op()
+@REGISTRY.metric('emotional_authenticity', needs=('authentic', 'direct_address', 'rhetorical', 'corporate'), aliases=('authenticity',))
+@op()
+@PROFILER.wrap
 def score_emotional_authenticity(text: str) -> dict:
     """Measure genuine voice vs corporate neutrality"""
-    # Authentic voice indicators (bonus)
-    authentic_words = [
-        'fuck', 'shit', 'damn', 'hell', 'clusterfuck', 'bullshit',
-        'ridiculous', 'absurd', 'insane', 'disgusting', 'outrage'
-    ]
+    features = ENGINE.analyze(text)
 
-    authentic_count = sum(
-        len(re.findall(r'\b' + re.escape(word) + r'\b', text, re.IGNORECASE))
-        for word in authentic_words
-    )
+    # Authentic voice indicators (bonus)
+    authentic_count = features.count('authentic')
 
     # Direct address patterns
-    direct_address = len(re.findall(r'\b(?:you think|guess what|here\'s the deal|let me tell you)\b', text, re.IGNORECASE))
+    direct_address = features.count('direct_address')
 
     # Rhetorical questions
-    rhetorical = len(re.findall(r'\?\s*(?:[A-Z]|$)', text))
+    rhetorical = len(features.findall('rhetorical'))
 
     # Corporate neutrality (penalty)
-    corporate_words = [
-        'balanced', 'nuanced', 'complex issue', 'various factors',
-        'concerning', 'challenging', 'unfortunate', 'suboptimal',
-        'however', 'on the other hand', 'while some', 'others argue'
-    ]
-
-    corporate_count = sum(
-        len(re.findall(r'\b' + re.escape(word) + r'\b', text, re.IGNORECASE))
-        for word in corporate_words
-    )
+    corporate_count = features.count('corporate')
 
     score = (authentic_count * 15) + (direct_address * 10) + (rhetorical * 5) - (corporate_count * 10)
 
@@ -155,118 +259,294 @@ def score_emotional_authenticity(text: str) -> dict:
         "rhetorical_questions": rhetorical
     }
 
-@weave.op()
+@ENGINE.feature('sentence_claims', needs=('sentence_breaks', 'citations', 'claims'))
+def sentence_claims(features: TextFeatures) -> list:
+    """(start, end, cited citation numbers) of every sentence that makes a claim"""
+    # One positional index: sentence spans and citation offsets are found once,
+    # then merged in a single sweep. Citations cannot contain a sentence break,
+    # so each one sits inside exactly one sentence.
+    text = features.text
+    breaks = features.spans('sentence_breaks')
+    citation_spans = features.spans('citations')
+    claim_pattern = ENGINE.patterns['claims']
+
+    claims = []
+    citation_i = 0
+    start = 0
+    with ENGINE.timed('claims (per sentence)'):
+        for end, next_start in [(b[0], b[1]) for b in breaks] + [(len(text), None)]:
+            # Bounded search: stops at the first claim marker inside this sentence
+            is_claim = claim_pattern.search(text, start, end) is not None
+
+            cited = []
+            while citation_i < len(citation_spans) and citation_spans[citation_i][0] < end:
+                cite_start, cite_end = citation_spans[citation_i]
+                if cite_start >= start:
+                    cited.append(text[cite_start + 1:cite_end - 1])
+                citation_i += 1
+
+            # Claims with numbers, names, or specific details
+            if is_claim:
+                claims.append((start, end, cited))
+            start = next_start
+    return claims
+
+@REGISTRY.metric('factual_grounding', needs=('citations', 'sentence_claims'), aliases=('grounding',))
+@op()
+@PROFILER.wrap
 def score_factual_grounding(text: str) -> dict:
     """Verify claims are anchored to source documents"""
-    # Extract sentences with factual claims
-    sentences = re.split(r'[.!?]+', text)
-
-    # Claims with numbers, names, or specific details
-    factual_claims = [
-        s for s in sentences
-        if re.search(r'\b\d+\b|[A-Z][a-z]+ [A-Z][a-z]+|\$\d+', s)
+    features = ENGINE.analyze(text)
+    citations = features.findall('citations')
+    claims = [
+        {"start": start, "end": end, "grounded": bool(cited), "citations": cited}
+        for start, end, cited in features.get('sentence_claims')
     ]
 
-    if not factual_claims:
+    if not claims:
         return {"score": 0, "total_claims": 0, "grounded_claims": 0}
 
     # Count claims with citations
-    citations = re.findall(r'\[(\d+)\]', text)
-    grounded_claims = sum(
-        1 for claim in factual_claims
-        if any(f'[{c}]' in claim for c in citations)
-    )
+    grounded_claims = sum(1 for claim in claims if claim["grounded"])
 
-    grounding_ratio = grounded_claims / len(factual_claims) if factual_claims else 0
+    grounding_ratio = grounded_claims / len(claims) if claims else 0
     score = int(grounding_ratio * 100)
 
     return {
         "score": score,
-        "total_claims": len(factual_claims),
+        "total_claims": len(claims),
         "grounded_claims": grounded_claims,
-        "citations": len(citations)
+        "citations": len(citations),
+        "claims": claims
     }
 
-@weave.op()
-def evaluate_response(text: str, model: str, has_context: bool) -> dict:
-    """Run all evaluation metrics and calculate overall score"""
-    context = score_context_utilization(text, has_context)
-    evidence = score_evidence_density(text)
-    specificity = score_specificity(text)
-    authenticity = score_emotional_authenticity(text)
-    grounding = score_factual_grounding(text)
-
-    # Weighted average
-    overall = (
-        context['score'] * 0.30 +
-        evidence['score'] * 0.25 +
-        specificity['score'] * 0.20 +
-        authenticity['score'] * 0.10 +
-        grounding['score'] * 0.15
-    )
+def run_metric(name: str, text: str, has_context: bool) -> dict:
+    """One registered scorer - context utilization is the only one that reads has_context"""
+    scorer = REGISTRY[name].fn
+    return scorer(text, has_context) if name == 'context_utilization' else scorer(text)
+
+@op()
+def evaluate_response(text: str, model: str, has_context: bool, metrics: list = None) -> dict:
+    """Run the evaluation metrics (all, or the requested ones) and calculate overall score"""
+    selected = REGISTRY.select(metrics)
+    results = {name: run_metric(name, text, has_context) for name in selected}
+
+    # Weighted average; a subset's weights are rescaled to sum to 1
+    overall = sum(results[name]['score'] * weight for name, weight in WEIGHTS.items() if name in results)
+    if not REGISTRY.is_complete(selected):
+        overall /= sum(WEIGHTS[name] for name in selected)
 
     return {
         "model": model,
         "overall_score": round(overall, 2),
-        "metrics": {
-            "context_utilization": context,
-            "evidence_density": evidence,
-            "specificity": specificity,
-            "emotional_authenticity": authenticity,
-            "factual_grounding": grounding
-        },
+        "metrics": results,
         "text_length": len(text),
         "word_count": len(text.split())
     }
 
+def feature_counts(text: str, has_context: bool) -> list:
+    """One row of the feature matrix: the FEATURES counts of text, no scoring"""
+    features = TextFeatures(ENGINE, text)  # Not cached - batches would only churn ENGINE's cache
+    row = [
+        0 if name in CONTEXT_FEATURES and not has_context else len(features.findall(name))
+        for name in PATTERN_FEATURES
+    ]
+    row.extend(features.count(name) for name in LEXICON_FEATURES)
+
+    claims = features.get('sentence_claims')
+    row.append(len(claims))
+    row.append(sum(1 for _, _, cited in claims if cited))
+    return row
+
+def score_matrix(counts, has_context) -> dict:
+    """
+    The evaluate_response formulas as array operations over an (n, len(FEATURES))
+    count matrix: {metric: int scores} plus "overall" (unrounded, same floats as
+    evaluate_response since the weights are applied in the same order).
+    """
+    counts = np.asarray(counts, dtype=np.int64).reshape(-1, len(FEATURES))
+    has_context = np.array([bool(flag) for flag in has_context])  # Truthiness, as in score_context_utilization
+    column = {name: counts[:, i] for i, name in enumerate(FEATURES)}
+
+    context = (
+        np.minimum(column['citations'] * 10, 50) +
+        np.minimum(column['names'] * 5, 25) +
+        np.minimum(column['dates'] * 3, 15) +
+        np.minimum(column['locations'] * 5, 10)
+    )
+    context = np.where(has_context, np.minimum(context, 100), 0)
+
+    total_citations = column['citations'] + column['range_citations'] * 2
+    evidence = np.minimum(total_citations * 10 + column['statistics'] * 5 + column['quotes'] * 3, 100)
+
+    specific = column['proper_nouns'] + column['numbers'] + column['percentages'] + column['monetary']
+    specificity = np.clip(50 + specific * 5 - column['vague'] * 8, 0, 100)
+
+    authenticity = np.clip(
+        column['authentic'] * 15 + column['direct_address'] * 10 +
+        column['rhetorical'] * 5 - column['corporate'] * 10,
+        0, 100
+    )
+
+    claims = column['claims']
+    ratio = column['grounded_claims'] / np.maximum(claims, 1)
+    grounding = np.where(claims > 0, np.floor(ratio * 100), 0).astype(np.int64)
+
+    scores = {
+        "context_utilization": context,
+        "evidence_density": evidence,
+        "specificity": specificity,
+        "emotional_authenticity": authenticity,
+        "factual_grounding": grounding
+    }
+    overall = np.zeros(len(counts))
+    for name, weight in WEIGHTS.items():
+        overall = overall + scores[name] * weight
+    scores["overall"] = overall
+    return scores
+
+def score_batch(texts: list, has_context: list) -> dict:
+    """score_matrix over freshly extracted counts - untraced, needs NumPy"""
+    if np is None:
+        raise RuntimeError("score_batch needs NumPy: pip install numpy")
+    counts = np.array([feature_counts(text, flag) for text, flag in zip(texts, has_context)], dtype=np.int64)
+    return score_matrix(counts, has_context)
+
+@op(phase_name=None)
+def log_evaluation(question: str, response: str, model: str, has_context: bool, result: dict) -> dict:
+    """Trace of an evaluation scored on the request path and uploaded in the background"""
+    return result
+
+# WEAVE_ASYNC_TRACES=1: respond with local scores, upload traces from a background worker.
+# On serverless, queued traces flush while the instance stays warm.
+UPLOADER = TraceUploader.from_env(weave_sink(log_evaluation))
+
+# Module import to ready-to-score, i.e. this instance's cold start (Weave included when eager)
+COLD_START_MS = round((time.perf_counter() - IMPORT_STARTED) * 1000, 1)
+
 class handler(BaseHTTPRequestHandler):
     def do_OPTIONS(self):
         self.send_response(200)
         self.send_header('Access-Control-Allow-Origin', '*')
-        self.send_header('Access-Control-Allow-Methods', 'POST, OPTIONS')
+        self.send_header('Access-Control-Allow-Methods', 'GET, POST, OPTIONS')
         self.send_header('Access-Control-Allow-Headers', 'Content-Type')
         self.end_headers()
 
+    def do_GET(self):
+        query = parse_qs(urlparse(self.path).query, keep_blank_values=True)
+        if 'profile' in query:
+            self.send_profile(query['profile'][0])
+            return
+        if 'leaderboard' in query:
+            self.send_leaderboard(query)
+            return
+        if 'scorers' in query:
+            self.send_json(200, REGISTRY.describe())
+            return
+
+        # Cache and trace upload counters for this instance
+        stats = {
+            "cache": CACHE.stats(),
+            "history": HISTORY.stats() if HISTORY else None,
+            "traces": UPLOADER.stats() if UPLOADER else None,
+            "cold_start_ms": COLD_START_MS,
+            "weave": WEAVE.status()
+        }
+        self.send_json(200, stats)
+
+    def send_profile(self, output_format: str):
+        """?profile - text tables, ?profile=json - the same as JSON, ?profile=reset - start over"""
+        if not PROFILER.enabled:
+            self.send_json(404, {"error": "Profiling is off (set SCORER_PROFILE=1)"})
+        elif output_format == 'json':
+            self.send_json(200, PROFILER.stats())
+        elif output_format == 'reset':
+            PROFILER.reset()
+            self.send_json(200, {"reset": True})
+        else:
+            self.send_body(200, PROFILER.report(), 'text/plain; charset=utf-8')
+
+    def send_leaderboard(self, query: dict):
+        """?leaderboard&metric=overall&since=7d&until=...&models=craig,generic"""
+        if not HISTORY:
+            status, payload = 404, {"error": "Score history is off (set SCORE_HISTORY_PATH)"}
+        else:
+            try:
+                status, payload = 200, HISTORY.query(query)
+            except ValueError as e:
+                status, payload = 400, {"error": str(e)}
+        self.send_json(status, payload)
+
+    def send_json(self, status: int, payload: dict):
+        self.send_body(status, json.dumps(payload), 'application/json')
+
+    def send_body(self, status: int, body: str, content_type: str):
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Access-Control-Allow-Origin', '*')
+        self.end_headers()
+        self.wfile.write(body.encode('utf-8'))
+
     def do_POST(self):
         try:
-            content_length = int(self.headers['Content-Length'])
-            body = self.rfile.read(content_length)
-            data = json.loads(body.decode('utf-8'))
+            # Capped at EVALUATOR_MAX_BODY_BYTES; Content-Length or chunked
+            try:
+                data = parse_object(read_body(self.rfile, self.headers))
+            except RequestError as e:
+                self.close_connection = True
+                self.send_json(e.status, {"error": str(e)})
+                return
 
             # Accept both 'text' and 'response' for backwards compatibility
             text = data.get('response', data.get('text', ''))
             model = data.get('model', 'unknown')
             has_context = data.get('has_context', False)
-
-            # Evaluate response with Weave tracing
-            evaluation_result = evaluate_response(text, model, has_context)
-
-            # Transform to match frontend expectations
-            result = {
-                "overall_score": evaluation_result["overall_score"],
-                "metrics": {
-                    "context": evaluation_result["metrics"]["context_utilization"]["score"],
-                    "evidence": evaluation_result["metrics"]["evidence_density"]["score"],
-                    "specificity": evaluation_result["metrics"]["specificity"]["score"],
-                    "authenticity": evaluation_result["metrics"]["emotional_authenticity"]["score"]
+            try:
+                metrics = REGISTRY.select(data.get('metrics'))
+            except ValueError as e:
+                self.send_json(400, {"error": str(e)})
+                return
+
+            # Identical responses skip both scoring and the Weave trace
+            key = cache_key(REGISTRY.version(SCORER_VERSION, metrics), text, has_context, data.get('question', ''))
+            result = CACHE.get(key)
+
+            if result is None:
+                if UPLOADER:
+                    # Score locally; the trace is uploaded by the background worker
+                    with PROFILER.request(), untraced():
+                        evaluation_result = evaluate_response(text, model, has_context, metrics)
+                    UPLOADER.submit({
+                        "question": data.get('question', ''),
+                        "response": text,
+                        "model": model,
+                        "has_context": has_context,
+                        "result": evaluation_result
+                    })
+                else:
+                    # Evaluate response with Weave tracing
+                    with PROFILER.request():
+                        evaluation_result = evaluate_response(text, model, has_context, metrics)
+
+                # Transform to match frontend expectations
+                result = {
+                    "overall_score": evaluation_result["overall_score"],
+                    "metrics": {
+                        label: evaluation_result["metrics"][name]["score"]
+                        for name, label in RESPONSE_METRICS.items() if name in evaluation_result["metrics"]
+                    }
                 }
-            }
+                CACHE.put(key, result)
 
-            self.send_response(200)
-            self.send_header('Content-Type', 'application/json')
-            self.send_header('Access-Control-Allow-Origin', '*')
-            self.end_headers()
+            # A subset's overall_score is not comparable on the leaderboard
+            if HISTORY and REGISTRY.is_complete(metrics):
+                HISTORY.append(model, result)
 
-            self.wfile.write(json.dumps(result).encode('utf-8'))
+            self.send_json(200, result)
 
         except Exception as e:
-            self.send_response(500)
-            self.send_header('Content-Type', 'application/json')
-            self.send_header('Access-Control-Allow-Origin', '*')
-            self.end_headers()
-
             error_response = {
                 "error": str(e),
                 "message": "Evaluation failed"
             }
-            self.wfile.write(json.dumps(error_response).encode('utf-8'))
+            self.send_json(500, error_response)
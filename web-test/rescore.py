@@ -0,0 +1,272 @@
+"""
+Offline bulk re-scoring of logged conversations
+Streams a JSONL log ({question, response, model, has_context} per line) through
+the pages/api/evaluate.py scorers on a process pool and writes one score row per
+input line, in input order. Memory stays bounded: only a few chunks per worker
+are in flight at any time, whatever the file size.
+With NumPy installed each chunk is scored as one feature matrix: workers only
+extract counts per line, and the formulas and weights run as array operations.
+
+Run with:
+  python3 rescore.py conversations.jsonl -o scores.jsonl
+  python3 rescore.py conversations.jsonl -o scores.csv --format csv
+  python3 rescore.py conversations.jsonl -o scores.parquet --format parquet  (needs pyarrow)
+  cat conversations.jsonl | python3 rescore.py - > scores.jsonl
+"""
+import os
+import sys
+import csv
+import json
+import time
+import argparse
+import importlib.util
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+
+try:
+    import pyarrow as pa
+    import pyarrow.parquet as pq
+except ImportError:  # Parquet output is optional
+    pa = pq = None
+
+EVALUATOR_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'pages', 'api', 'evaluate.py')
+
+COLUMNS = [
+    'line', 'id', 'model', 'scorer_version', 'overall_score',
+    'context', 'evidence', 'specificity', 'authenticity', 'grounding',
+    'word_count', 'error'
+]
+
+METRIC_COLUMNS = {
+    'context': 'context_utilization',
+    'evidence': 'evidence_density',
+    'specificity': 'specificity',
+    'authenticity': 'emotional_authenticity',
+    'grounding': 'factual_grounding'
+}
+
+# Loaded once per worker process
+_evaluator = None
+
+
+def _load_evaluator():
+    global _evaluator
+    # Offline run: Weave is never imported, ops behave like plain functions
+    os.environ.setdefault('WEAVE_DISABLED', 'true')
+    os.environ.setdefault('WEAVE_INIT', 'lazy')
+    spec = importlib.util.spec_from_file_location('pages_api_evaluate', EVALUATOR_PATH)
+    _evaluator = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(_evaluator)
+
+
+def score_line(line_number: int, line: str) -> dict:
+    row = dict.fromkeys(COLUMNS)
+    row['line'] = line_number
+    try:
+        data = json.loads(line)
+        if not isinstance(data, dict):
+            raise ValueError("line must be a JSON object")
+
+        # Same field handling as the HTTP handler
+        text = data.get('response', data.get('text', ''))
+        with _evaluator.untraced():
+            result = _evaluator.evaluate_response(text, data.get('model', 'unknown'), data.get('has_context', False))
+    except Exception as e:
+        row['error'] = str(e)
+        return row
+
+    row['id'] = data.get('id')
+    row['model'] = result['model']
+    row['scorer_version'] = _evaluator.SCORER_VERSION
+    row['overall_score'] = result['overall_score']
+    for column, metric in METRIC_COLUMNS.items():
+        row[column] = result['metrics'][metric]['score']
+    row['word_count'] = result['word_count']
+    return row
+
+
+def score_chunk_vectorized(chunk: list) -> list:
+    """Same rows as score_line, from one score_matrix call over the chunk's feature counts"""
+    rows = []
+    scored = []
+    counts = []
+    flags = []
+    for line_number, line in chunk:
+        row = dict.fromkeys(COLUMNS)
+        row['line'] = line_number
+        rows.append(row)
+        try:
+            data = json.loads(line)
+            if not isinstance(data, dict):
+                raise ValueError("line must be a JSON object")
+
+            text = data.get('response', data.get('text', ''))
+            has_context = data.get('has_context', False)
+            counts.append(_evaluator.feature_counts(text, has_context))
+        except Exception as e:
+            row['error'] = str(e)
+            continue
+
+        flags.append(has_context)
+        row['id'] = data.get('id')
+        row['model'] = data.get('model', 'unknown')
+        row['scorer_version'] = _evaluator.SCORER_VERSION
+        row['word_count'] = len(text.split())
+        scored.append(row)
+
+    if scored:
+        scores = _evaluator.score_matrix(counts, flags)
+        overall = scores['overall'].tolist()
+        columns = {column: scores[metric].tolist() for column, metric in METRIC_COLUMNS.items()}
+        for i, row in enumerate(scored):
+            row['overall_score'] = round(overall[i], 2)
+            for column, values in columns.items():
+                row[column] = values[i]
+    return rows
+
+
+def score_chunk(chunk: list) -> list:
+    """Runs in a worker: [(line number, raw line)] -> score rows"""
+    if _evaluator.np is not None:
+        return score_chunk_vectorized(chunk)
+    return [score_line(line_number, line) for line_number, line in chunk]
+
+
+def read_chunks(lines, chunk_size: int):
+    chunk = []
+    for line_number, line in enumerate(lines, 1):
+        if not line.strip():
+            continue
+        chunk.append((line_number, line))
+        if len(chunk) >= chunk_size:
+            yield chunk
+            chunk = []
+    if chunk:
+        yield chunk
+
+
+class JsonlWriter:
+    def __init__(self, stream):
+        self.stream = stream
+
+    def write(self, rows: list):
+        for row in rows:
+            self.stream.write(json.dumps(row) + '\n')
+
+    def close(self):
+        self.stream.flush()
+
+
+class CsvWriter:
+    def __init__(self, stream):
+        self.stream = stream
+        self.writer = csv.DictWriter(stream, fieldnames=COLUMNS)
+        self.writer.writeheader()
+
+    def write(self, rows: list):
+        self.writer.writerows(rows)
+
+    def close(self):
+        self.stream.flush()
+
+
+class ParquetWriter:
+    """Columnar output, one row group per `row_group_size` rows"""
+
+    SCHEMA = [
+        ('line', 'int64'), ('id', 'string'), ('model', 'string'), ('scorer_version', 'string'),
+        ('overall_score', 'float64'), ('context', 'int64'), ('evidence', 'int64'),
+        ('specificity', 'int64'), ('authenticity', 'int64'), ('grounding', 'int64'),
+        ('word_count', 'int64'), ('error', 'string')
+    ]
+
+    def __init__(self, path: str, row_group_size: int = 50000):
+        self.schema = pa.schema([(name, getattr(pa, kind)()) for name, kind in self.SCHEMA])
+        self.writer = pq.ParquetWriter(path, self.schema)
+        self.row_group_size = row_group_size
+        self.buffer = []
+
+    def write(self, rows: list):
+        for row in rows:
+            if row['id'] is not None:
+                row = dict(row, id=str(row['id']))
+            self.buffer.append(row)
+        if len(self.buffer) >= self.row_group_size:
+            self.flush()
+
+    def flush(self):
+        if self.buffer:
+            self.writer.write_table(pa.Table.from_pylist(self.buffer, schema=self.schema))
+            self.buffer = []
+
+    def close(self):
+        self.flush()
+        self.writer.close()
+
+
+def open_writer(output_format: str, output: str):
+    if output_format == 'parquet':
+        if pq is None:
+            raise SystemExit("❌ Parquet output needs pyarrow: pip install pyarrow")
+        if output == '-':
+            raise SystemExit("❌ Parquet output needs a file path (-o scores.parquet)")
+        return ParquetWriter(output)
+
+    stream = sys.stdout if output == '-' else open(output, 'w', encoding='utf-8', newline='')
+    return CsvWriter(stream) if output_format == 'csv' else JsonlWriter(stream)
+
+
+def rescore(lines, writer, workers: int = None, chunk_size: int = 256) -> dict:
+    """
+    Score every line with a bounded window of chunks in flight (2 per worker),
+    writing results in input order as soon as the oldest chunk completes.
+    """
+    workers = workers or os.cpu_count() or 1
+    counts = {"lines": 0, "errors": 0}
+    started = time.time()
+
+    with ProcessPoolExecutor(max_workers=workers, initializer=_load_evaluator) as pool:
+        pending = deque()
+
+        def drain_one():
+            rows = pending.popleft().result()
+            counts["lines"] += len(rows)
+            counts["errors"] += sum(1 for row in rows if row['error'])
+            writer.write(rows)
+
+        for chunk in read_chunks(lines, chunk_size):
+            if len(pending) >= workers * 2:
+                drain_one()
+            pending.append(pool.submit(score_chunk, chunk))
+
+        while pending:
+            drain_one()
+
+    counts["seconds"] = round(time.time() - started, 2)
+    return counts
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Re-score a JSONL conversation log with the current scorers')
+    parser.add_argument('input', help="JSONL file, or - for stdin")
+    parser.add_argument('-o', '--output', default='-', help="output file (default: stdout)")
+    parser.add_argument('--format', choices=['jsonl', 'csv', 'parquet'], default='jsonl')
+    parser.add_argument('--workers', type=int, default=None, help="worker processes (default: all cores)")
+    parser.add_argument('--chunk-size', type=int, default=256, help="lines per task")
+    args = parser.parse_args(argv)
+
+    lines = sys.stdin if args.input == '-' else open(args.input, encoding='utf-8')
+    writer = open_writer(args.format, args.output)
+    try:
+        counts = rescore(lines, writer, args.workers, args.chunk_size)
+    finally:
+        writer.close()
+        if lines is not sys.stdin:
+            lines.close()
+
+    rate = counts["lines"] / counts["seconds"] if counts["seconds"] else counts["lines"]
+    print(f'✓ Rescored {counts["lines"]} lines ({counts["errors"]} errors) in {counts["seconds"]}s - {rate:.0f} lines/s', file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
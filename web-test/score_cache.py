@@ -0,0 +1,166 @@
+"""
+Content-addressed cache for evaluation results
+Keyed on sha256(scorer version, response, has_context, question). A bounded
+in-memory LRU sits in front of an optional SQLite file that survives restarts.
+A hit skips both scoring and the Weave trace upload. evaluate_cached() reads
+a batch's memory misses and writes its new results to SQLite in one query and
+one transaction, both off the event loop.
+"""
+import os
+import json
+import asyncio
+import sqlite3
+import hashlib
+import threading
+import multiprocessing
+from collections import OrderedDict
+
+SQLITE_MAX_PARAMS = 500  # Keys per SELECT ... IN (...), under SQLite's variable limit
+
+
+def cache_key(scorer_version: str, response: str, has_context: bool, question: str) -> str:
+    payload = json.dumps([scorer_version, response, bool(has_context), question], ensure_ascii=False)
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+class ScoreCache:
+    def __init__(self, max_entries: int = 1024, path: str = None):
+        self.max_entries = max_entries
+        self.path = path
+        self.hits = 0
+        self.misses = 0
+        self.disk_hits = 0
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self._db_lock = threading.Lock()  # The connection is shared with to_thread writers
+        self._db = None
+
+        if path:
+            self._db = sqlite3.connect(path, check_same_thread=False)
+            self._db.execute('CREATE TABLE IF NOT EXISTS scores (key TEXT PRIMARY KEY, value TEXT NOT NULL)')
+            self._db.commit()
+
+    @classmethod
+    def from_env(cls) -> 'ScoreCache':
+        """SCORE_CACHE_SIZE (entries, default 1024), SCORE_CACHE_PATH (SQLite file, optional)"""
+        if multiprocessing.current_process().name != 'MainProcess':
+            return cls(max_entries=0)  # Scoring worker process - never serves, no SQLite connection
+        return cls(
+            max_entries=int(os.getenv('SCORE_CACHE_SIZE', '1024')),
+            path=os.getenv('SCORE_CACHE_PATH') or None
+        )
+
+    def get(self, key: str):
+        with self._lock:
+            if key in self._entries:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return self._entries[key]
+
+            if self._db is not None:
+                with self._db_lock:
+                    row = self._db.execute('SELECT value FROM scores WHERE key = ?', (key,)).fetchone()
+                if row is not None:
+                    value = json.loads(row[0])
+                    self._remember(key, value)
+                    self.hits += 1
+                    self.disk_hits += 1
+                    return value
+
+            self.misses += 1
+            return None
+
+    def put(self, key: str, value: dict):
+        self.put_many({key: value})
+
+    def put_many(self, entries: dict):
+        """Remember {key: value} and persist them in one transaction (blocking - see evaluate_cached)"""
+        self._remember_many(entries)
+        self._persist(entries)
+
+    def _remember_many(self, entries: dict):
+        with self._lock:
+            for key, value in entries.items():
+                self._remember(key, value)
+
+    def _persist(self, entries: dict):
+        if self._db is None or not entries:
+            return
+        rows = [(key, json.dumps(value)) for key, value in entries.items()]
+        with self._db_lock:
+            self._db.executemany('INSERT OR REPLACE INTO scores (key, value) VALUES (?, ?)', rows)
+            self._db.commit()
+
+    def _load(self, keys: list) -> dict:
+        """{key: value} for the keys found in SQLite, remembered in memory (blocking)"""
+        rows = []
+        with self._db_lock:
+            for start in range(0, len(keys), SQLITE_MAX_PARAMS):
+                chunk = keys[start:start + SQLITE_MAX_PARAMS]
+                rows += self._db.execute(
+                    f'SELECT key, value FROM scores WHERE key IN ({",".join("?" * len(chunk))})', chunk
+                ).fetchall()
+        loaded = {key: json.loads(value) for key, value in rows}
+        self._remember_many(loaded)
+        return loaded
+
+    def _remember(self, key: str, value: dict):
+        self._entries[key] = value
+        self._entries.move_to_end(key)
+        while len(self._entries) > self.max_entries:
+            self._entries.popitem(last=False)
+
+    async def evaluate_cached(self, scorer_version: str, examples: list, evaluate) -> list:
+        """
+        Serve {question, response, model, has_context} examples from the cache,
+        passing each distinct miss once to `await evaluate(examples)`.
+        Results keep input order; "model" is taken from each example.
+        """
+        keys = [
+            cache_key(scorer_version, example.get('response', ''), example.get('has_context', False), example.get('question', ''))
+            for example in examples
+        ]
+        with self._lock:
+            cached = [self._entries.get(key) for key in keys]
+            for key, result in zip(keys, cached):
+                if result is not None:
+                    self._entries.move_to_end(key)
+
+        # Memory misses are read from SQLite in one query, off the event loop
+        missing = list(dict.fromkeys(key for key, result in zip(keys, cached) if result is None))
+        loaded = await asyncio.to_thread(self._load, missing) if missing and self._db is not None else {}
+        cached = [loaded.get(key) if result is None else result for key, result in zip(keys, cached)]
+        with self._lock:
+            found = sum(result is not None for result in cached)
+            self.hits += found
+            self.misses += len(cached) - found
+            self.disk_hits += len(loaded)
+
+        pending = {}
+        for example, key, result in zip(examples, keys, cached):
+            if result is None and key not in pending:
+                pending[key] = example
+
+        fresh = {}
+        if pending:
+            fresh = dict(zip(pending, await evaluate(list(pending.values()))))
+            self._remember_many(fresh)
+            await asyncio.to_thread(self._persist, fresh)
+
+        return [
+            dict(result if result is not None else fresh[key], model=example.get('model', 'unknown'))
+            for example, key, result in zip(examples, keys, cached)
+        ]
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "disk_hits": self.disk_hits,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "entries": len(self._entries),
+                "max_entries": self.max_entries,
+                "persistent": self._db is not None
+            }
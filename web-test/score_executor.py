@@ -0,0 +1,167 @@
+"""
+Off-loop analysis of large responses for the evaluator services
+Regex and lexicon scans hold the GIL, so a 50 KB response analyzed on the event
+loop stalls every other request. ScoreExecutor.prepare(texts) analyzes the
+responses over a size threshold in a thread pool or in worker processes, then
+primes the engine's cache with the result - the scorers, traced or not, only
+read a finished analysis. Shorter texts stay inline: shipping them to a worker
+costs more than scanning them.
+
+prepare() returns the batch's analyses; score under engine.pin() so a batch
+larger than the engine's LRU is not evicted and rescanned mid-evaluation:
+
+    with ENGINE.pin(await EXECUTOR.prepare(texts, needs)):
+        await evaluation.evaluate(model)
+
+SCORE_EXECUTOR=inline (default) | thread | process
+SCORE_EXECUTOR_WORKERS (default: CPU count), SCORE_EXECUTOR_THRESHOLD (characters, default 16384)
+Worker processes rebuild the engine once at startup, so lexicons and regexes
+are compiled before the first job arrives. When a request asks for a subset
+of metrics, prepare(texts, needs) extracts only the features those read.
+"""
+import os
+import time
+import atexit
+import asyncio
+import threading
+import multiprocessing
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+from scoring_engine import ScoringEngine, TextFeatures
+from metrics import phase
+
+BACKENDS = ('inline', 'thread', 'process')
+
+_worker_engine = None
+
+
+def _exit_with_parent(parent):
+    parent.join()
+    os._exit(0)
+
+
+def _init_worker(spec: dict):
+    global _worker_engine
+    _worker_engine = ScoringEngine(**spec)
+    # A service stopped by a signal never shuts its pool down; do not outlive it
+    threading.Thread(target=_exit_with_parent, args=(multiprocessing.parent_process(),), daemon=True).start()
+
+
+def _extract(text: str, names: list = None) -> dict:
+    return _worker_engine.extract(text, names)
+
+
+class ScoreExecutor:
+    def __init__(self, engine: ScoringEngine, backend: str = 'inline', workers: int = None,
+                 threshold: int = 16384, start_method: str = 'spawn'):
+        if backend not in BACKENDS:
+            raise ValueError(f"SCORE_EXECUTOR must be one of {', '.join(BACKENDS)}, got {backend!r}")
+        self.engine = engine
+        self.backend = backend
+        self.workers = workers or os.cpu_count() or 1
+        self.threshold = threshold
+        # spawn: the services run Weave and uploader threads, which fork does not copy safely
+        self.start_method = start_method
+        self._pool = None
+        self._lock = threading.Lock()
+        self.counts = {
+            "inline": 0,
+            "offloaded": 0,
+            "offloaded_chars": 0,
+            "offload_ms": 0.0,
+            "failed": 0
+        }
+
+    @classmethod
+    def from_env(cls, engine: ScoringEngine) -> 'ScoreExecutor':
+        workers = os.getenv('SCORE_EXECUTOR_WORKERS')
+        return cls(
+            engine,
+            backend=os.getenv('SCORE_EXECUTOR', 'inline'),
+            workers=int(workers) if workers else None,
+            threshold=int(os.getenv('SCORE_EXECUTOR_THRESHOLD', '16384'))
+        )
+
+    def _get_pool(self):
+        with self._lock:
+            if self._pool is None:
+                if self.backend == 'thread':
+                    self._pool = ThreadPoolExecutor(self.workers, thread_name_prefix='score')
+                else:
+                    self._pool = ProcessPoolExecutor(
+                        self.workers,
+                        mp_context=multiprocessing.get_context(self.start_method),
+                        initializer=_init_worker,
+                        initargs=(self.engine.spec(),)
+                    )
+                atexit.register(self.shutdown)
+            return self._pool
+
+    def start(self):
+        """Bring the workers up now instead of on the first large response"""
+        if self.backend == 'process':
+            pool = self._get_pool()
+            for future in [pool.submit(_extract, '') for _ in range(self.workers)]:
+                future.result()
+
+    def shutdown(self):
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=False, cancel_futures=True)
+
+    def offloads(self, text: str) -> bool:
+        return self.backend != 'inline' and len(text) >= self.threshold
+
+    async def analyze(self, text: str, needs: list = None) -> TextFeatures:
+        """engine.analyze(text), computed off the event loop when text is large (only `needs`, if given)"""
+        features = self.engine.cached(text)
+        if features is not None:
+            return features
+        if not self.offloads(text):
+            self.counts["inline"] += 1
+            return self.engine.analyze(text)
+
+        extract = self.engine.extract if self.backend == 'thread' else _extract
+        started = time.perf_counter()
+        try:
+            data = await asyncio.get_running_loop().run_in_executor(self._get_pool(), extract, text, needs)
+        except Exception as e:
+            # Broken or shut down pool: drop it (the next call starts a new one) and score inline
+            print(f"✗ Score executor failed, analyzing inline: {e!r}")
+            self.counts["failed"] += 1
+            self.shutdown()
+            return self.engine.analyze(text)
+
+        self.counts["offloaded"] += 1
+        self.counts["offloaded_chars"] += len(text)
+        self.counts["offload_ms"] += (time.perf_counter() - started) * 1000
+        features = TextFeatures(self.engine, text, **data)
+        self.engine.prime(text, features)
+        return features
+
+    async def prepare(self, texts: list, needs: list = None) -> dict:
+        """
+        Analyze a batch's large responses concurrently, so it fans out across the
+        workers. Returns {text: TextFeatures} for the whole batch (short texts
+        lazy, computed inline on first use) - the mapping to engine.pin().
+        """
+        features = {text: self.engine.cached(text) for text in dict.fromkeys(texts)}
+        large = [text for text, cached in features.items() if cached is None and self.offloads(text)]
+        for text, cached in features.items():
+            if cached is None and not self.offloads(text):
+                features[text] = TextFeatures(self.engine, text)
+                self.counts["inline"] += 1
+        if large:
+            with phase('score'):
+                analyzed = await asyncio.gather(*(self.analyze(text, needs) for text in large))
+            features.update(zip(large, analyzed))
+        return features
+
+    def stats(self) -> dict:
+        return dict(
+            self.counts,
+            offload_ms=round(self.counts["offload_ms"], 1),
+            backend=self.backend,
+            workers=self.workers if self.backend != 'inline' else 0,
+            threshold=self.threshold
+        )
@@ -0,0 +1,347 @@
+"""
+Local score history for the Python evaluators
+Every served result is appended to a SQLite file (one row per evaluation,
+indexed on time), so the per-model leaderboard - count, mean, p50, p90 of any
+metric over any time window - needs no W&B round trip.
+
+Queries read mergeable histogram sketches (0.25-point bins over 0-100, so
+quantiles are within 0.25 of exact and integer metrics are exact) instead of
+rows. Sketches are built per model for every hour, day and 28 days the first
+time a query needs that finished bucket, then stored; a window is covered by
+the coarsest whole buckets that fit, and raw rows only for its partial hours.
+A year of a million results answers in tens of milliseconds once built.
+
+Enable in a service with SCORE_HISTORY_PATH=scores.db, then GET /history/leaderboard
+(?metric=overall&since=7d&until=...&models=craig,generic), or from a shell:
+  python3 score_history.py scores.db --since 7d
+  python3 score_history.py scores.db --metric evidence --models craig,generic --json
+"""
+import os
+import sys
+import json
+import math
+import time
+import sqlite3
+import argparse
+import threading
+import multiprocessing
+from datetime import datetime
+
+METRICS = ('overall', 'context', 'evidence', 'specificity', 'authenticity')
+
+# Sketch resolution: 401 bins of 0.25 over [0, 100]
+BIN_WIDTH = 0.25
+BINS = int(100 / BIN_WIDTH) + 1
+
+# Bucket sizes in seconds, coarsest first (UTC aligned)
+LEVELS = (28 * 86400, 86400, 3600)
+
+# A bucket is final this long after it ends (results are stamped on arrival)
+SEAL_GRACE = 60
+
+UNITS = {'s': 1, 'm': 60, 'h': 3600, 'd': 86400, 'w': 604800}
+
+
+class Sketch:
+    """Count, sum and a fixed-width histogram of scores in [0, 100]; sketches merge by adding"""
+
+    __slots__ = ('count', 'total', 'bins')
+
+    def __init__(self, count: int = 0, total: float = 0.0, bins: dict = None):
+        self.count = count
+        self.total = total
+        self.bins = bins or {}  # bin index -> count, sparse
+
+    def add(self, value: float):
+        index = min(max(int(value / BIN_WIDTH), 0), BINS - 1)
+        self.bins[index] = self.bins.get(index, 0) + 1
+        self.count += 1
+        self.total += value
+
+    def merge(self, other: 'Sketch'):
+        self.count += other.count
+        self.total += other.total
+        bins = self.bins
+        for index, count in other.bins.items():
+            bins[index] = bins.get(index, 0) + count
+
+    def quantile(self, q: float) -> float:
+        """Lower edge of the bin holding the nearest-rank q quantile"""
+        if not self.count:
+            return None
+        rank = max(1, math.ceil(q * self.count))
+        seen = 0
+        for index in sorted(self.bins):
+            seen += self.bins[index]
+            if seen >= rank:
+                return index * BIN_WIDTH
+        return 100.0
+
+    def dumps(self) -> str:
+        return json.dumps(sorted(self.bins.items()), separators=(',', ':'))
+
+    @classmethod
+    def loads(cls, count: int, total: float, bins: str) -> 'Sketch':
+        return cls(count, total, {index: n for index, n in json.loads(bins)})
+
+
+def parse_time(value, now: float = None):
+    """Epoch seconds, a duration before now ('90m', '24h', '7d') or an ISO date/time (local time); None passes through"""
+    if value is None or value == '':
+        return None
+    if isinstance(value, (int, float)):
+        return float(value)
+    value = value.strip()
+    try:
+        return float(value)
+    except ValueError:
+        pass
+    if value[-1:] in UNITS:
+        try:
+            return (now if now is not None else time.time()) - float(value[:-1]) * UNITS[value[-1]]
+        except ValueError:
+            pass
+    try:
+        return datetime.fromisoformat(value).timestamp()
+    except ValueError:
+        raise ValueError(f"Unrecognized time {value!r} (epoch seconds, 24h / 7d, or ISO date)")
+
+
+class ScoreHistory:
+    def __init__(self, path: str):
+        self.path = path
+        self._lock = threading.Lock()
+        self._db = sqlite3.connect(path, check_same_thread=False)
+        self._db.execute('PRAGMA journal_mode=WAL')
+        self._db.execute('PRAGMA synchronous=NORMAL')
+        self._db.executescript('''
+            CREATE TABLE IF NOT EXISTS results (
+                ts REAL NOT NULL,
+                model TEXT NOT NULL,
+                overall REAL NOT NULL,
+                context REAL NOT NULL,
+                evidence REAL NOT NULL,
+                specificity REAL NOT NULL,
+                authenticity REAL NOT NULL
+            );
+            CREATE INDEX IF NOT EXISTS results_ts ON results (ts);
+            CREATE INDEX IF NOT EXISTS results_model_ts ON results (model, ts);
+            CREATE TABLE IF NOT EXISTS sketches (
+                level INTEGER NOT NULL,
+                bucket INTEGER NOT NULL,
+                model TEXT NOT NULL,
+                metric TEXT NOT NULL,
+                count INTEGER NOT NULL,
+                total REAL NOT NULL,
+                bins TEXT NOT NULL,
+                PRIMARY KEY (level, bucket, metric, model)
+            );
+            CREATE TABLE IF NOT EXISTS sealed (
+                level INTEGER NOT NULL,
+                bucket INTEGER NOT NULL,
+                PRIMARY KEY (level, bucket)
+            );
+        ''')
+        self._db.commit()
+        self.appended = 0
+
+    @classmethod
+    def from_env(cls):
+        """Returns a history when SCORE_HISTORY_PATH is set, else None"""
+        path = os.getenv('SCORE_HISTORY_PATH')
+        if multiprocessing.current_process().name != 'MainProcess':
+            return None  # Scoring worker process - nothing to record
+        return cls(path) if path else None
+
+    def append(self, model: str, result: dict, ts: float = None):
+        """Record one served result ({"overall_score", "metrics": {context, evidence, specificity, authenticity}})"""
+        self.append_many([(model, result)], ts)
+
+    def append_many(self, rows: list, ts: float = None):
+        """[(model, result)], stamped with one time (default now; past times reopen their buckets)"""
+        backdated = ts is not None
+        ts = time.time() if ts is None else ts
+        values = []
+        for model, result in rows:
+            metrics = result["metrics"]
+            values.append((
+                ts, model or 'unknown', result["overall_score"],
+                metrics["context"], metrics["evidence"], metrics["specificity"], metrics["authenticity"]
+            ))
+        with self._lock:
+            self._db.executemany('INSERT INTO results VALUES (?, ?, ?, ?, ?, ?, ?)', values)
+            if backdated:
+                for size in LEVELS:
+                    self._db.execute('DELETE FROM sealed WHERE level = ? AND bucket = ?', (size, int(ts // size * size)))
+            self._db.commit()
+            self.appended += len(values)
+
+    # Queries
+
+    def _cover(self, start: float, end: float, levels: tuple, now: float) -> tuple:
+        """Split [start, end) into sealed (level, bucket) sketches plus raw row ranges"""
+        if start >= end:
+            return [], []
+        if not levels:
+            return [], [(start, end)]
+
+        size = levels[0]
+        first = math.ceil(start / size) * size
+        last = math.floor(end / size) * size
+        # Buckets still receiving results are read as rows (at finer levels first)
+        last = min(last, math.floor((now - SEAL_GRACE) / size) * size)
+        if first >= last:
+            return self._cover(start, end, levels[1:], now)
+
+        buckets = [(size, bucket) for bucket in range(int(first), int(last), size)]
+        left_buckets, left_raw = self._cover(start, first, levels[1:], now)
+        right_buckets, right_raw = self._cover(last, end, levels[1:], now)
+        return left_buckets + buckets + right_buckets, left_raw + right_raw
+
+    def _scan(self, start: float, end: float, metrics: tuple = METRICS) -> dict:
+        """{metric: {model: Sketch}} straight from the rows in [start, end)"""
+        sketches = {metric: {} for metric in metrics}
+        rows = self._db.execute(
+            f'SELECT model, {", ".join(metrics)} FROM results WHERE ts >= ? AND ts < ?', (start, end)
+        )
+        for model, *values in rows:
+            for metric, value in zip(metrics, values):
+                sketch = sketches[metric].get(model)
+                if sketch is None:
+                    sketch = sketches[metric][model] = Sketch()
+                sketch.add(value)
+        return sketches
+
+    def _materialize(self, size: int, bucket: int) -> dict:
+        """Build and store every sketch of a sealed bucket - from the next level's buckets, or rows"""
+        finer = LEVELS[LEVELS.index(size) + 1:]
+        if finer:
+            sketches = {metric: {} for metric in METRICS}
+            for sub in range(bucket, bucket + size, finer[0]):
+                for metric in METRICS:
+                    for model, sketch in self._load(finer[0], sub, metric).items():
+                        sketches[metric].setdefault(model, Sketch()).merge(sketch)
+        else:
+            sketches = self._scan(bucket, bucket + size)
+
+        self._db.executemany(
+            'INSERT OR REPLACE INTO sketches VALUES (?, ?, ?, ?, ?, ?, ?)',
+            [
+                (size, bucket, model, metric, sketch.count, sketch.total, sketch.dumps())
+                for metric, by_model in sketches.items()
+                for model, sketch in by_model.items()
+            ]
+        )
+        self._db.execute('INSERT OR REPLACE INTO sealed VALUES (?, ?)', (size, bucket))
+        self._db.commit()
+        return sketches
+
+    def _load(self, size: int, bucket: int, metric: str) -> dict:
+        """{model: Sketch} of one sealed bucket, materialized on first use"""
+        if self._db.execute('SELECT 1 FROM sealed WHERE level = ? AND bucket = ?', (size, bucket)).fetchone() is None:
+            return self._materialize(size, bucket)[metric]
+        rows = self._db.execute(
+            'SELECT model, count, total, bins FROM sketches WHERE level = ? AND bucket = ? AND metric = ?',
+            (size, bucket, metric)
+        )
+        return {model: Sketch.loads(count, total, bins) for model, count, total, bins in rows}
+
+    def leaderboard(self, metric: str = 'overall', since=None, until=None, models: list = None) -> dict:
+        """
+        Per-model count, mean, p50 and p90 of metric for results stamped in
+        [since, until) (parse_time formats; default: everything), best mean first.
+        """
+        if metric not in METRICS:
+            raise ValueError(f"metric must be one of {', '.join(METRICS)}, got {metric!r}")
+        started = time.perf_counter()
+        now = time.time()
+        start, end = parse_time(since, now), parse_time(until, now)
+
+        with self._lock:
+            if start is None:
+                first = self._db.execute('SELECT MIN(ts) FROM results').fetchone()[0]
+                start = first if first is not None else now
+            if end is None:
+                end = now + 1  # Include results stamped this instant
+
+            buckets, raw = self._cover(start, end, LEVELS, now)
+            totals = {}
+            for size, bucket in buckets:
+                for model, sketch in self._load(size, bucket, metric).items():
+                    totals.setdefault(model, Sketch()).merge(sketch)
+            for range_start, range_end in raw:
+                for model, sketch in self._scan(range_start, range_end, (metric,))[metric].items():
+                    totals.setdefault(model, Sketch()).merge(sketch)
+
+        wanted = set(models) if models else None
+        rows = [
+            {
+                "model": model,
+                "count": sketch.count,
+                "mean": round(sketch.total / sketch.count, 2),
+                "p50": sketch.quantile(0.5),
+                "p90": sketch.quantile(0.9)
+            }
+            for model, sketch in totals.items()
+            if sketch.count and (wanted is None or model in wanted)
+        ]
+        rows.sort(key=lambda row: -row["mean"])
+        return {
+            "metric": metric,
+            "since": start,
+            "until": end,
+            "models": rows,
+            "sketches": len(buckets),
+            "raw_ranges": len(raw),
+            "query_ms": round((time.perf_counter() - started) * 1000, 2)
+        }
+
+    def query(self, params: dict) -> dict:
+        """leaderboard() from URL query parameters ({name: [values]}, as parse_qs returns)"""
+        def first(name):
+            return params.get(name, [None])[0] or None
+
+        models = first('models')
+        return self.leaderboard(
+            metric=first('metric') or 'overall',
+            since=first('since'),
+            until=first('until'),
+            models=models.split(',') if models else None
+        )
+
+    def stats(self) -> dict:
+        with self._lock:
+            rows = self._db.execute('SELECT COUNT(*) FROM results').fetchone()[0]
+            sealed = self._db.execute('SELECT COUNT(*) FROM sealed').fetchone()[0]
+        return {"path": self.path, "rows": rows, "appended": self.appended, "sealed_buckets": sealed}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Per-model leaderboard from a local score history')
+    parser.add_argument('path', help="SQLite file written with SCORE_HISTORY_PATH")
+    parser.add_argument('--metric', choices=METRICS, default='overall')
+    parser.add_argument('--since', help="epoch seconds, 24h / 7d, or ISO date (default: first result)")
+    parser.add_argument('--until', help="same formats (default: now)")
+    parser.add_argument('--models', help="comma-separated models to show")
+    parser.add_argument('--json', action='store_true', help="print the leaderboard as JSON")
+    args = parser.parse_args(argv)
+
+    if not os.path.exists(args.path):
+        raise SystemExit(f"❌ No score history at {args.path}")
+    board = ScoreHistory(args.path).leaderboard(
+        args.metric, args.since, args.until, args.models.split(',') if args.models else None
+    )
+    if args.json:
+        print(json.dumps(board, indent=2))
+        return
+
+    print(f'{args.metric} scores, {board["query_ms"]} ms ({board["sketches"]} sketches, {board["raw_ranges"]} raw ranges)\n')
+    print(f'{"model":<24} {"count":>10} {"mean":>8} {"p50":>8} {"p90":>8}')
+    for row in board["models"]:
+        print(f'{row["model"]:<24} {row["count"]:>10} {row["mean"]:>8.2f} {row["p50"]:>8.2f} {row["p90"]:>8.2f}')
+    if not board["models"]:
+        print('(no results in this window)', file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
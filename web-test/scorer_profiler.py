@@ -0,0 +1,237 @@
+"""
+Opt-in profiling for the pages/api/evaluate.py scorers
+Answers "which scorer (and which regex) is eating the CPU on real traffic":
+every scorer call is timed with perf_counter_ns, the ScoringEngine reports the
+time of each regex and of the lexicon pass, and 1 in N requests runs under
+cProfile. Tables are aggregated in memory and dumped on demand - no Weave
+connection involved.
+
+Enable in the evaluator with SCORER_PROFILE=1 (SCORER_PROFILE_SAMPLE=N, default
+100) and read GET /api/evaluate?profile (text) or ?profile=json.
+
+Or profile a conversation log offline:
+  python3 scorer_profiler.py conversations.jsonl
+  python3 scorer_profiler.py conversations.jsonl --sample 1 --top 40
+"""
+import io
+import os
+import sys
+import json
+import time
+import pstats
+import cProfile
+import argparse
+import functools
+import threading
+import contextlib
+import importlib.util
+
+EVALUATOR_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), 'pages', 'api', 'evaluate.py')
+
+
+class Timing:
+    """Call count plus total/max wall time in nanoseconds"""
+
+    __slots__ = ('calls', 'total_ns', 'max_ns')
+
+    def __init__(self):
+        self.calls = 0
+        self.total_ns = 0
+        self.max_ns = 0
+
+    def add(self, elapsed_ns: int):
+        self.calls += 1
+        self.total_ns += elapsed_ns
+        if elapsed_ns > self.max_ns:
+            self.max_ns = elapsed_ns
+
+    def row(self) -> dict:
+        return {
+            "calls": self.calls,
+            "total_ms": round(self.total_ns / 1e6, 3),
+            "mean_us": round(self.total_ns / self.calls / 1e3, 1) if self.calls else 0.0,
+            "max_us": round(self.max_ns / 1e3, 1)
+        }
+
+
+class ScorerProfiler:
+    """
+    wrap(fn)          - time every call of a scorer
+    time_pattern(name) - ScoringEngine hook (engine.profiler = profiler)
+    request()         - one scored request; every sample_every-th runs under cProfile
+    """
+
+    def __init__(self, enabled: bool = True, sample_every: int = 100):
+        self.enabled = enabled
+        self.sample_every = max(1, sample_every)
+        self.started = time.time()
+        self.requests = 0
+        self.sampled = 0
+        self.scorers = {}
+        self.patterns = {}
+        self._profile_stats = None
+        self._lock = threading.Lock()
+        # cProfile allows one active profiler at a time; concurrent samples are skipped
+        self._sampling = threading.Lock()
+
+    @classmethod
+    def from_env(cls) -> 'ScorerProfiler':
+        """SCORER_PROFILE=1 turns it on; SCORER_PROFILE_SAMPLE=N profiles 1 in N requests"""
+        return cls(
+            enabled=os.getenv('SCORER_PROFILE', '0') in ('1', 'true', 'yes'),
+            sample_every=int(os.getenv('SCORER_PROFILE_SAMPLE', '100'))
+        )
+
+    def _record(self, table: dict, name: str, elapsed_ns: int):
+        with self._lock:
+            timing = table.get(name)
+            if timing is None:
+                timing = table[name] = Timing()
+            timing.add(elapsed_ns)
+
+    def wrap(self, fn):
+        """Decorator; returns fn untouched when profiling is off"""
+        if not self.enabled:
+            return fn
+
+        @functools.wraps(fn)
+        def wrapper(*args, **kwargs):
+            started = time.perf_counter_ns()
+            try:
+                return fn(*args, **kwargs)
+            finally:
+                self._record(self.scorers, fn.__name__, time.perf_counter_ns() - started)
+        return wrapper
+
+    @contextlib.contextmanager
+    def time_pattern(self, name: str):
+        started = time.perf_counter_ns()
+        try:
+            yield
+        finally:
+            self._record(self.patterns, name, time.perf_counter_ns() - started)
+
+    @contextlib.contextmanager
+    def request(self):
+        if not self.enabled:
+            yield
+            return
+
+        with self._lock:
+            self.requests += 1
+            sample = self.requests % self.sample_every == 0
+        if not (sample and self._sampling.acquire(blocking=False)):
+            yield
+            return
+
+        profile = cProfile.Profile()
+        try:
+            profile.enable()
+        except ValueError:  # Another profiler is active in this process
+            profile = None
+        try:
+            yield
+        finally:
+            if profile is not None:
+                profile.disable()
+                with self._lock:
+                    self.sampled += 1
+                    if self._profile_stats is None:
+                        self._profile_stats = pstats.Stats(profile)
+                    else:
+                        self._profile_stats.add(profile)
+            self._sampling.release()
+
+    def reset(self):
+        with self._lock:
+            self.started = time.time()
+            self.requests = 0
+            self.sampled = 0
+            self.scorers = {}
+            self.patterns = {}
+            self._profile_stats = None
+
+    def stats(self) -> dict:
+        with self._lock:
+            scorer_total = sum(timing.total_ns for timing in self.scorers.values()) or 1
+            return {
+                "enabled": self.enabled,
+                "since": time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime(self.started)),
+                "requests": self.requests,
+                "sampled": self.sampled,
+                "sample_every": self.sample_every,
+                "scorers": {
+                    name: dict(timing.row(), share=round(timing.total_ns / scorer_total, 4))
+                    for name, timing in sorted(self.scorers.items(), key=lambda item: -item[1].total_ns)
+                },
+                "patterns": {
+                    name: timing.row()
+                    for name, timing in sorted(self.patterns.items(), key=lambda item: -item[1].total_ns)
+                }
+            }
+
+    def report(self, top: int = 25) -> str:
+        """Per-scorer and per-regex tables, plus the hottest functions of the cProfile samples"""
+        stats = self.stats()
+        out = io.StringIO()
+        out.write(f'Scorer profile since {stats["since"]}: {stats["requests"]} requests, '
+                  f'{stats["sampled"]} sampled with cProfile (1 in {stats["sample_every"]})\n\n')
+
+        out.write(f'{"scorer":<32} {"calls":>8} {"total ms":>10} {"mean us":>10} {"max us":>10} {"share":>7}\n')
+        for name, row in stats["scorers"].items():
+            out.write(f'{name:<32} {row["calls"]:>8} {row["total_ms"]:>10.2f} {row["mean_us"]:>10.1f} {row["max_us"]:>10.1f} {row["share"]:>7.1%}\n')
+
+        out.write(f'\n{"regex / pass":<32} {"calls":>8} {"total ms":>10} {"mean us":>10} {"max us":>10}\n')
+        for name, row in stats["patterns"].items():
+            out.write(f'{name:<32} {row["calls"]:>8} {row["total_ms"]:>10.2f} {row["mean_us"]:>10.1f} {row["max_us"]:>10.1f}\n')
+
+        with self._lock:
+            if self._profile_stats is not None:
+                out.write(f'\ncProfile, top {top} by cumulative time:\n')
+                self._profile_stats.stream = out
+                self._profile_stats.sort_stats('cumulative').print_stats(top)
+        return out.getvalue()
+
+
+def load_evaluator():
+    """pages/api/evaluate.py with profiling on and Weave disabled"""
+    os.environ['SCORER_PROFILE'] = '1'
+    os.environ.setdefault('WEAVE_DISABLED', 'true')
+    os.environ.setdefault('WEAVE_INIT', 'lazy')  # Weave is never imported offline
+    spec = importlib.util.spec_from_file_location('pages_api_evaluate', EVALUATOR_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description='Profile the pages/api/evaluate.py scorers over a JSONL conversation log')
+    parser.add_argument('input', help="JSONL file ({response, model, has_context} per line), or - for stdin")
+    parser.add_argument('--sample', type=int, default=10, help="run 1 in N responses under cProfile (default 10)")
+    parser.add_argument('--top', type=int, default=25, help="cProfile rows to print")
+    parser.add_argument('--json', action='store_true', help="print the tables as JSON")
+    args = parser.parse_args(argv)
+
+    os.environ['SCORER_PROFILE_SAMPLE'] = str(args.sample)
+    evaluator = load_evaluator()
+    profiler = evaluator.PROFILER
+
+    lines = sys.stdin if args.input == '-' else open(args.input, encoding='utf-8')
+    try:
+        for line in lines:
+            if not line.strip():
+                continue
+            data = json.loads(line)
+            text = data.get('response', data.get('text', ''))
+            evaluator.ENGINE.clear_cache()  # Repeated responses are profiled cold too
+            with profiler.request(), evaluator.untraced():
+                evaluator.evaluate_response(text, data.get('model', 'unknown'), data.get('has_context', False))
+    finally:
+        if lines is not sys.stdin:
+            lines.close()
+
+    print(json.dumps(profiler.stats(), indent=2) if args.json else profiler.report(args.top))
+
+
+if __name__ == '__main__':
+    main()
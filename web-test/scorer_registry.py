@@ -0,0 +1,92 @@
+"""
+Metric registry for the Python evaluators
+Each metric declares the features it reads (engine patterns, lexicons or
+derived features). A request may name a subset of metrics: only those scorers
+run, so only their features are ever computed - TextFeatures is lazy, and
+ScoreExecutor workers extract just registry.needs(metrics).
+
+    REGISTRY = ScorerRegistry(ENGINE)
+
+    @REGISTRY.metric('evidence', key='evidence_score', needs=('citations', 'statistics'))
+    @op()
+    def evidence_density_scorer(expected: str, output: dict) -> dict: ...
+
+Metrics run with their own signature; registry.score(name, result) reads the score.
+"""
+from collections import namedtuple
+
+Metric = namedtuple('Metric', 'name fn key needs aliases')
+
+
+class ScorerRegistry:
+    def __init__(self, engine):
+        self.engine = engine
+        self._metrics = {}
+        self._aliases = {}
+
+    def metric(self, name: str, key: str = 'score', needs: tuple = (), aliases: tuple = ()):
+        """Decorator: register fn as metric `name`, whose result[key] is the score"""
+        if name in self._metrics or name in self._aliases:
+            raise ValueError(f"Metric already registered: {name!r}")
+        self.engine.resolve(needs)  # Unknown features fail at import, not on the first request
+
+        def register(fn):
+            self._metrics[name] = Metric(name, fn, key, tuple(needs), tuple(aliases))
+            for alias in aliases:
+                self._aliases[alias] = name
+            return fn
+        return register
+
+    @property
+    def names(self) -> list:
+        return list(self._metrics)
+
+    def __getitem__(self, name: str) -> Metric:
+        return self._metrics[self._aliases.get(name, name)]
+
+    def __iter__(self):
+        return iter(self._metrics.values())
+
+    def select(self, requested=None) -> list:
+        """
+        Metric names for a request, in registration order. requested: None or
+        empty for all, else names/aliases as a list and/or comma-separated strings.
+        """
+        if isinstance(requested, str):
+            requested = [requested]
+        wanted = {name.strip() for value in requested or () for name in value.split(',') if name.strip()}
+        if not wanted:
+            return self.names
+
+        unknown = sorted(name for name in wanted if name not in self._metrics and name not in self._aliases)
+        if unknown:
+            raise ValueError(f"Unknown metrics: {', '.join(unknown)} (available: {', '.join(self.names)})")
+        wanted = {self._aliases.get(name, name) for name in wanted}
+        return [name for name in self._metrics if name in wanted]
+
+    def is_complete(self, names: list) -> bool:
+        return len(names) == len(self._metrics)
+
+    def needs(self, names: list = None) -> list:
+        """Patterns and lexicons the metrics read, derived features resolved"""
+        return self.engine.resolve(
+            need for name in (self.names if names is None else names) for need in self._metrics[name].needs
+        )
+
+    def version(self, scorer_version: str, names: list) -> str:
+        """Cache namespace: partial results must not answer requests for every metric"""
+        return scorer_version if self.is_complete(names) else f"{scorer_version}:{','.join(names)}"
+
+    def score(self, name: str, result: dict):
+        return result.get(self[name].key, 0)
+
+    def describe(self) -> dict:
+        """{metric: {needs, features, aliases}} - what asking for each metric costs"""
+        return {
+            metric.name: {
+                "needs": list(metric.needs),
+                "features": self.engine.resolve(metric.needs),
+                "aliases": list(metric.aliases)
+            }
+            for metric in self
+        }
@@ -0,0 +1,440 @@
+"""
+Shared scoring engine for the Python evaluators
+Lexicons and regexes are compiled once at import; each response is tokenized
+once and every metric reads its counts from the same TextFeatures object.
+Derived features (computed from other features, e.g. sentence claims) are
+registered with @engine.feature and memoized per text like the rest.
+"""
+import re
+import uuid
+import inspect
+import functools
+import threading
+import contextlib
+from collections import OrderedDict
+
+WORD = re.compile(r'\w+')
+_UNTIMED = contextlib.nullcontext()
+
+
+def _is_word_char(ch: str) -> bool:
+    # Same definition as `\w` for str patterns
+    return ch.isalnum() or ch == '_'
+
+
+class ScoringEngine:
+    """
+    Compiled lexicons + regex patterns for one evaluator.
+
+    lexicons:   {name: [terms]} matched like r'\\b' + re.escape(term) + r'\\b'
+                with re.IGNORECASE, but resolved in a single token pass.
+    substrings: {name: [terms]} matched like re.escape(term) with re.IGNORECASE
+                (no word boundaries), one combined scan per lexicon.
+    patterns:   {name: regex string or compiled pattern} run at most once per text.
+    derived:    registered with @engine.feature(name, needs=...) - fn(features) -> value.
+    """
+
+    def __init__(self, lexicons: dict, patterns: dict, substrings: dict = None, cache_size: int = 64):
+        self.lexicons = {name: tuple(term.lower() for term in terms) for name, terms in lexicons.items()}
+        self.substrings = {name: tuple(term.lower() for term in terms) for name, terms in (substrings or {}).items()}
+        self.patterns = {
+            name: pattern if isinstance(pattern, re.Pattern) else re.compile(pattern)
+            for name, pattern in patterns.items()
+        }
+
+        # First word of every term -> [(term, lexicon name)], so one dict lookup per token
+        self._index = {}
+        for name, terms in self.lexicons.items():
+            for term in terms:
+                if not (_is_word_char(term[0]) and _is_word_char(term[-1])):
+                    raise ValueError(f"Lexicon term must start and end with a word character: {term!r}")
+                first = WORD.match(term).group(0)
+                self._index.setdefault(first, []).append((term, name))
+
+        # Zero-width alternation finds every start position, overlaps included
+        self._substring_patterns = {}
+        for name, terms in self.substrings.items():
+            for term in terms:
+                if any(other != term and other.startswith(term) for other in terms):
+                    raise ValueError(f"Substring term is a prefix of another term in {name!r}: {term!r}")
+            alternation = '|'.join(re.escape(term) for term in terms)
+            self._substring_patterns[name] = re.compile(f'(?=({alternation}))', re.IGNORECASE)
+
+        # Longest term per kind - bounds how far a match can look past its start
+        self._max_term = max((len(term) for terms in self.lexicons.values() for term in terms), default=0)
+        self._max_substring = {name: max(len(term) for term in terms) for name, terms in self.substrings.items()}
+
+        # Scorers are separate @weave.op calls on the same text; share one analysis
+        self.cache_size = cache_size
+        self._cache = OrderedDict()
+        self._cache_lock = threading.Lock()
+        # text -> [features, pin count]: a batch's analyses, held outside the LRU while it is scored
+        self._pinned = {}
+
+        # Optional timing hook (scorer_profiler.ScorerProfiler): time_pattern(name) context manager
+        self.profiler = None
+
+        # name -> (fn, needs); functions stay in this process (not part of spec())
+        self.derived = {}
+
+    def feature(self, name: str, needs: tuple = ()):
+        """Decorator: a derived feature computed from other features, once per text"""
+        if name in self.lexicons or name in self.substrings or name in self.patterns or name in self.derived:
+            raise ValueError(f"Feature already defined: {name!r}")
+        self.resolve(needs)
+
+        def register(fn):
+            self.derived[name] = (fn, tuple(needs))
+            return fn
+        return register
+
+    def resolve(self, names) -> list:
+        """Patterns and lexicons that names (derived features included) are computed from"""
+        resolved = {}
+        pending = list(names)
+        while pending:
+            name = pending.pop(0)
+            if name in self.derived:
+                pending.extend(self.derived[name][1])
+            elif name in self.patterns or name in self.lexicons or name in self.substrings:
+                resolved[name] = None
+            else:
+                raise ValueError(f"Unknown feature: {name!r}")
+        return list(resolved)
+
+    def timed(self, name: str):
+        """Times one regex run or lexicon pass when a profiler is attached"""
+        return self.profiler.time_pattern(name) if self.profiler is not None else _UNTIMED
+
+    def analyze(self, text: str) -> 'TextFeatures':
+        with self._cache_lock:
+            pinned = self._pinned.get(text)
+            if pinned is not None:
+                return pinned[0]
+            features = self._cache.get(text)
+            if features is not None:
+                self._cache.move_to_end(text)
+                return features
+        features = TextFeatures(self, text)
+        self.prime(text, features)
+        return features
+
+    def prime(self, text: str, features: 'TextFeatures'):
+        """Make analyze(text) return features, e.g. ones built incrementally by a stream"""
+        with self._cache_lock:
+            self._cache[text] = features
+            self._cache.move_to_end(text)
+            while len(self._cache) > self.cache_size:
+                self._cache.popitem(last=False)
+
+    def cached(self, text: str):
+        """The cached analysis of text, or None (no side effects)"""
+        with self._cache_lock:
+            pinned = self._pinned.get(text)
+            return pinned[0] if pinned is not None else self._cache.get(text)
+
+    @contextlib.contextmanager
+    def pin(self, features_by_text: dict):
+        """
+        analyze(text) returns features_by_text[text] inside the block, however
+        many other texts pass through the LRU meanwhile - a batch larger than
+        cache_size is still analyzed once per text.
+        """
+        with self._cache_lock:
+            for text, features in features_by_text.items():
+                self._pinned.setdefault(text, [features, 0])[1] += 1
+        try:
+            yield features_by_text
+        finally:
+            with self._cache_lock:
+                for text in features_by_text:
+                    entry = self._pinned[text]
+                    entry[1] -= 1
+                    if not entry[1]:
+                        del self._pinned[text]
+
+    def clear_cache(self):
+        with self._cache_lock:
+            self._cache.clear()
+
+    def spec(self) -> dict:
+        """Constructor arguments that rebuild this engine, e.g. in a worker process"""
+        return {
+            "lexicons": self.lexicons,
+            "patterns": self.patterns,
+            "substrings": self.substrings,
+            "cache_size": self.cache_size
+        }
+
+    def extract(self, text: str, names: list = None) -> dict:
+        """
+        Lexicon counts and pattern matches of text as plain data -
+        TextFeatures(engine, text, **extract(text)). names (from resolve())
+        limits the work to those features; the rest stay lazy.
+        """
+        lexicon_hits = None
+        if names is None or any(name in self.lexicons or name in self.substrings for name in names):
+            with self.timed('lexicons'):
+                lexicon_hits = self.count_lexicons(text)
+        matches = {}
+        for name, pattern in self.patterns.items():
+            if names is not None and name not in names:
+                continue
+            with self.timed(name):
+                matches[name] = pattern.findall(text)
+        return {"lexicon_hits": lexicon_hits, "matches": matches}
+
+    def stream(self, names: list = None) -> 'StreamingFeatures':
+        return StreamingFeatures(self, names)
+
+    def _count_token(self, text: str, token, hits: dict, last_end: dict):
+        candidates = self._index.get(token.group(0).lower())
+        if not candidates:
+            return
+        start = token.start()
+        length = len(text)
+        for term, name in candidates:
+            end = start + len(term)
+            if end == token.end():
+                matched = True
+            else:
+                matched = (
+                    end <= length
+                    and text[start:end].lower() == term
+                    and (end == length or not _is_word_char(text[end]))
+                )
+            if not matched or start < last_end.get((name, term), 0):
+                continue
+            last_end[(name, term)] = end
+            counts = hits[name]
+            counts[term] = counts.get(term, 0) + 1
+
+    def _count_substring(self, name: str, match, counts: dict, last_end: dict):
+        term = match.group(1).lower()
+        if match.start() < last_end.get((name, term), 0):
+            return
+        last_end[(name, term)] = match.start() + len(term)
+        counts[term] = counts.get(term, 0) + 1
+
+    def count_lexicons(self, text: str) -> dict:
+        """Single pass over the tokens of text (plus one scan per substring lexicon) -> {lexicon: {term: count}}"""
+        hits = {name: {} for name in self.lexicons}
+        last_end = {}  # re.findall never returns overlapping matches of one term
+
+        for token in WORD.finditer(text):
+            self._count_token(text, token, hits, last_end)
+
+        for name, pattern in self._substring_patterns.items():
+            counts = hits[name] = {}
+            for match in pattern.finditer(text):
+                self._count_substring(name, match, counts, last_end)
+
+        return hits
+
+
+def _match_value(pattern: re.Pattern, match) -> object:
+    """What pattern.findall() would return for this match"""
+    if pattern.groups == 0:
+        return match.group(0)
+    if pattern.groups == 1:
+        return match.group(1) or ''
+    return match.groups('')
+
+
+class TextFeatures:
+    """Per-text view: lexicon counts, regex matches and derived features are computed on first use"""
+
+    def __init__(self, engine: ScoringEngine, text: str, lexicon_hits: dict = None, matches: dict = None):
+        self.engine = engine
+        self.text = text
+        self._lexicon_hits = lexicon_hits
+        self._matches = dict(matches or {})
+        self._spans = {}
+        self._derived = {}
+
+    @property
+    def lexicon_hits(self) -> dict:
+        if self._lexicon_hits is None:
+            with self.engine.timed('lexicons'):
+                self._lexicon_hits = self.engine.count_lexicons(self.text)
+        return self._lexicon_hits
+
+    def count(self, lexicon: str) -> int:
+        return sum(self.lexicon_hits[lexicon].values())
+
+    def findall(self, pattern: str) -> list:
+        if pattern not in self._matches:
+            with self.engine.timed(pattern):
+                self._matches[pattern] = self.engine.patterns[pattern].findall(self.text)
+        return self._matches[pattern]
+
+    def get(self, name: str):
+        """Any feature by name: a lexicon's count, a pattern's matches or a derived value"""
+        if name in self.engine.derived:
+            if name not in self._derived:
+                with self.engine.timed(name):
+                    self._derived[name] = self.engine.derived[name][0](self)
+            return self._derived[name]
+        if name in self.engine.patterns:
+            return self.findall(name)
+        return self.count(name)
+
+    def spans(self, pattern: str) -> list:
+        """(start, end) of every match, in order - for positional joins between patterns"""
+        if pattern not in self._spans:
+            with self.engine.timed(f'{pattern} (spans)'):
+                self._spans[pattern] = [match.span() for match in self.engine.patterns[pattern].finditer(self.text)]
+        return self._spans[pattern]
+
+
+class StreamingFeatures:
+    """
+    TextFeatures for a response that arrives in deltas (e.g. LLM tokens).
+
+    Everything that can no longer change as text is appended is settled and
+    kept; each feed() only rescans the unsettled tail, so streaming a response
+    costs about one batch pass overall. The features returned for the full text
+    equal engine.analyze(text) exactly; finish() primes the engine's cache with
+    them so the final scorer pass does not rescan.
+
+    Settling rules:
+      word lexicons      - a token is final once it is followed by a non-word
+                           character and the longest term starting at it fits
+      substring lexicons - a start position is final once the longest term fits
+      patterns           - every match before the last one found is final; the
+                           next scan resumes at the last match's start
+
+    names (from engine.resolve()) limits the tracked features; others are
+    computed from the full text only if something asks for them.
+    """
+
+    def __init__(self, engine: ScoringEngine, names: list = None):
+        self.engine = engine
+        self.text = ''
+        self._lexicons = names is None or any(name in engine.lexicons or name in engine.substrings for name in names)
+        self._patterns = [name for name in engine.patterns if names is None or name in names]
+
+        self._token_pos = 0
+        self._token_hits = {name: {} for name in engine.lexicons}
+        self._token_last_end = {}
+
+        self._substring_pos = {name: 0 for name in engine.substrings}
+        self._substring_hits = {name: {} for name in engine.substrings}
+        self._substring_last_end = {}
+
+        self._pattern_pos = {name: 0 for name in engine.patterns}
+        self._pattern_settled = {name: [] for name in engine.patterns}
+
+    def feed(self, delta: str) -> TextFeatures:
+        """Append delta; returns features of the text received so far"""
+        self.text += delta
+        return self.snapshot()
+
+    def finish(self) -> TextFeatures:
+        features = self.snapshot()
+        self.engine.prime(self.text, features)
+        return features
+
+    def snapshot(self) -> TextFeatures:
+        lexicon_hits = None
+        if self._lexicons:
+            lexicon_hits = self._scan_tokens()
+            lexicon_hits.update(self._scan_substrings())
+        matches = {name: self._scan_pattern(name) for name in self._patterns}
+        return TextFeatures(self.engine, self.text, lexicon_hits, matches)
+
+    def _scan_tokens(self) -> dict:
+        text = self.text
+        length = len(text)
+        settle_before = length - self.engine._max_term
+
+        tail = []
+        for token in WORD.finditer(text, self._token_pos):
+            if tail or token.start() >= settle_before or token.end() >= length:
+                tail.append(token)
+                continue
+            self.engine._count_token(text, token, self._token_hits, self._token_last_end)
+            self._token_pos = token.end()
+
+        hits = {name: dict(counts) for name, counts in self._token_hits.items()}
+        last_end = dict(self._token_last_end)
+        for token in tail:
+            self.engine._count_token(text, token, hits, last_end)
+        return hits
+
+    def _scan_substrings(self) -> dict:
+        text = self.text
+        hits = {}
+        for name, pattern in self.engine._substring_patterns.items():
+            settle_through = len(text) - self.engine._max_substring[name]
+            settled = self._substring_hits[name]
+
+            tail = []
+            for match in pattern.finditer(text, self._substring_pos[name]):
+                if match.start() > settle_through:
+                    tail.append(match)
+                else:
+                    self.engine._count_substring(name, match, settled, self._substring_last_end)
+            self._substring_pos[name] = max(self._substring_pos[name], settle_through + 1)
+
+            counts = dict(settled)
+            last_end = dict(self._substring_last_end)
+            for match in tail:
+                self.engine._count_substring(name, match, counts, last_end)
+            hits[name] = counts
+        return hits
+
+    def _scan_pattern(self, name: str) -> list:
+        pattern = self.engine.patterns[name]
+        settled = self._pattern_settled[name]
+
+        found = list(pattern.finditer(self.text, self._pattern_pos[name]))
+        if not found:
+            return list(settled)
+        settled.extend(_match_value(pattern, match) for match in found[:-1])
+        self._pattern_pos[name] = found[-1].start()
+        return settled + [_match_value(pattern, found[-1])]
+
+
+class ScoreCollector:
+    """
+    Captures scorer results per dataset row while a Weave Evaluation runs,
+    so a service returns the scores that were logged instead of rescoring.
+    Rows are identified by output['row_id'], which the model's predict echoes.
+    """
+
+    def __init__(self):
+        self._rows = {}
+
+    def open(self, count: int) -> list:
+        row_ids = [uuid.uuid4().hex for _ in range(count)]
+        for row_id in row_ids:
+            self._rows[row_id] = {}
+        return row_ids
+
+    def close(self, row_ids: list) -> list:
+        """Pop collected {metric: score} dicts, in row_ids order"""
+        return [self._rows.pop(row_id, {}) for row_id in row_ids]
+
+    def scorer(self, metric: str, key: str):
+        """Decorator: file result[key] under metric for the row being scored"""
+        def decorate(fn):
+            signature = inspect.signature(fn)
+
+            def collect(args, kwargs, result):
+                output = signature.bind(*args, **kwargs).arguments.get('output') or {}
+                row = self._rows.get(output.get('row_id'))
+                if row is not None and isinstance(result, dict):
+                    row[metric] = result.get(key, 0)
+                return result
+
+            if inspect.iscoroutinefunction(fn):
+                @functools.wraps(fn)
+                async def wrapper(*args, **kwargs):
+                    return collect(args, kwargs, await fn(*args, **kwargs))
+            else:
+                @functools.wraps(fn)
+                def wrapper(*args, **kwargs):
+                    return collect(args, kwargs, fn(*args, **kwargs))
+            return wrapper
+        return decorate
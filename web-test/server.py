@@ -1,15 +1,300 @@
 #!/usr/bin/env python3
 
 import http.server
-import socketserver
 import webbrowser
+import datetime
+import email.utils
+import io
+import json
 import os
 import sys
+import time
 from pathlib import Path
+from concurrent.futures import ThreadPoolExecutor
+from static_assets import ETagCache, MemoryAssetCache, PrecompressedAssets, etag_matches, parse_range
+from module_graph import build_manifest, link_header
+from metrics import CONTENT_TYPE as METRICS_CONTENT_TYPE, METRICS, METRICS_PATH, phase
 
-PORT = 8080
+PORT = int(os.getenv('PORT', '8080'))
+WEB_DIR = Path(__file__).parent
+
+# Concurrent serving: SERVER_WORKERS connections at once, each kept alive
+# for up to SERVER_KEEPALIVE_TIMEOUT idle seconds before its worker is freed
+WORKERS = int(os.getenv('SERVER_WORKERS', '32'))
+KEEPALIVE_TIMEOUT = float(os.getenv('SERVER_KEEPALIVE_TIMEOUT', '5'))
+
+# gzip/brotli variants of public/modules, kept in a cache dir and rebuilt when a file changes.
+# SERVER_PRECOMPRESS=0 serves everything uncompressed.
+PRECOMPRESS = os.getenv('SERVER_PRECOMPRESS', '1') not in ('0', 'false', 'no')
+ASSETS = PrecompressedAssets(
+    root=WEB_DIR,
+    cache_dir=os.getenv('COMPRESSED_CACHE_DIR', str(WEB_DIR / '.compressed')),
+    roots=['public/modules']
+)
+
+# Strong ETags for every file; revalidation answers 304 without a body.
+# Vendored paths never change in place, so browsers may cache them for a year.
+ETAGS = ETagCache()
+IMMUTABLE_PATHS = tuple(p for p in os.getenv('SERVER_IMMUTABLE_PATHS', '/modules/three-addons/,/public/modules/three-addons/').split(',') if p)
+IMMUTABLE_CACHE_CONTROL = 'public, max-age=31536000, immutable'
+REVALIDATE_CACHE_CONTROL = 'no-cache'
+
+# Import waterfall collapse: the entry module's response lists its whole static
+# import tree as Link: rel=modulepreload (see module_graph.py). SERVER_PRELOAD_ALSO
+# adds dynamically imported modules; SERVER_EARLY_HINTS=1 also sends them as 103.
+# Links use the app's URLs (/modules/..., as in the import map), keyed the same way.
+PRELOAD_ENABLED = os.getenv('SERVER_PRELOAD', '1') not in ('0', 'false', 'no')
+PRELOAD_ALSO = [p for p in os.getenv('SERVER_PRELOAD_ALSO', 'public/modules/lipsync-en.mjs').split(',') if p]
+EARLY_HINTS = os.getenv('SERVER_EARLY_HINTS', '0') in ('1', 'true', 'yes')
+PRELOAD_LINKS = {}
+
+# Hot public/modules files (and their .gz/.br variants) served from memory.
+# SERVER_MEMORY_CACHE_MB=0 reads every response from disk; hit rates at STATS_PATH.
+MEMORY_CACHE_MB = float(os.getenv('SERVER_MEMORY_CACHE_MB', '32'))
+MEMORY = MemoryAssetCache(
+    max_bytes=int(MEMORY_CACHE_MB * 1024 * 1024),
+    roots=[WEB_DIR / 'public/modules', ASSETS.cache_dir]
+) if MEMORY_CACHE_MB > 0 else None
+STATS_PATH = os.getenv('SERVER_STATS_PATH', '/__stats')
+
+def metrics_route(path):
+    """Route label for /metrics: files are grouped by directory (at most three levels)"""
+    url_path = path.split('?', 1)[0].split('#', 1)[0]
+    if url_path in (STATS_PATH, METRICS_PATH):
+        return url_path
+    return '/'.join(url_path.rsplit('/', 1)[0].split('/')[:4]) or '/'
+
+class PooledHTTPServer(http.server.HTTPServer):
+    """HTTPServer that hands each connection to a fixed-size worker pool"""
+    allow_reuse_address = True
+    request_queue_size = 128  # Browsers open many module requests at once
+
+    def __init__(self, server_address, handler_class, workers=WORKERS):
+        super().__init__(server_address, handler_class)
+        self.workers = workers
+        self.pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='http-worker')
+
+    def process_request(self, request, client_address):
+        self.pool.submit(self.process_request_worker, request, client_address)
+
+    def process_request_worker(self, request, client_address):
+        try:
+            self.finish_request(request, client_address)
+        except Exception:
+            self.handle_error(request, client_address)
+        finally:
+            self.shutdown_request(request)
+
+    def server_close(self):
+        super().server_close()
+        self.pool.shutdown(wait=False, cancel_futures=True)
 
 class MyHTTPRequestHandler(http.server.SimpleHTTPRequestHandler):
+    # Persistent connections: many ES module imports reuse a few sockets
+    protocol_version = 'HTTP/1.1'
+    timeout = KEEPALIVE_TIMEOUT
+
+    def translate_path(self, path):
+        """web-test is the document root; public/ is also served at / like the app (/modules/...)"""
+        translated = super().translate_path(path)
+        if not os.path.exists(translated):
+            public = super().translate_path('/public' + path)
+            if os.path.exists(public):
+                return public
+        return translated
+
+    def log_error(self, format, *args):
+        if not format.startswith('Request timed out'):  # Idle keep-alive connection closed
+            super().log_error(format, *args)
+
+    def handle_one_request(self):
+        # Timed from the parsed request line to the last body byte
+        self.metrics = None
+        self.status_code = None
+        self.body_bytes = 0
+        try:
+            super().handle_one_request()
+        finally:
+            if self.metrics:
+                self.metrics.finish(self.status_code or 500, self.body_bytes)
+
+    def parse_request(self):
+        started = time.perf_counter()
+        ok = super().parse_request()
+        if ok:
+            self.metrics = METRICS.start(self.path, self.command, route=metrics_route(self.path))
+            self.metrics.record('parse', time.perf_counter() - started)
+        return ok
+
+    def send_response_only(self, code, message=None):
+        if code >= 200:  # Not 103 Early Hints
+            self.status_code = code
+        super().send_response_only(code, message)
+
+    def send_header(self, keyword, value):
+        if keyword.lower() == 'content-length' and self.command != 'HEAD':
+            self.body_bytes = int(value)
+        super().send_header(keyword, value)
+
+    def not_modified_since(self, stat):
+        """If-Modified-Since check, same rules as SimpleHTTPRequestHandler"""
+        if "If-Modified-Since" not in self.headers or "If-None-Match" in self.headers:
+            return False
+        try:
+            ims = email.utils.parsedate_to_datetime(self.headers["If-Modified-Since"])
+        except (TypeError, IndexError, OverflowError, ValueError):
+            return False
+        if ims.tzinfo is None:
+            ims = ims.replace(tzinfo=datetime.timezone.utc)
+        last_modified = datetime.datetime.fromtimestamp(stat.st_mtime, datetime.timezone.utc).replace(microsecond=0)
+        return last_modified <= ims
+
+    def if_range_matches(self, etag, stat):
+        """A Range applies only if If-Range (when sent) still names this version"""
+        if_range = self.headers.get('If-Range')
+        if not if_range:
+            return True
+        if if_range.startswith('"'):
+            return if_range == etag  # Strong comparison
+        if if_range.startswith('W/'):
+            return False
+        return if_range.strip() == self.date_time_string(stat.st_mtime)
+
+    def send_early_hints(self, link):
+        """103 Early Hints ahead of the real response (HTTP/1.1 clients only)"""
+        self.send_response_only(103)
+        self.send_header('Link', link)
+        self.end_headers()
+
+    def send_stats(self):
+        body = json.dumps({
+            "memory_cache": MEMORY.stats() if MEMORY else None,
+            "etags_hashed": ETAGS.hashed,
+            "workers": WORKERS
+        }, indent=2).encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'application/json')
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Cache-Control', 'no-store')
+        self.end_headers()
+        return io.BytesIO(body)
+
+    def send_metrics(self):
+        body = METRICS.render().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', METRICS_CONTENT_TYPE)
+        self.send_header('Content-Length', str(len(body)))
+        self.send_header('Cache-Control', 'no-store')
+        self.end_headers()
+        return io.BytesIO(body)
+
+    def send_head(self):
+        # (offset, count) of the file body for copyfile(); None = whole file
+        self.body_range = None
+        url_path = self.path.split('?', 1)[0]
+        if url_path == STATS_PATH:
+            return self.send_stats()
+        if url_path == METRICS_PATH:
+            return self.send_metrics()
+
+        with phase('lookup'):
+            return self.send_file_head()
+
+    def send_file_head(self):
+        """Headers for a file (or SimpleHTTPRequestHandler's directory/404 handling)"""
+        path = self.translate_path(self.path)
+        if path.endswith('/') or not os.path.isfile(path):
+            return super().send_head()  # Directories, redirects, 404s
+
+        url_path = self.path.split('?', 1)[0].split('#', 1)[0]
+        preload_link = PRELOAD_LINKS.get(url_path)
+        if preload_link and EARLY_HINTS and self.request_version == 'HTTP/1.1':
+            self.send_early_hints(preload_link)
+
+        stat = os.stat(path)
+        encoding, served_path = None, path
+        compressible = PRECOMPRESS and ASSETS.compressible(path)
+        ranged = 'Range' in self.headers
+        if compressible and not ranged:
+            # Pick a precompressed variant from Accept-Encoding; ranges are
+            # always served from the identity file so offsets stay meaningful
+            encoding, served_path = ASSETS.negotiate(path, self.headers.get('Accept-Encoding'), stat)
+
+        # Each representation (identity/gzip/br) gets its own strong ETag
+        etag = ETAGS.get(path, stat)
+        if encoding:
+            etag = f'{etag[:-1]}-{encoding}"'
+        cache_control = IMMUTABLE_CACHE_CONTROL if url_path.startswith(IMMUTABLE_PATHS) else REVALIDATE_CACHE_CONTROL
+
+        if "If-None-Match" in self.headers:
+            not_modified = etag_matches(self.headers["If-None-Match"], etag)
+        else:
+            not_modified = self.not_modified_since(stat)
+
+        if not_modified:
+            self.send_response(304)
+            self.send_header('ETag', etag)
+            self.send_header('Cache-Control', cache_control)
+            self.send_header('Last-Modified', self.date_time_string(stat.st_mtime))
+            if compressible:
+                self.send_header('Vary', 'Accept-Encoding')
+            if preload_link:
+                self.send_header('Link', preload_link)
+            self.end_headers()
+            return None
+
+        body = MEMORY.get(served_path, None if encoding else stat) if MEMORY else None
+        f = io.BytesIO(body) if body is not None else open(served_path, 'rb')
+        try:
+            size = len(body) if body is not None else os.fstat(f.fileno()).st_size
+            byte_range = None
+            if ranged and self.if_range_matches(etag, stat):
+                try:
+                    byte_range = parse_range(self.headers['Range'], size)
+                except ValueError:
+                    f.close()
+                    self.send_response(416)
+                    self.send_header('Content-Range', f'bytes */{size}')
+                    self.send_header('Content-Length', '0')
+                    self.end_headers()
+                    return None
+
+            if byte_range:
+                first, last = byte_range
+                self.body_range = (first, last - first + 1)
+                self.send_response(206)
+                self.send_header('Content-Range', f'bytes {first}-{last}/{size}')
+                self.send_header('Content-Length', str(last - first + 1))
+            else:
+                self.send_response(200)
+                self.send_header('Content-Length', str(size))
+            self.send_header('Content-type', self.guess_type(path))
+            if encoding:
+                self.send_header('Content-Encoding', encoding)
+            if compressible:
+                self.send_header('Vary', 'Accept-Encoding')
+            self.send_header('Accept-Ranges', 'bytes')
+            self.send_header('Last-Modified', self.date_time_string(stat.st_mtime))
+            self.send_header('ETag', etag)
+            self.send_header('Cache-Control', cache_control)
+            if preload_link:
+                self.send_header('Link', preload_link)
+            self.end_headers()
+            return f
+        except:
+            f.close()
+            raise
+
+    def copyfile(self, source, outputfile):
+        """Zero-copy body: memory-cached bytes as a view, files through os.sendfile"""
+        offset, count = getattr(self, 'body_range', None) or (0, None)
+        with phase('send'):
+            if isinstance(source, io.BytesIO):
+                data = memoryview(source.getvalue())
+                outputfile.write(data[offset:offset + count] if count is not None else data[offset:])
+                return
+            self.connection.sendfile(source, offset, count)
+
     def end_headers(self):
         # Add CORS headers to allow API calls
         self.send_header('Access-Control-Allow-Origin', '*')
@@ -20,16 +305,46 @@ class MyHTTPRequestHandler(http.server.SimpleHTTPRequestHandler):
     def do_OPTIONS(self):
         # Handle preflight requests
         self.send_response(200)
+        self.send_header('Content-Length', '0')
         self.end_headers()
 
+def load_preload_links():
+    """Walk the import graph once at startup: {entry URL: Link header value}"""
+    if not PRELOAD_ENABLED:
+        return
+    try:
+        manifest = build_manifest(also=PRELOAD_ALSO, root=str(WEB_DIR))
+    except Exception as e:
+        print(f"⚠️  Module preload disabled: {e}")
+        return
+    for entry, urls in manifest["preload"].items():
+        if urls:
+            PRELOAD_LINKS[entry] = link_header(urls)
+            print(f"🔗 {entry}: modulepreload for {len(urls)} modules (import depth {manifest['analysis'][entry]['import_depth']})" + (" + 103 Early Hints" if EARLY_HINTS else ""))
+
+def precompress():
+    """Build step: write every stale .gz/.br variant and exit"""
+    print(f"🗜️  Precompressing public/modules into {ASSETS.cache_dir}")
+    written = ASSETS.precompress(verbose=True)
+    print(f"✅ {written} variant(s) written")
+
 def run_server():
     # Change to the web-test directory
-    web_dir = Path(__file__).parent
+    web_dir = WEB_DIR
     os.chdir(web_dir)
 
     print(f"🚀 Starting TalkBitch test server...")
     print(f"📁 Serving from: {web_dir}")
     print(f"🌐 Server running at: http://localhost:{PORT}")
+    print(f"🧵 {WORKERS} workers, HTTP/1.1 keep-alive ({KEEPALIVE_TIMEOUT:g}s idle timeout)")
+    if PRECOMPRESS:
+        codings = ' + '.join(coding for coding, _, _ in ASSETS.CODINGS)
+        print(f"🗜️  Precompressing public/modules ({codings}) into {ASSETS.cache_dir}")
+        ASSETS.precompress_async()
+    load_preload_links()
+    if MEMORY:
+        print(f"🧠 In-memory asset cache: {MEMORY_CACHE_MB:g} MB (stats at http://localhost:{PORT}{STATS_PATH})")
+    print(f"📈 Prometheus metrics at http://localhost:{PORT}{METRICS_PATH}")
     print(f"📱 Open the URL above in your browser to test the app")
     print(f"⭐ Features:")
     print(f"   - Ready Player Me avatar integration")
@@ -41,7 +356,7 @@ def run_server():
     print("=" * 50)
 
     try:
-        with socketserver.TCPServer(("", PORT), MyHTTPRequestHandler) as httpd:
+        with PooledHTTPServer(("", PORT), MyHTTPRequestHandler) as httpd:
             # Try to open browser automatically
             try:
                 webbrowser.open(f'http://localhost:{PORT}')
@@ -65,4 +380,7 @@ def run_server():
         print(f"❌ Unexpected error: {e}")
 
 if __name__ == "__main__":
-    run_server()
\ No newline at end of file
+    if '--precompress' in sys.argv:
+        precompress()
+    else:
+        run_server()
\ No newline at end of file
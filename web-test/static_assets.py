@@ -0,0 +1,320 @@
+"""
+Static asset helpers for server.py
+ETagCache computes a strong ETag (content hash) once per file version.
+parse_range resolves a single-range `Range: bytes=...` header.
+MemoryAssetCache keeps hot files in memory under a byte budget (LRU).
+PrecompressedAssets keeps gzip (and brotli, when the `brotli` package is
+installed) variants of compressible files in a cache directory that mirrors the
+served tree. Variants carry their source's mtime, so an edited file is detected
+and recompressed; until then the original is served.
+
+Build ahead of time with: python3 server.py --precompress
+"""
+import os
+import gzip
+import hashlib
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+try:
+    import brotli
+except ImportError:  # gzip only
+    brotli = None
+
+COMPRESSIBLE_EXTENSIONS = {'.js', '.mjs', '.cjs', '.wasm', '.json', '.css', '.html', '.svg', '.txt', '.md', '.map', '.gltf', '.fbx', '.obj'}
+MIN_COMPRESS_BYTES = 1024
+
+
+def accepted_encodings(header: str) -> set:
+    """Codings from an Accept-Encoding header with q > 0 ('*' stands for any)"""
+    accepted = set()
+    for part in (header or '').split(','):
+        coding, _, params = part.strip().partition(';')
+        coding = coding.strip().lower()
+        if not coding:
+            continue
+        q = 1.0
+        for param in params.split(';'):
+            name, _, value = param.strip().partition('=')
+            if name.strip().lower() == 'q':
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        if q > 0:
+            accepted.add(coding)
+    return accepted
+
+
+def etag_matches(if_none_match: str, etag: str) -> bool:
+    """If-None-Match uses weak comparison: W/ prefixes are ignored"""
+    for candidate in (if_none_match or '').split(','):
+        candidate = candidate.strip()
+        if candidate == '*':
+            return True
+        if candidate.startswith('W/'):
+            candidate = candidate[2:]
+        if candidate == etag:
+            return True
+    return False
+
+
+def parse_range(header: str, size: int):
+    """
+    (first, last) byte offsets, inclusive, for a `bytes=` Range header.
+    None means serve the whole file (no header, other units, several ranges,
+    malformed); ValueError means the range cannot be satisfied (416).
+    """
+    unit, _, spec = (header or '').partition('=')
+    if unit.strip().lower() != 'bytes' or ',' in spec:
+        return None
+    first, sep, last = spec.strip().partition('-')
+    if not sep or not first + last or not (first.isdigit() or not first) or not (last.isdigit() or not last):
+        return None
+
+    if not first:
+        # Suffix range: the last N bytes
+        if int(last) == 0 or size == 0:
+            raise ValueError("Empty suffix range")
+        return max(0, size - int(last)), size - 1
+
+    first = int(first)
+    if last and int(last) < first:
+        return None
+    if first >= size:
+        raise ValueError("Range starts past the end of the file")
+    return first, min(int(last), size - 1) if last else size - 1
+
+
+class ETagCache:
+    """Strong ETags keyed by (path, mtime, size) - each file version is hashed once"""
+
+    def __init__(self):
+        self._tags = {}
+        self._lock = threading.Lock()
+        self.hashed = 0
+
+    def get(self, path: str, stat: os.stat_result) -> str:
+        version = (stat.st_mtime_ns, stat.st_size)
+        with self._lock:
+            cached = self._tags.get(path)
+        if cached and cached[0] == version:
+            return cached[1]
+
+        digest = hashlib.blake2b(digest_size=16)
+        with open(path, 'rb') as f:
+            for block in iter(lambda: f.read(1 << 20), b''):
+                digest.update(block)
+        etag = f'"{digest.hexdigest()}"'
+        with self._lock:
+            self._tags[path] = (version, etag)
+            self.hashed += 1
+        return etag
+
+
+class MemoryAssetCache:
+    """
+    File bytes kept in memory, keyed by path and validated against the file's
+    (mtime, size) on every lookup. Least recently used files are evicted once
+    the total exceeds `max_bytes`; files larger than `max_file_bytes` are never
+    held so one big asset cannot flush the hot set.
+    """
+
+    def __init__(self, max_bytes: int, roots: list, max_file_bytes: int = None):
+        self.max_bytes = max_bytes
+        self.max_file_bytes = max_file_bytes or max_bytes // 4
+        self.roots = tuple(os.path.join(os.path.abspath(path), '') for path in roots)
+        self._files = OrderedDict()  # path -> ((mtime_ns, size), bytes)
+        self._lock = threading.Lock()
+        self.bytes = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def cacheable(self, path: str) -> bool:
+        return path.startswith(self.roots)
+
+    def get(self, path: str, stat: os.stat_result = None):
+        """Contents of path, from memory when the cached copy is current; None if not cacheable"""
+        if not self.cacheable(path):
+            return None
+        stat = stat or os.stat(path)
+        version = (stat.st_mtime_ns, stat.st_size)
+
+        with self._lock:
+            cached = self._files.get(path)
+            if cached and cached[0] == version:
+                self._files.move_to_end(path)
+                self.hits += 1
+                return cached[1]
+            self.misses += 1
+            if cached:
+                # Edited on disk since it was cached
+                del self._files[path]
+                self.bytes -= len(cached[1])
+                self.invalidations += 1
+
+        if stat.st_size > self.max_file_bytes:
+            return None
+        with open(path, 'rb') as f:
+            current = os.fstat(f.fileno())
+            data = f.read()
+        version = (current.st_mtime_ns, current.st_size)
+
+        with self._lock:
+            previous = self._files.pop(path, None)
+            if previous:
+                self.bytes -= len(previous[1])
+            self._files[path] = (version, data)
+            self.bytes += len(data)
+            while self.bytes > self.max_bytes and self._files:
+                _, (_, evicted) = self._files.popitem(last=False)
+                self.bytes -= len(evicted)
+                self.evictions += 1
+        return data
+
+    def clear(self):
+        with self._lock:
+            self._files.clear()
+            self.bytes = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            lookups = self.hits + self.misses
+            return {
+                "entries": len(self._files),
+                "bytes": self.bytes,
+                "max_bytes": self.max_bytes,
+                "max_file_bytes": self.max_file_bytes,
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / lookups, 4) if lookups else 0.0,
+                "evictions": self.evictions,
+                "invalidations": self.invalidations,
+                "hottest": [os.path.basename(path) for path in reversed(self._files)][:10]
+            }
+
+
+def _gzip(data: bytes) -> bytes:
+    return gzip.compress(data, compresslevel=9, mtime=0)
+
+
+def _brotli(data: bytes) -> bytes:
+    return brotli.compress(data, quality=11)
+
+
+class PrecompressedAssets:
+    # Preferred first
+    CODINGS = [('br', '.br', _brotli), ('gzip', '.gz', _gzip)] if brotli else [('gzip', '.gz', _gzip)]
+
+    def __init__(self, root: str, cache_dir: str, roots: list = None):
+        self.root = os.path.abspath(root)
+        self.cache_dir = os.path.abspath(cache_dir)
+        self.roots = [os.path.join(self.root, path) for path in (roots or [''])]
+        self._pending = set()
+        self._lock = threading.Lock()
+        self._worker = ThreadPoolExecutor(max_workers=1, thread_name_prefix='precompress')
+
+    def compressible(self, path: str) -> bool:
+        return os.path.splitext(path)[1].lower() in COMPRESSIBLE_EXTENSIONS
+
+    def _variant_path(self, path: str, suffix: str) -> str:
+        return os.path.join(self.cache_dir, os.path.relpath(path, self.root) + suffix)
+
+    def _fresh(self, variant: str, stat: os.stat_result) -> bool:
+        try:
+            return os.stat(variant).st_mtime_ns == stat.st_mtime_ns
+        except OSError:
+            return False
+
+    def compress(self, path: str) -> int:
+        """(Re)build stale variants of one file; returns how many were written"""
+        stat = os.stat(path)
+        if stat.st_size < MIN_COMPRESS_BYTES or not self.compressible(path):
+            return 0
+
+        written = 0
+        data = None
+        for _, suffix, compress in self.CODINGS:
+            variant = self._variant_path(path, suffix)
+            if self._fresh(variant, stat):
+                continue
+            if data is None:
+                with open(path, 'rb') as f:
+                    data = f.read()
+            os.makedirs(os.path.dirname(variant), exist_ok=True)
+            temp = f'{variant}.{threading.get_ident()}.tmp'
+            with open(temp, 'wb') as f:
+                f.write(compress(data))
+            os.utime(temp, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+            os.replace(temp, variant)
+            written += 1
+        return written
+
+    def precompress(self, verbose: bool = False) -> int:
+        """Walk the configured roots and build every stale variant"""
+        written = 0
+        for top in self.roots:
+            for directory, _, files in os.walk(top):
+                for name in files:
+                    path = os.path.join(directory, name)
+                    try:
+                        count = self.compress(path)
+                    except OSError as e:
+                        print(f"⚠️  Could not compress {path}: {e}")
+                        continue
+                    if count and verbose:
+                        print(f"   {os.path.relpath(path, self.root)}")
+                    written += count
+        return written
+
+    def precompress_async(self):
+        """Build variants in the background; requests are served uncompressed meanwhile"""
+        self._worker.submit(self.precompress)
+
+    def _schedule(self, path: str):
+        with self._lock:
+            if path in self._pending:
+                return
+            self._pending.add(path)
+
+        def run():
+            try:
+                self.compress(path)
+            except OSError:
+                pass
+            finally:
+                with self._lock:
+                    self._pending.discard(path)
+        self._worker.submit(run)
+
+    def negotiate(self, path: str, accept_encoding: str, stat: os.stat_result):
+        """
+        (content coding, file to send) for a request, e.g. ('br', '.compressed/x.js.br').
+        Falls back to (None, path); a stale or missing variant is rebuilt in the background.
+        """
+        if stat.st_size < MIN_COMPRESS_BYTES or not self.compressible(path):
+            return None, path
+
+        accepted = accepted_encodings(accept_encoding)
+        stale = False
+        for coding, suffix, _ in self.CODINGS:
+            if coding not in accepted and '*' not in accepted:
+                continue
+            variant = self._variant_path(path, suffix)
+            try:
+                variant_stat = os.stat(variant)
+            except OSError:
+                stale = True
+                continue
+            if variant_stat.st_mtime_ns != stat.st_mtime_ns:
+                stale = True
+                continue
+            if variant_stat.st_size < stat.st_size:
+                return coding, variant
+
+        if stale and path.startswith(tuple(self.roots)):
+            self._schedule(path)
+        return None, path
@@ -0,0 +1,46 @@
+"""
+Synthetic responses and latency percentiles shared by bench_scoring.py and
+eval_suite.py - deterministic Craig-style and generic text built from canned
+sentences, so benchmarks and offline suite runs need no model.
+"""
+import random
+
+CRAIG_PARTS = [
+    "Kilmar Abrego Garcia was deported on March 15, 2025 [18].",
+    "Guess what? The court said 95% of 2,000 cases were mishandled [[38]].",
+    "Here's the kicker: Judge Paula Xinis ordered his return [41]-[48].",
+    "That's bullshit, and it cost $3,000,000 in 2019 alone.",
+    "**This is the part nobody reports** - ask Chris Van Hollen.",
+    "Huh. Let me check the filings from El Salvador again [61].",
+    "Classic. And 12 people signed the letter in Maryland.",
+    "Oh wait, it gets worse: \"we had no record\" said the agency.",
+]
+
+GENERIC_PARTS = [
+    "This is a complex issue with multiple perspectives to consider.",
+    "Some experts believe the policy is generally effective, however others argue it is not.",
+    "It depends on various factors, and on the other hand there are concerns.",
+    "Many people often feel the situation is challenging and somewhat unfortunate.",
+    "A balanced and nuanced view is typically the most helpful approach.",
+    "Studies show it can be arguably beneficial, possibly in many cases.",
+]
+
+
+def generate_response(style: str, words: int = None, size: int = None, seed: int = 0) -> str:
+    """Deterministic synthetic response of roughly `words` words or `size` bytes"""
+    rng = random.Random(f'{style}-{words}-{size}-{seed}')
+    parts = CRAIG_PARTS if style == 'craig' else GENERIC_PARTS
+    sentences = []
+    word_count = 0
+    length = 0
+    while (words and word_count < words) or (size and length < size):
+        sentence = rng.choice(parts)
+        sentences.append(sentence)
+        word_count += len(sentence.split())
+        length += len(sentence) + 1
+    return ' '.join(sentences)
+
+
+def percentile(sorted_values: list, q: float) -> float:
+    index = min(len(sorted_values) - 1, max(0, round(q * (len(sorted_values) - 1))))
+    return sorted_values[index]
@@ -0,0 +1,6 @@
+import os
+import sys
+
+# The services are flat modules at the web-test root; Weave is only imported on a traced call
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), '..'))
+os.environ.setdefault('WEAVE_INIT', 'lazy')
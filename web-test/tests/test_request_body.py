@@ -0,0 +1,216 @@
+import io
+import json
+import asyncio
+
+import pytest
+
+from evaluator_http import BodyStream, Request, RequestError, body_framing, parse_object, read_body, read_examples
+
+
+def chunked(*parts: bytes, trailers: bytes = b'') -> bytes:
+    return b''.join(b'%x\r\n%s\r\n' % (len(part), part) for part in parts) + b'0\r\n' + trailers + b'\r\n'
+
+
+def stream_of(data: bytes, length: int = None, is_chunked: bool = False, limit: int = 1 << 20,
+              reader_limit: int = 64 * 1024) -> BodyStream:
+    reader = asyncio.StreamReader(limit=reader_limit)
+    reader.feed_data(data)
+    reader.feed_eof()
+    return BodyStream(reader, length=length, chunked=is_chunked, limit=limit)
+
+
+def run(make):
+    """Await make() on a fresh loop - StreamReaders must be created inside it"""
+    async def main():
+        return await make()
+    return asyncio.run(main())
+
+
+async def collect_lines(stream: BodyStream, max_line: int = 1 << 20) -> list:
+    return [line async for line in stream.lines(max_line)]
+
+
+async def collect_examples(request: Request, chunk_size: int) -> list:
+    return [chunk async for chunk in read_examples(request, chunk_size)]
+
+
+# Framing
+
+def test_framing_content_length_and_chunked():
+    assert body_framing({'Content-Length': '12'}, 100) == (12, False)
+    assert body_framing({}, 100) == (0, False)
+    assert body_framing({'Transfer-Encoding': 'Chunked'}, 100) == (None, True)
+
+
+@pytest.mark.parametrize('headers, status', [
+    ({'Content-Length': '101'}, 413),
+    ({'Content-Length': 'ten'}, 400),
+    ({'Content-Length': '-1'}, 400),
+    ({'Transfer-Encoding': 'gzip'}, 501),
+    ({'Transfer-Encoding': 'chunked', 'Content-Length': '5'}, 400),
+])
+def test_framing_rejects(headers, status):
+    with pytest.raises(RequestError) as error:
+        body_framing(headers, 100)
+    assert error.value.status == status
+
+
+# Blocking reads (serverless handler)
+
+def test_read_body_chunked_with_extensions_and_trailers():
+    body = b'3;ext=1\r\nabc\r\n2\r\nde\r\n0\r\nX-Checksum: 1\r\n\r\n'
+    assert read_body(io.BytesIO(body), {'Transfer-Encoding': 'chunked'}) == b'abcde'
+
+
+def test_read_body_chunked_over_limit():
+    with pytest.raises(RequestError) as error:
+        read_body(io.BytesIO(chunked(b'x' * 60, b'y' * 60)), {'Transfer-Encoding': 'chunked'}, limit=100)
+    assert error.value.status == 413
+
+
+@pytest.mark.parametrize('body', [b'zz\r\nabc\r\n0\r\n\r\n', b'5\r\nabc', b'3\r\nabcXX0\r\n\r\n'])
+def test_read_body_malformed_chunks(body):
+    with pytest.raises(RequestError) as error:
+        read_body(io.BytesIO(body), {'Transfer-Encoding': 'chunked'})
+    assert error.value.status == 400
+
+
+# Streamed reads (asyncio server)
+
+def test_stream_reads_content_length_body():
+    assert run(lambda: stream_of(b'{"a": 1}trailing', length=8).read()) == b'{"a": 1}'
+
+
+def test_stream_reads_chunked_body():
+    assert run(lambda: stream_of(chunked(b'{"a"', b': 1}'), is_chunked=True).read()) == b'{"a": 1}'
+
+
+def test_stream_over_limit():
+    with pytest.raises(RequestError) as error:
+        run(lambda: stream_of(chunked(b'x' * 80, b'y' * 80), is_chunked=True, limit=100).read())
+    assert error.value.status == 413
+
+
+def test_stream_read_has_its_own_cap():
+    with pytest.raises(RequestError) as error:
+        run(lambda: stream_of(b'x' * 200, length=200).read(limit=100))
+    assert error.value.status == 413
+
+
+def test_stream_trailer_line_too_long():
+    body = chunked(b'{}', trailers=b'X-Long: ' + b'a' * 2048 + b'\r\n')
+    with pytest.raises(RequestError) as error:
+        run(lambda: stream_of(body, is_chunked=True, reader_limit=1024).read())
+    assert error.value.status == 431
+
+
+def test_stream_truncated_body():
+    with pytest.raises(asyncio.IncompleteReadError):
+        run(lambda: stream_of(b'{"a"', length=10).read())
+
+
+def test_lines_split_across_chunks():
+    body = chunked(b'{"i": 1}\n{"i"', b': 2}\n\n{"i": 3}')
+    assert run(lambda: collect_lines(stream_of(body, is_chunked=True))) == [b'{"i": 1}', b'{"i": 2}', b'', b'{"i": 3}']
+
+
+def test_lines_over_cap():
+    body = b'{"i": 1}\n' + b'x' * 100 + b'\n'
+    with pytest.raises(RequestError) as error:
+        run(lambda: collect_lines(stream_of(body, length=len(body)), max_line=50))
+    assert error.value.status == 413
+
+
+def test_unterminated_line_over_cap():
+    body = b'x' * 200
+    with pytest.raises(RequestError):
+        run(lambda: collect_lines(stream_of(body, length=len(body)), max_line=50))
+
+
+# Batches
+
+def ndjson_request(lines: list, content_type: str = 'application/x-ndjson') -> Request:
+    body = ''.join(json.dumps(line) + '\n' for line in lines).encode()
+    stream = stream_of(chunked(body[:7], body[7:]), is_chunked=True)
+    return Request('POST', '/evaluate/batch', 'HTTP/1.1', {'Content-Type': content_type}, stream=stream)
+
+
+def test_ndjson_batch_in_chunks():
+    examples = [{"response": f"r{i}"} for i in range(5)]
+    assert run(lambda: collect_examples(ndjson_request(examples), 2)) == [examples[:2], examples[2:4], examples[4:]]
+
+
+def test_json_array_batch_is_read_whole():
+    examples = [{"response": f"r{i}"} for i in range(3)]
+    body = b'  ' + json.dumps(examples).encode()
+
+    def request():
+        return Request('POST', '/evaluate/batch', 'HTTP/1.1', {'Content-Type': 'application/json'},
+                       stream=stream_of(body, length=len(body)))
+    assert run(lambda: collect_examples(request(), 2)) == [examples[:2], examples[2:]]
+
+
+def test_buffered_batch():
+    request = Request('POST', '/evaluate/batch', 'HTTP/1.1', {}, body=b'{"response": "a"}\n{"response": "b"}\n')
+    assert run(lambda: collect_examples(request, 10)) == [[{"response": "a"}, {"response": "b"}]]
+
+
+@pytest.mark.parametrize('lines, message', [
+    ([{"response": "a"}, [1, 2]], 'Line 2: example must be a JSON object'),
+    ([{"response": "a"}, {"response": "b"}, "x"], 'Line 3: example must be a JSON object'),
+])
+def test_batch_rejects_non_objects(lines, message):
+    with pytest.raises(RequestError) as error:
+        run(lambda: collect_examples(ndjson_request(lines), 10))
+    assert str(error.value) == message
+    assert error.value.status == 400
+
+
+def test_batch_rejects_malformed_line():
+    def request():
+        return Request('POST', '/evaluate/batch', 'HTTP/1.1', {}, stream=stream_of(b'{"a": 1}\n{oops\n', length=15))
+    with pytest.raises(RequestError) as error:
+        run(lambda: collect_examples(request(), 10))
+    assert str(error.value).startswith('Line 2:')
+
+
+# Single examples
+
+def test_parse_object():
+    assert parse_object(b'{"response": "hi"}') == {"response": "hi"}
+    assert parse_object('{"response": "hi"}') == {"response": "hi"}
+
+
+@pytest.mark.parametrize('body', [b'{bad', b'[]', b'"text"', b'null', b'\xff\xfe', b''])
+def test_parse_object_rejects(body):
+    with pytest.raises(RequestError) as error:
+        parse_object(body)
+    assert error.value.status == 400
+
+
+def test_json_array_batch_rejects_malformed_body():
+    body = b'[{"response": "a"}, {oops'
+
+    def request():
+        return Request('POST', '/evaluate/batch', 'HTTP/1.1', {'Content-Type': 'application/json'},
+                       stream=stream_of(body, length=len(body)))
+    with pytest.raises(RequestError) as error:
+        run(lambda: collect_examples(request(), 10))
+    assert str(error.value).startswith('Invalid JSON:')
+    assert error.value.status == 400
+
+
+@pytest.mark.parametrize('body', [b'[{"response": "a"}, [1, 2]]', b'[{"response": "a"}, "b"]'])
+def test_json_array_batch_rejects_non_objects(body):
+    request = Request('POST', '/evaluate/batch', 'HTTP/1.1', {}, body=body)
+    with pytest.raises(RequestError) as error:
+        run(lambda: collect_examples(request, 10))
+    assert str(error.value) == 'Example 1 must be a JSON object'
+    assert error.value.status == 400
+
+
+def test_buffered_batch_rejects_undecodable_body():
+    request = Request('POST', '/evaluate/batch', 'HTTP/1.1', {}, body=b'\xff\xfe[]')
+    with pytest.raises(RequestError) as error:
+        run(lambda: collect_examples(request, 10))
+    assert error.value.status == 400
@@ -0,0 +1,123 @@
+import asyncio
+import multiprocessing
+
+from score_cache import ScoreCache, cache_key
+
+
+class CountingEvaluator:
+    """evaluate(examples) stand-in: score = response length, records every call"""
+
+    def __init__(self):
+        self.calls = []
+
+    async def __call__(self, examples: list) -> list:
+        self.calls.append([example['response'] for example in examples])
+        return [{"overall_score": len(example['response']), "metrics": {}} for example in examples]
+
+
+def test_key_covers_every_scoring_input():
+    base = cache_key('v1', 'response', False, 'question')
+    assert base == cache_key('v1', 'response', False, 'question')
+    assert len({
+        base,
+        cache_key('v2', 'response', False, 'question'),
+        cache_key('v1', 'response!', False, 'question'),
+        cache_key('v1', 'response', True, 'question'),
+        cache_key('v1', 'response', False, 'question?'),
+    }) == 5
+
+
+def test_key_is_unambiguous_and_normalizes_truthiness():
+    # Field boundaries are JSON-encoded, so shifting text between fields changes the key
+    assert cache_key('v1', 'ab', False, 'c') != cache_key('v1', 'a', False, 'bc')
+    assert cache_key('v1', 'r', 1, 'q') == cache_key('v1', 'r', True, 'q')
+    assert cache_key('v1', 'r', '', 'q') == cache_key('v1', 'r', False, 'q')
+
+
+def test_duplicates_in_a_batch_are_scored_once():
+    cache = ScoreCache()
+    evaluate = CountingEvaluator()
+    examples = [
+        {"response": "aa", "model": "craig"},
+        {"response": "b", "model": "generic"},
+        {"response": "aa", "model": "gpt-4"},
+    ]
+    results = asyncio.run(cache.evaluate_cached('v1', examples, evaluate))
+
+    assert evaluate.calls == [["aa", "b"]]
+    assert [result["overall_score"] for result in results] == [2, 1, 2]
+    # The model comes from each example, not from the cached entry
+    assert [result["model"] for result in results] == ["craig", "generic", "gpt-4"]
+
+
+def test_hits_skip_evaluation():
+    cache = ScoreCache()
+    evaluate = CountingEvaluator()
+    asyncio.run(cache.evaluate_cached('v1', [{"response": "aa"}], evaluate))
+    results = asyncio.run(cache.evaluate_cached('v1', [{"response": "aa"}, {"response": "ccc"}], evaluate))
+
+    assert evaluate.calls == [["aa"], ["ccc"]]
+    assert [result["overall_score"] for result in results] == [2, 3]
+    stats = cache.stats()
+    assert stats["hits"] == 1 and stats["misses"] == 2
+
+
+def test_scorer_version_partitions_the_cache():
+    cache = ScoreCache()
+    evaluate = CountingEvaluator()
+    asyncio.run(cache.evaluate_cached('v1', [{"response": "aa"}], evaluate))
+    asyncio.run(cache.evaluate_cached('v2', [{"response": "aa"}], evaluate))
+    assert evaluate.calls == [["aa"], ["aa"]]
+
+
+def test_lru_evicts_least_recently_used():
+    cache = ScoreCache(max_entries=2)
+    cache.put('a', {"overall_score": 1})
+    cache.put('b', {"overall_score": 2})
+    assert cache.get('a') is not None  # 'a' is now most recent
+    cache.put('c', {"overall_score": 3})
+
+    assert cache.get('b') is None
+    assert cache.get('a') == {"overall_score": 1}
+    assert cache.stats()["entries"] == 2
+
+
+def test_sqlite_tier_survives_restart(tmp_path):
+    path = str(tmp_path / 'scores.db')
+    evaluate = CountingEvaluator()
+    examples = [{"response": text} for text in ("aa", "b", "aa", "ccc")]
+    asyncio.run(ScoreCache(path=path).evaluate_cached('v1', examples, evaluate))
+
+    restarted = ScoreCache(path=path)
+    results = asyncio.run(restarted.evaluate_cached('v1', examples, evaluate))
+    assert len(evaluate.calls) == 1
+    assert [result["overall_score"] for result in results] == [2, 1, 2, 3]
+    assert restarted.stats()["disk_hits"] == 3
+
+
+def test_memory_misses_are_read_from_sqlite_in_one_query(tmp_path):
+    path = str(tmp_path / 'scores.db')
+    evaluate = CountingEvaluator()
+    examples = [{"response": "x" * i} for i in range(1, 1201)]
+    asyncio.run(ScoreCache(path=path).evaluate_cached('v1', examples, evaluate))
+
+    restarted = ScoreCache(max_entries=10, path=path)
+    loads = []
+    load = restarted._load
+    restarted._load = lambda keys: loads.append(len(keys)) or load(keys)
+    results = asyncio.run(restarted.evaluate_cached('v1', examples + [{"response": "new"}], evaluate))
+
+    assert loads == [1201]
+    assert evaluate.calls[1:] == [["new"]]
+    assert [result["overall_score"] for result in results] == list(range(1, 1201)) + [3]
+    stats = restarted.stats()
+    assert stats["disk_hits"] == 1200 and stats["misses"] == 1
+
+
+def test_worker_processes_open_no_sqlite(tmp_path, monkeypatch):
+    path = tmp_path / 'scores.db'
+    monkeypatch.setenv('SCORE_CACHE_PATH', str(path))
+    # spawn names a scoring worker before it re-imports the service module
+    monkeypatch.setattr(multiprocessing.current_process(), 'name', 'SpawnProcess-1')
+    cache = ScoreCache.from_env()
+    assert not cache.stats()["persistent"] and not path.exists()
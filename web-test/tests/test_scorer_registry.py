@@ -0,0 +1,88 @@
+import pytest
+
+from scoring_engine import ScoringEngine
+from scorer_registry import ScorerRegistry
+
+
+def make_registry() -> ScorerRegistry:
+    engine = ScoringEngine(
+        lexicons={'vague': ['some', 'many']},
+        patterns={'citations': r'\[(\d+)\]', 'numbers': r'\b\d+\b', 'breaks': r'[.!?]+'}
+    )
+
+    @engine.feature('cited_sentences', needs=('breaks', 'citations'))
+    def cited_sentences(features):
+        return len(features.findall('citations'))
+
+    registry = ScorerRegistry(engine)
+
+    @registry.metric('evidence', key='evidence_score', needs=('citations', 'numbers'), aliases=('ev',))
+    def evidence(text):
+        return {"evidence_score": 10}
+
+    @registry.metric('specificity', needs=('numbers', 'vague'), aliases=('spec',))
+    def specificity(text):
+        return {"score": 20}
+
+    @registry.metric('grounding', needs=('cited_sentences',))
+    def grounding(text):
+        return {"score": 30}
+
+    return registry
+
+
+def test_select_defaults_to_every_metric():
+    registry = make_registry()
+    assert registry.select(None) == ['evidence', 'specificity', 'grounding']
+    assert registry.select([]) == registry.names
+    assert registry.select('') == registry.names
+
+
+def test_select_keeps_registration_order_and_resolves_aliases():
+    registry = make_registry()
+    assert registry.select(['grounding', 'ev']) == ['evidence', 'grounding']
+    assert registry.select('spec, evidence') == ['evidence', 'specificity']
+    assert registry.select(['spec,ev', 'specificity']) == ['evidence', 'specificity']
+
+
+def test_select_rejects_unknown_metrics():
+    registry = make_registry()
+    with pytest.raises(ValueError, match='Unknown metrics: bogus, nope'):
+        registry.select('evidence,nope,bogus')
+
+
+def test_version_namespaces_partial_selections():
+    registry = make_registry()
+    assert registry.version('pages-api/1', registry.select(None)) == 'pages-api/1'
+    partial = registry.version('pages-api/1', registry.select('grounding,ev'))
+    assert partial == 'pages-api/1:evidence,grounding'
+    # Same subset, however it was asked for, shares one cache namespace
+    assert registry.version('pages-api/1', registry.select('ev,grounding')) == partial
+
+
+def test_needs_resolves_derived_features():
+    registry = make_registry()
+    assert sorted(registry.needs(['grounding'])) == ['breaks', 'citations']
+    assert sorted(registry.needs(['evidence', 'specificity'])) == ['citations', 'numbers', 'vague']
+    assert sorted(registry.needs()) == ['breaks', 'citations', 'numbers', 'vague']
+
+
+def test_score_reads_each_metrics_key():
+    registry = make_registry()
+    assert registry.score('evidence', registry['evidence'].fn('')) == 10
+    assert registry.score('spec', registry['spec'].fn('')) == 20
+    assert registry.score('evidence', {}) == 0
+
+
+def test_registration_errors():
+    registry = make_registry()
+    with pytest.raises(ValueError, match='already registered'):
+        registry.metric('ev')
+    with pytest.raises(ValueError, match='Unknown feature'):
+        registry.metric('tone', needs=('sentiment',))
+
+
+def test_describe_lists_resolved_features():
+    description = make_registry().describe()
+    assert description['grounding'] == {"needs": ['cited_sentences'], "features": ['breaks', 'citations'], "aliases": []}
+    assert description['evidence']['aliases'] == ['ev']
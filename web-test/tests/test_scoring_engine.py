@@ -0,0 +1,193 @@
+"""
+The compiled engine must score exactly like the per-metric regex scorers it
+replaced: the reference functions below are the original pages/api/evaluate.py
+scorers, one re.findall per term and pattern.
+"""
+import os
+import re
+import random
+import contextlib
+import importlib.util
+
+import pytest
+
+from scoring_engine import ScoringEngine
+from weave_tracing import untraced
+
+ROOT = os.path.join(os.path.dirname(os.path.abspath(__file__)), '..')
+
+
+def load_pages_evaluator():
+    spec = importlib.util.spec_from_file_location('pages_evaluate', os.path.join(ROOT, 'pages', 'api', 'evaluate.py'))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+pages = load_pages_evaluator()
+
+
+def count_terms(terms: list, text: str) -> int:
+    return sum(len(re.findall(r'\b' + re.escape(term) + r'\b', text, re.IGNORECASE)) for term in terms)
+
+
+def old_context_utilization(text, has_context):
+    if not has_context:
+        return {"score": 0, "citations": 0, "names": 0, "dates": 0}
+    citations = re.findall(r'\[(\d+)\]', text)
+    names = re.findall(r'\b[A-Z][a-z]+ [A-Z][a-z]+(?:\s+[A-Z][a-z]+)?\b', text)
+    dates = re.findall(r'\b\d{4}\b|\b\d{1,2}/\d{1,2}/\d{2,4}\b', text)
+    locations = re.findall(r'\bin [A-Z][a-z]+(?:,? [A-Z]{2})?\b', text)
+    score = min(len(citations) * 10, 50) + min(len(names) * 5, 25) + min(len(dates) * 3, 15) + min(len(locations) * 5, 10)
+    return {"score": min(score, 100), "citations": len(citations), "names": len(names),
+            "dates": len(dates), "locations": len(locations)}
+
+
+def old_evidence_density(text):
+    single = re.findall(r'\[(\d+)\]', text)
+    ranges = re.findall(r'\[(\d+)\](?:[-–]|to)\[(\d+)\]', text)
+    total_citations = len(single) + len(ranges) * 2
+    statistics = re.findall(r'\b\d+(?:\.\d+)?(?:\s?%|,\d+|\s+(?:people|cases|names|percent))\b', text)
+    quotes = re.findall(r'"[^"]+"', text)
+    score = min(total_citations * 10 + len(statistics) * 5 + len(quotes) * 3, 100)
+    return {"score": score, "citations": total_citations, "statistics": len(statistics), "quotes": len(quotes)}
+
+
+def old_specificity(text):
+    vague = count_terms(pages.VAGUE_TERMS, text)
+    proper_nouns = re.findall(r'\b[A-Z][a-z]+(?:\s+[A-Z][a-z]+)+\b', text)
+    numbers = re.findall(r'\b\d+(?:,\d+)*(?:\.\d+)?\b', text)
+    percentages = re.findall(r'\b\d+(?:\.\d+)?%\b', text)
+    monetary = re.findall(r'\$\d+(?:,\d+)*(?:\.\d+)?(?:\s?(?:million|billion|trillion))?\b', text)
+    specific = len(proper_nouns) + len(numbers) + len(percentages) + len(monetary)
+    score = 50 + specific * 5 - vague * 8
+    return {"score": max(0, min(score, 100)), "vague_terms": vague, "specific_terms": specific,
+            "proper_nouns": len(proper_nouns), "numbers": len(numbers)}
+
+
+def old_emotional_authenticity(text):
+    authentic = count_terms(pages.AUTHENTIC_TERMS, text)
+    direct = len(re.findall(r'\b(?:you think|guess what|here\'s the deal|let me tell you)\b', text, re.IGNORECASE))
+    rhetorical = len(re.findall(r'\?\s*(?:[A-Z]|$)', text))
+    corporate = count_terms(pages.CORPORATE_TERMS, text)
+    score = authentic * 15 + direct * 10 + rhetorical * 5 - corporate * 10
+    return {"score": max(0, min(score, 100)), "authentic_markers": authentic, "corporate_markers": corporate,
+            "direct_address": direct, "rhetorical_questions": rhetorical}
+
+
+def old_factual_grounding(text):
+    claims = [s for s in re.split(r'[.!?]+', text) if re.search(r'\b\d+\b|[A-Z][a-z]+ [A-Z][a-z]+|\$\d+', s)]
+    if not claims:
+        return {"score": 0, "total_claims": 0, "grounded_claims": 0}
+    citations = re.findall(r'\[(\d+)\]', text)
+    grounded = sum(1 for claim in claims if any(f'[{c}]' in claim for c in citations))
+    return {"score": int(grounded / len(claims) * 100), "total_claims": len(claims),
+            "grounded_claims": grounded, "citations": len(citations)}
+
+
+VOCABULARY = (
+    "some many often generally typically multiple perspectives it depends on the other hand can be "
+    "is believed studies show arguably somewhat fuck shit damn hell clusterfuck bullshit outrage "
+    "you think guess what here's the deal let me tell you balanced nuanced complex issue various factors "
+    "however while some others argue Kilmar Abrego Garcia in Texas CA 2019 12/03/2020 2,000 95% 3.5 people "
+    "cases $5 $3,000 million [18] [41]-[48] [61]–[67] [[38]] [1]to[2] \"quoted text\" SOME Somebody _some some_"
+).split(' ')
+SEPARATORS = [' ', ' ', ' ', '  ', '\n', '. ', '? ', ', ', '', '-', '"', '**']
+
+
+def random_texts(count: int, seed: int = 0) -> list:
+    rng = random.Random(seed)
+    texts = [
+        ''.join(rng.choice(VOCABULARY) + rng.choice(SEPARATORS) for _ in range(rng.randint(0, 300)))
+        for _ in range(count)
+    ]
+    return texts + ["", "huhere's the kicker", "on the other hand on the other hand", "Why? ", "Why?"]
+
+
+TEXTS = random_texts(150)
+
+
+@pytest.mark.parametrize('text', TEXTS)
+def test_pages_scorers_match_original_regex_scorers(text):
+    pages.ENGINE.clear_cache()
+    with untraced():
+        assert pages.score_context_utilization(text, True) == old_context_utilization(text, True)
+        assert pages.score_context_utilization(text, False) == old_context_utilization(text, False)
+        assert pages.score_evidence_density(text) == old_evidence_density(text)
+        assert pages.score_specificity(text) == old_specificity(text)
+        assert pages.score_emotional_authenticity(text) == old_emotional_authenticity(text)
+
+        grounding = pages.score_factual_grounding(text)
+    claims = grounding.pop('claims', [])
+    assert grounding == old_factual_grounding(text)
+    assert [text[claim['start']:claim['end']] for claim in claims] == [
+        s for s in re.split(r'[.!?]+', text) if re.search(r'\b\d+\b|[A-Z][a-z]+ [A-Z][a-z]+|\$\d+', s)
+    ]
+
+
+def test_lexicon_counts_match_word_boundary_regex():
+    for text in TEXTS:
+        features = pages.ENGINE.extract(text)
+        for name, terms in pages.ENGINE.lexicons.items():
+            expected = {term: len(re.findall(r'\b' + re.escape(term) + r'\b', text, re.IGNORECASE)) for term in terms}
+            counted = features["lexicon_hits"][name]
+            assert {term: counted.get(term, 0) for term in terms} == expected, (name, text)
+
+
+def test_substring_lexicons_match_plain_regex():
+    engine = ScoringEngine({}, {}, substrings={'hedges': ['sort of', 'kinda', 'ish']})
+    for text in TEXTS + ["Sort of sort ofish kindakinda", "ishish"]:
+        hits = engine.count_lexicons(text)['hedges']
+        for term in ('sort of', 'kinda', 'ish'):
+            assert hits.get(term, 0) == len(re.findall(re.escape(term), text, re.IGNORECASE)), (term, text)
+
+
+def test_each_pattern_runs_once_per_text():
+    text = TEXTS[0]
+    pages.ENGINE.clear_cache()
+    runs = []
+
+    class Recorder:
+        def time_pattern(self, name):
+            runs.append(name)
+            return contextlib.nullcontext()
+
+    pages.ENGINE.profiler = Recorder()
+    try:
+        with untraced():
+            for name in pages.REGISTRY.names:
+                pages.run_metric(name, text, True)
+    finally:
+        pages.ENGINE.profiler = None
+    assert runs.count('lexicons') == 1
+    assert all(runs.count(name) == 1 for name in pages.ENGINE.patterns if name in runs)
+
+
+def test_analyze_is_cached_per_text():
+    engine = ScoringEngine({'x': ['a']}, {'digits': r'\d+'}, cache_size=2)
+    first = engine.analyze('a 1')
+    assert engine.analyze('a 1') is first
+    engine.analyze('b 2')
+    engine.analyze('c 3')
+    assert engine.cached('a 1') is None  # LRU evicted
+
+
+def test_pinned_features_survive_eviction():
+    engine = ScoringEngine({'x': ['a']}, {'digits': r'\d+'}, cache_size=1)
+    batch = {text: engine.analyze(text) for text in ('a 1', 'a 2', 'a 3')}
+    with engine.pin(batch):
+        for text in ('x', 'y', 'z'):
+            engine.analyze(text)
+        assert all(engine.analyze(text) is features for text, features in batch.items())
+    assert engine.cached('a 1') is None
+
+
+def test_lexicon_terms_need_word_characters_at_both_ends():
+    with pytest.raises(ValueError):
+        ScoringEngine({'bad': ["'quote"]}, {})
+
+
+def test_unknown_feature_needs_fail_at_registration():
+    engine = ScoringEngine({}, {'digits': r'\d+'})
+    with pytest.raises(ValueError):
+        engine.feature('derived', needs=('missing',))
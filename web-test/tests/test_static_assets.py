@@ -0,0 +1,80 @@
+import os
+
+import pytest
+
+from static_assets import ETagCache, etag_matches, parse_range
+
+ETAG = '"3f2a9c"'
+
+
+def test_etag_matches_exact_and_lists():
+    assert etag_matches(ETAG, ETAG)
+    assert etag_matches(f'"other", {ETAG}', ETAG)
+    assert etag_matches(f'"other",{ETAG} ', ETAG)
+    assert not etag_matches('"other"', ETAG)
+
+
+def test_etag_matches_weak_comparison_and_wildcard():
+    assert etag_matches(f'W/{ETAG}', ETAG)
+    assert etag_matches('*', ETAG)
+
+
+def test_etag_matches_empty_or_unquoted():
+    assert not etag_matches('', ETAG)
+    assert not etag_matches(None, ETAG)
+    assert not etag_matches('3f2a9c', ETAG)
+
+
+def test_encoded_representations_do_not_match_identity():
+    gzip_etag = f'{ETAG[:-1]}-gzip"'
+    assert not etag_matches(ETAG, gzip_etag)
+    assert etag_matches(gzip_etag, gzip_etag)
+
+
+def test_etag_cache_rehashes_only_changed_files(tmp_path):
+    path = tmp_path / 'module.mjs'
+    path.write_text('export default 1;\n')
+    tags = ETagCache()
+
+    first = tags.get(str(path), os.stat(path))
+    assert first.startswith('"') and first.endswith('"')
+    assert tags.get(str(path), os.stat(path)) == first
+    assert tags.hashed == 1
+
+    path.write_text('export default 2;\n')
+    os.utime(path, ns=(os.stat(path).st_atime_ns, os.stat(path).st_mtime_ns + 1_000_000))
+    assert tags.get(str(path), os.stat(path)) != first
+    assert tags.hashed == 2
+
+
+@pytest.mark.parametrize('header, expected', [
+    ('bytes=0-99', (0, 99)),
+    ('bytes=100-', (100, 999)),
+    ('bytes=-100', (900, 999)),
+    ('bytes=-5000', (0, 999)),       # Suffix longer than the file: whole file
+    ('bytes=900-5000', (900, 999)),  # Last byte clamped to the end
+    ('Bytes = 10-19', (10, 19)),
+    ('bytes=999-999', (999, 999)),
+])
+def test_parse_range_satisfiable(header, expected):
+    assert parse_range(header, 1000) == expected
+
+
+@pytest.mark.parametrize('header', [
+    None, '', 'items=0-9', 'bytes=0-9,20-29', 'bytes=', 'bytes=-', 'bytes=a-9', 'bytes=0-b',
+    'bytes=9-0', 'bytes=1-2-3', 'bytes=+1-5',
+])
+def test_parse_range_ignored_serves_whole_file(header):
+    assert parse_range(header, 1000) is None
+
+
+@pytest.mark.parametrize('header, size', [
+    ('bytes=1000-', 1000),
+    ('bytes=5000-6000', 1000),
+    ('bytes=-0', 1000),
+    ('bytes=-10', 0),
+    ('bytes=0-', 0),
+])
+def test_parse_range_unsatisfiable(header, size):
+    with pytest.raises(ValueError):
+        parse_range(header, size)
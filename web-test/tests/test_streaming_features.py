@@ -0,0 +1,78 @@
+"""
+StreamingFeatures fed a response in arbitrary deltas must report exactly what
+a batch analysis of the text received so far reports - partials included.
+"""
+import random
+
+import pytest
+
+import evaluate_api
+import weave_evaluator_fixed
+from scoring_engine import ScoringEngine, TextFeatures
+
+VOCABULARY = (
+    "Kilmar Abrego Garcia [18] [41]-[48] 2,000 95% $3,000 million \"we had no record\" guess what "
+    "here's the kicker let me check oh wait classic huh bullshit however on the other hand some "
+    "SOME somewhat studies show it depends In in Texas 2019 12/03/2020 ? ! . people cases"
+).split(' ')
+SEPARATORS = [' ', ' ', '  ', '\n', '. ', '? ', ', ', '', '-', '"', '**']
+
+ENGINES = {
+    "evaluate_api": evaluate_api.ENGINE,
+    "weave_evaluator_fixed": weave_evaluator_fixed.ENGINE,  # Has substring lexicons
+}
+
+
+def batch(engine: ScoringEngine, text: str):
+    features = TextFeatures(engine, text)
+    return features.lexicon_hits, {name: features.findall(name) for name in engine.patterns}
+
+
+def feed_randomly(engine: ScoringEngine, text: str, rng: random.Random, names: list = None):
+    stream = engine.stream(names)
+    position = 0
+    while position < len(text):
+        step = rng.choice([1, 1, 2, 3, 5, 8, 20])
+        yield stream, stream.feed(text[position:position + step])
+        position += step
+
+
+@pytest.mark.parametrize('engine_name', ENGINES)
+@pytest.mark.parametrize('seed', range(40))
+def test_stream_matches_batch_analysis(engine_name, seed):
+    engine = ENGINES[engine_name]
+    rng = random.Random(seed)
+    text = ''.join(rng.choice(VOCABULARY) + rng.choice(SEPARATORS) for _ in range(rng.randint(1, 120)))
+
+    stream = None
+    for stream, partial in feed_randomly(engine, text, rng):
+        lexicon_hits, matches = batch(engine, stream.text)
+        assert partial.lexicon_hits == lexicon_hits, stream.text
+        assert {name: partial.findall(name) for name in matches} == matches, stream.text
+
+    final = stream.finish()
+    lexicon_hits, matches = batch(engine, text)
+    assert final.lexicon_hits == lexicon_hits
+    assert {name: final.findall(name) for name in matches} == matches
+    assert engine.analyze(text) is final  # finish() primes the cache
+
+
+def test_term_split_across_deltas():
+    engine = ScoringEngine({'phrases': ['on the other hand']}, {'citations': r'\[(\d+)\]'})
+    stream = engine.stream()
+    for delta in ('On the oth', 'er ha', 'nd [4', '2] and on the other', ' handle'):
+        features = stream.feed(delta)
+    assert features.count('phrases') == 1  # "other handle" is not a word-boundary match
+    assert features.findall('citations') == ['42']
+
+
+def test_subset_stream_leaves_other_features_lazy():
+    engine = evaluate_api.ENGINE
+    names = engine.resolve(['citations'])
+    stream = engine.stream(names)
+    features = stream.feed('Cited [7], guess what - 42% agree.')
+    assert features._lexicon_hits is None
+    assert set(features._matches) == {'citations'}
+    # Untracked features are still computed on demand from the full text
+    assert features.findall('citations') == ['7']
+    assert features.lexicon_hits == TextFeatures(engine, stream.text).lexicon_hits
@@ -0,0 +1,126 @@
+import threading
+
+from weave_tracing import TraceUploader
+
+
+class StubSink:
+    """Records every batch; optionally holds the worker until released"""
+
+    def __init__(self, hold: bool = False, fail: bool = False):
+        self.batches = []
+        self.fail = fail
+        self.entered = threading.Event()
+        self.release = threading.Event()
+        if not hold:
+            self.release.set()
+
+    def __call__(self, batch: list):
+        self.entered.set()
+        self.release.wait(5)
+        if self.fail:
+            raise RuntimeError("upload refused")
+        self.batches.append(list(batch))
+
+    @property
+    def payloads(self) -> list:
+        return [payload for batch in self.batches for payload in batch]
+
+
+def test_submit_flushes_in_batches():
+    sink = StubSink()
+    uploader = TraceUploader(sink, max_queue=100, batch_size=4, flush_interval=0.05)
+    for i in range(10):
+        assert uploader.submit({"i": i})
+    uploader.start()
+    uploader.stop()
+
+    assert sink.payloads == [{"i": i} for i in range(10)]
+    assert all(len(batch) <= 4 for batch in sink.batches)
+    stats = uploader.stats()
+    assert stats["submitted"] == stats["flushed"] == 10
+    assert stats["batches"] == len(sink.batches)
+    assert stats["dropped"] == 0 and stats["queued"] == 0
+
+
+def test_full_queue_drops_without_blocking():
+    sink = StubSink(hold=True)
+    uploader = TraceUploader(sink, max_queue=2, batch_size=1, flush_interval=0.05)
+    uploader.start()
+    uploader.submit({"i": 0})
+    assert sink.entered.wait(5)  # Worker is stuck uploading payload 0
+
+    accepted = [uploader.submit({"i": i}) for i in range(1, 5)]
+    assert accepted == [True, True, False, False]
+    assert uploader.stats()["dropped"] == 2
+    assert uploader.stats()["backpressure_waits"] == 0
+
+    sink.release.set()
+    uploader.stop()
+    assert sink.payloads == [{"i": 0}, {"i": 1}, {"i": 2}]
+
+
+def test_backpressure_waits_for_room():
+    sink = StubSink(hold=True)
+    uploader = TraceUploader(sink, max_queue=1, batch_size=1, flush_interval=0.05, block_timeout=2.0)
+    uploader.start()
+    uploader.submit({"i": 0})
+    assert sink.entered.wait(5)
+    assert uploader.submit({"i": 1})  # Fills the queue
+
+    # The next submit waits until the worker frees a slot instead of dropping
+    threading.Timer(0.1, sink.release.set).start()
+    assert uploader.submit({"i": 2})
+    uploader.stop()
+
+    stats = uploader.stats()
+    assert stats["backpressure_waits"] == 1
+    assert stats["dropped"] == 0
+    assert sink.payloads == [{"i": 0}, {"i": 1}, {"i": 2}]
+
+
+def test_backpressure_timeout_drops():
+    sink = StubSink(hold=True)
+    uploader = TraceUploader(sink, max_queue=1, batch_size=1, flush_interval=0.05, block_timeout=0.05)
+    uploader.start()
+    uploader.submit({"i": 0})
+    assert sink.entered.wait(5)
+    uploader.submit({"i": 1})
+
+    assert not uploader.submit({"i": 2})
+    stats = uploader.stats()
+    assert stats["backpressure_waits"] == 1
+    assert stats["dropped"] == 1
+
+    sink.release.set()
+    uploader.stop()
+
+
+def test_stop_flushes_queued_payloads():
+    sink = StubSink()
+    uploader = TraceUploader(sink, max_queue=100, batch_size=50, flush_interval=10.0)
+    uploader.start()
+    for i in range(3):
+        uploader.submit({"i": i})
+    uploader.stop()
+
+    assert sink.payloads == [{"i": i} for i in range(3)]
+    assert uploader.stats()["queued"] == 0
+
+
+def test_sink_failure_is_counted_and_worker_keeps_going():
+    sink = StubSink(fail=True)
+    uploader = TraceUploader(sink, max_queue=10, batch_size=2, flush_interval=0.05)
+    for i in range(4):
+        uploader.submit({"i": i})
+    uploader.start()
+    uploader.stop()
+
+    stats = uploader.stats()
+    assert stats["failed"] == 4
+    assert stats["flushed"] == 0
+    assert stats["batches"] == 2
+
+
+def test_from_env_is_off_by_default(monkeypatch):
+    monkeypatch.delenv('WEAVE_ASYNC_TRACES', raising=False)
+    assert TraceUploader.from_env(StubSink()) is None
@@ -1,23 +1,52 @@
 """
 Minimal Robust W&B Weave Evaluator for Context-Aware AI
 Following RAG tutorial pattern: https://weave-docs.wandb.ai/guides/integrations/rag/
+WEAVE_INIT=background starts serving before Weave is imported and initialized
+POST {"metrics": ["context", ...]} runs only those scorers
 """
+import time
+IMPORT_STARTED = time.perf_counter()
+
 import os
-import re
-import json
-import weave
-from weave import Model, Evaluation
-import asyncio
-from http.server import HTTPServer, BaseHTTPRequestHandler
+import functools
+from scoring_engine import ScoringEngine
+from scorer_registry import ScorerRegistry
+from evaluator_http import AsyncHandler, RequestError, json_response, parse_object, run_async_server
+from metrics import METRICS_PATH, phase
+from weave_tracing import WEAVE, get_weave, op, start_weave, traced
 
 # Set WANDB API key before initialization
 os.environ['WANDB_API_KEY'] = os.getenv('WANDB_API_KEY', 'f684e7f2a945f3b12d1d57352893e0e48d681bd9')
 
-# Initialize Weave - tracks all @weave.op() decorated functions
-weave.init('shrinked-ai/craig-evaluation')
+# Initialize Weave - tracks all @op() decorated functions (see WEAVE_INIT for when)
+start_weave('shrinked-ai/craig-evaluation')
+
+VAGUE_PATTERNS = ['some', 'many', 'often', 'generally', 'it depends']
+AUTHENTIC_WORDS = ['fuck', 'shit', 'damn', 'clusterfuck', 'bullshit', 'ridiculous', 'absurd']
+CORPORATE_WORDS = ['balanced', 'nuanced', 'complex issue', 'however']
+
+# Lexicons resolve in one token pass shared by all scorers
+ENGINE = ScoringEngine(
+    lexicons={
+        'vague': VAGUE_PATTERNS,
+        'authentic': AUTHENTIC_WORDS,
+        'corporate': CORPORATE_WORDS,
+    },
+    patterns={
+        'citations': r'\[(\d+)\]',
+        'names': r'\b[A-Z][a-z]+ [A-Z][a-z]+\b',
+        'dates': r'\b\d{4}\b',
+        'statistics': r'\b\d+(?:\.\d+)?(?:\s?%|,\d+)\b',
+        'numbers': r'\b\d+(?:,\d+)*\b',
+    }
+)
+
+# Every metric with the features it reads; requests may ask for a subset
+REGISTRY = ScorerRegistry(ENGINE)
 
 # Scoring functions - each takes 'output' + dataset keys
-@weave.op()
+@REGISTRY.metric('context', 'context_score', needs=('citations', 'names', 'dates'))
+@op()
 async def context_utilization_score(question: str, output: dict) -> dict:
     """Scores context integration: citations, names, dates"""
     text = output.get('response', '')
@@ -26,10 +55,11 @@ async def context_utilization_score(question: str, output: dict) -> dict:
     if not has_context:
         return {"context_score": 0}
 
+    features = ENGINE.analyze(text)
     score = 0
-    citations = len(re.findall(r'\[(\d+)\]', text))
-    names = len(re.findall(r'\b[A-Z][a-z]+ [A-Z][a-z]+\b', text))
-    dates = len(re.findall(r'\b\d{4}\b', text))
+    citations = len(features.findall('citations'))
+    names = len(features.findall('names'))
+    dates = len(features.findall('dates'))
 
     score += min(citations * 10, 50)
     score += min(names * 5, 25)
@@ -37,73 +67,76 @@ async def context_utilization_score(question: str, output: dict) -> dict:
 
     return {"context_score": min(score, 100)}
 
-@weave.op()
+@REGISTRY.metric('evidence', 'evidence_score', needs=('citations', 'statistics'))
+@op()
 async def evidence_density_score(question: str, output: dict) -> dict:
     """Counts citations and statistics"""
-    text = output.get('response', '')
-    citations = len(re.findall(r'\[(\d+)\]', text))
-    statistics = len(re.findall(r'\b\d+(?:\.\d+)?(?:\s?%|,\d+)\b', text))
+    features = ENGINE.analyze(output.get('response', ''))
+    citations = len(features.findall('citations'))
+    statistics = len(features.findall('statistics'))
 
     score = min(citations * 10 + statistics * 5, 100)
     return {"evidence_score": score}
 
-@weave.op()
+@REGISTRY.metric('specificity', 'specificity_score', needs=('vague', 'numbers'))
+@op()
 async def specificity_score(question: str, output: dict) -> dict:
     """Measures concrete details vs vague language"""
-    text = output.get('response', '')
+    features = ENGINE.analyze(output.get('response', ''))
 
-    vague_patterns = ['some', 'many', 'often', 'generally', 'it depends']
-    vague_count = sum(len(re.findall(r'\b' + word + r'\b', text, re.I)) for word in vague_patterns)
+    vague_count = features.count('vague')
 
-    specific_count = len(re.findall(r'\b\d+(?:,\d+)*\b', text))
+    specific_count = len(features.findall('numbers'))
 
     score = 50 + (specific_count * 5) - (vague_count * 8)
     return {"specificity_score": max(0, min(score, 100))}
 
-@weave.op()
+@REGISTRY.metric('authenticity', 'authenticity_score', needs=('authentic', 'corporate'))
+@op()
 async def authenticity_score(question: str, output: dict) -> dict:
     """Measures raw voice vs corporate speak"""
-    text = output.get('response', '')
-
-    authentic_words = ['fuck', 'shit', 'damn', 'clusterfuck', 'bullshit', 'ridiculous', 'absurd']
-    authentic_count = sum(len(re.findall(r'\b' + word + r'\b', text, re.I)) for word in authentic_words)
+    features = ENGINE.analyze(output.get('response', ''))
 
-    corporate_words = ['balanced', 'nuanced', 'complex issue', 'however']
-    corporate_count = sum(len(re.findall(r'\b' + word + r'\b', text, re.I)) for word in corporate_words)
+    authentic_count = features.count('authentic')
+    corporate_count = features.count('corporate')
 
     score = (authentic_count * 15) - (corporate_count * 10)
     return {"authenticity_score": max(0, min(score, 100))}
 
-# Model class - wraps response for evaluation
-class ResponseModel(Model):
-    """Model that wraps AI responses for Weave evaluation"""
-
-    @weave.op()
-    async def predict(self, question: str) -> dict:
-        """Predict is called by Evaluation - returns output dict"""
-        # In real use, this would call OpenAI/Craig
-        # Here we just pass through since we already have the response
-        return {"response": "", "has_context": False}
-
-# HTTP Server for API calls
-class WeaveEvaluationHandler(BaseHTTPRequestHandler):
-    def do_OPTIONS(self):
-        self.send_response(200)
-        self.send_header('Access-Control-Allow-Origin', '*')
-        self.send_header('Access-Control-Allow-Methods', 'POST, OPTIONS')
-        self.send_header('Access-Control-Allow-Headers', 'Content-Type')
-        self.end_headers()
-
-    def do_POST(self):
+# Model class - wraps response for evaluation (defined once Weave is loaded)
+@functools.cache
+def response_model_class():
+    weave = get_weave()
+
+    class ResponseModel(weave.Model):
+        """Model that wraps AI responses for Weave evaluation"""
+
+        @weave.op()
+        async def predict(self, question: str) -> dict:
+            """Predict is called by Evaluation - returns output dict"""
+            # In real use, this would call OpenAI/Craig
+            # Here we just pass through since we already have the response
+            return {"response": "", "has_context": False}
+
+    return ResponseModel
+
+# Module import to ready-to-serve (Weave included when eager)
+COLD_START_MS = round((time.perf_counter() - IMPORT_STARTED) * 1000, 1)
+
+# HTTP Server for API calls - all requests share one event loop
+class WeaveEvaluationHandler(AsyncHandler):
+    async def do_POST(self, request):
         try:
-            content_length = int(self.headers['Content-Length'])
-            body = self.rfile.read(content_length)
-            data = json.loads(body.decode('utf-8'))
+            data = parse_object(request.body)
 
             question = data.get('question', '')
             response_text = data.get('response', '')
             model_name = data.get('model', 'unknown')
             has_context = data.get('has_context', False)
+            try:
+                metrics = REGISTRY.select(data.get('metrics'))
+            except ValueError as e:
+                return json_response({"error": str(e)}, 400)
 
             # Create dataset with single example
             dataset = [{
@@ -113,7 +146,7 @@ class WeaveEvaluationHandler(BaseHTTPRequestHandler):
             }]
 
             # Create model instance
-            model = ResponseModel()
+            model = response_model_class()()
 
             # Override predict to return our data
             async def mock_predict(question: str) -> dict:
@@ -121,46 +154,27 @@ class WeaveEvaluationHandler(BaseHTTPRequestHandler):
 
             model.predict = mock_predict
 
-            # Create evaluation with all scorers
-            evaluation = Evaluation(
+            # Create evaluation with the requested scorers
+            evaluation = get_weave().Evaluation(
                 dataset=dataset,
-                scorers=[
-                    context_utilization_score,
-                    evidence_density_score,
-                    specificity_score,
-                    authenticity_score
-                ]
+                scorers=[traced(REGISTRY[name].fn) for name in metrics]
             )
 
-            # Run evaluation
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            result = loop.run_until_complete(evaluation.evaluate(model))
-            loop.close()
+            # Run evaluation on the server's event loop
+            with phase('weave_log'):
+                result = await evaluation.evaluate(model)
 
             # Extract scores from result
             scores = {}
             if hasattr(result, 'model_latency'):
                 # Result structure varies, try to extract scores
                 # For now, recalculate manually (Weave logs to dashboard)
-                loop2 = asyncio.new_event_loop()
-                asyncio.set_event_loop(loop2)
-
                 output = {"response": response_text, "has_context": has_context}
 
-                context_result = loop2.run_until_complete(context_utilization_score(question, output))
-                evidence_result = loop2.run_until_complete(evidence_density_score(question, output))
-                specificity_result = loop2.run_until_complete(specificity_score(question, output))
-                authenticity_result = loop2.run_until_complete(authenticity_score(question, output))
-
-                scores = {
-                    "context": context_result.get("context_score", 0),
-                    "evidence": evidence_result.get("evidence_score", 0),
-                    "specificity": specificity_result.get("specificity_score", 0),
-                    "authenticity": authenticity_result.get("authenticity_score", 0)
-                }
-
-                loop2.close()
+                # Traced calls: scorer bodies time as 'score', the rest as Weave overhead
+                with phase('weave_log'):
+                    for name in metrics:
+                        scores[name] = REGISTRY.score(name, await REGISTRY[name].fn(question, output))
 
             overall = sum(scores.values()) / len(scores) if scores else 0
 
@@ -172,40 +186,32 @@ class WeaveEvaluationHandler(BaseHTTPRequestHandler):
                 "weave_url": "https://wandb.ai/shrinked-ai/craig-evaluation"
             }
 
-            self.send_response(200)
-            self.send_header('Content-Type', 'application/json')
-            self.send_header('Access-Control-Allow-Origin', '*')
-            self.end_headers()
-
-            self.wfile.write(json.dumps(response_data).encode('utf-8'))
-
             print(f"✓ Evaluated {model_name}: {overall:.1f}/100")
 
+            return json_response(response_data)
+
+        except RequestError as e:
+            return json_response({"error": str(e)}, e.status)
         except Exception as e:
             print(f"✗ Error: {e}")
             import traceback
             traceback.print_exc()
 
-            self.send_response(500)
-            self.send_header('Content-Type', 'application/json')
-            self.send_header('Access-Control-Allow-Origin', '*')
-            self.end_headers()
-
             error_response = {"error": str(e), "message": "Evaluation failed"}
-            self.wfile.write(json.dumps(error_response).encode('utf-8'))
+            return json_response(error_response, 500)
 
 def run_server(port=8080):
-    server_address = ('', port)
-    httpd = HTTPServer(server_address, WeaveEvaluationHandler)
     print(f'')
     print(f'🔥 W&B Weave Evaluation API')
     print(f'')
     print(f'   Port: http://localhost:{port}')
     print(f'   Dashboard: https://wandb.ai/shrinked-ai/craig-evaluation')
     print(f'')
-    print(f'   Scorers: Context, Evidence, Specificity, Authenticity')
+    print(f'   Scorers: {", ".join(name.capitalize() for name in REGISTRY.names)} (pick with "metrics")')
+    print(f'   Metrics: GET {METRICS_PATH} (Prometheus)')
+    print(f'   Ready in {COLD_START_MS:.0f} ms (Weave init: {WEAVE.mode})')
     print(f'')
-    httpd.serve_forever()
+    run_async_server(WeaveEvaluationHandler(), port)
 
 if __name__ == '__main__':
     # Set environment variable to limit parallel workers (avoid rate limits)
@@ -1,24 +1,83 @@
 """
 W&B Weave Evaluator - Following Official Documentation Pattern
 Reference: https://weave-docs.wandb.ai/guides/core-types/evaluations/
+WEAVE_INIT=background starts serving before Weave is imported and initialized
+"metrics": ["context", ...] scores a subset (POST body, ?metrics= on batches, stream messages)
 """
+import time
+IMPORT_STARTED = time.perf_counter()
+
 import os
-import re
-import json
-import weave
-from weave import Model, Evaluation
 import asyncio
-from http.server import HTTPServer, BaseHTTPRequestHandler
+import functools
+from urllib.parse import parse_qs, urlparse
+from scoring_engine import ScoreCollector, ScoringEngine
+from scorer_registry import ScorerRegistry
+from score_cache import ScoreCache
+from score_executor import ScoreExecutor
+from score_history import ScoreHistory
+from weave_tracing import WEAVE, get_weave, op, start_weave, traced, untraced
+from metrics import METRICS_PATH, phase
+from evaluator_http import BATCH_CHUNK, BATCH_PATH, CACHE_STATS_PATH, EXECUTOR_STATS_PATH, HISTORY_PATH, SCORERS_PATH, STREAM_PATH, WEAVE_STATUS_PATH, AsyncHandler, RequestError, batch_response, json_response, parse_object, read_examples, run_async_server
 
 # Set API key before init
 os.environ['WANDB_API_KEY'] = os.getenv('WANDB_API_KEY', 'f684e7f2a945f3b12d1d57352893e0e48d681bd9')
 os.environ['WEAVE_PARALLELISM'] = '3'
 
-# Initialize Weave
-weave.init('shrinked-ai/craig-evaluation')
+# Initialize Weave (now, on the first traced call, or in the background - see WEAVE_INIT)
+start_weave('shrinked-ai/craig-evaluation')
+
+VAGUE_WORDS = ['some', 'many', 'often', 'generally', 'it depends', 'multiple perspectives']
+
+# Authentic voice patterns (profanity + conversational markers)
+AUTHENTIC_PROFANITY = ['fuck', 'shit', 'damn', 'clusterfuck', 'bullshit']
+AUTHENTIC_CONVERSATIONAL = ['huh', 'guess what', "here's the kicker", "let me check", "oh wait", "classic", "genius"]
+
+CORPORATE_WORDS = ['balanced', 'nuanced', 'complex issue', 'however', 'on the other hand', 'multiple perspectives']
+
+# Word lexicons resolve in one token pass; each regex runs at most once per response
+ENGINE = ScoringEngine(
+    lexicons={
+        'vague': VAGUE_WORDS,
+        'profanity': AUTHENTIC_PROFANITY,
+        'corporate': CORPORATE_WORDS,
+    },
+    # Conversational markers match anywhere, not only on word boundaries
+    substrings={
+        'conversational': AUTHENTIC_CONVERSATIONAL,
+    },
+    patterns={
+        'citations': r'\[+(\d+)\]+',
+        'names': r'\b[A-Z][a-z]+ [A-Z][a-z]+\b',
+        'dates': r'\b\d{4}\b',
+        'statistics': r'\b\d+(?:\.\d+)?(?:\s?%|,\d+)\b',
+        'numbers': r'\b\d+(?:,\d+)*\b',
+        'rhetorical': r'\?\s*(?:[A-Z]|And|So)',
+        'bold': r'\*\*[^*]+\*\*',
+    }
+)
+
+# Scores logged by each Evaluation run, read back per dataset row
+COLLECTOR = ScoreCollector()
+
+# Every metric with the features it reads; requests may ask for a subset
+REGISTRY = ScorerRegistry(ENGINE)
+
+# Bump whenever a lexicon, regex or weight changes - invalidates cached scores
+SCORER_VERSION = 'weave-fixed/1'
+CACHE = ScoreCache.from_env()
+
+# Responses over SCORE_EXECUTOR_THRESHOLD are analyzed off the event loop (SCORE_EXECUTOR=thread|process)
+EXECUTOR = ScoreExecutor.from_env(ENGINE)
+
+# SCORE_HISTORY_PATH=scores.db: every served result is kept for local leaderboards
+HISTORY = ScoreHistory.from_env()
 
 # Scoring functions - MUST have 'output' keyword argument per docs
-@weave.op()
+# @op() is @weave.op() that can run untraced (streaming partial scores)
+@REGISTRY.metric('context', 'context_score', needs=('citations', 'names', 'dates'))
+@op()
+@COLLECTOR.scorer('context', 'context_score')
 async def context_utilization_scorer(question: str, output: dict) -> dict:
     """Score context integration based on citations, names, dates"""
     response_text = output.get('answer', '')
@@ -35,16 +94,18 @@ async def context_utilization_scorer(question: str, output: dict) -> dict:
             }
         }
 
+    features = ENGINE.analyze(response_text)
+
     # Citations like [18], [[38]], [41]-[48]
-    citations = re.findall(r'\[+(\d+)\]+', response_text)
+    citations = features.findall('citations')
     citations_score = min(len(citations) * 10, 50)
 
     # Proper names
-    names = re.findall(r'\b[A-Z][a-z]+ [A-Z][a-z]+\b', response_text)
+    names = features.findall('names')
     names_score = min(len(names) * 5, 25)
 
     # Dates/years
-    dates = re.findall(r'\b\d{4}\b', response_text)
+    dates = features.findall('dates')
     dates_score = min(len(dates) * 3, 15)
 
     total_score = citations_score + names_score + dates_score
@@ -65,13 +126,15 @@ async def context_utilization_scorer(question: str, output: dict) -> dict:
         }
     }
 
-@weave.op()
+@REGISTRY.metric('evidence', 'evidence_score', needs=('citations', 'statistics'))
+@op()
+@COLLECTOR.scorer('evidence', 'evidence_score')
 async def evidence_density_scorer(question: str, output: dict) -> dict:
     """Count citations and statistics"""
-    response_text = output.get('answer', '')
+    features = ENGINE.analyze(output.get('answer', ''))
 
-    citations = re.findall(r'\[+(\d+)\]+', response_text)
-    statistics = re.findall(r'\b\d+(?:\.\d+)?(?:\s?%|,\d+)\b', response_text)
+    citations = features.findall('citations')
+    statistics = features.findall('statistics')
 
     score = min(len(citations) * 10 + len(statistics) * 5, 100)
 
@@ -87,53 +150,48 @@ async def evidence_density_scorer(question: str, output: dict) -> dict:
         }
     }
 
-@weave.op()
+@REGISTRY.metric('specificity', 'specificity_score', needs=('vague', 'numbers'))
+@op()
+@COLLECTOR.scorer('specificity', 'specificity_score')
 async def specificity_scorer(question: str, output: dict) -> dict:
     """Measure concrete details vs vague language"""
-    response_text = output.get('answer', '')
+    features = ENGINE.analyze(output.get('answer', ''))
 
-    vague_words = ['some', 'many', 'often', 'generally', 'it depends', 'multiple perspectives']
-    vague_matches = []
-    for word in vague_words:
-        matches = re.findall(r'\b' + word + r'\b', response_text, re.I)
-        vague_matches.extend(matches)
+    vague_count = features.count('vague')
 
-    specific_numbers = re.findall(r'\b\d+(?:,\d+)*\b', response_text)
+    specific_numbers = features.findall('numbers')
 
-    score = 50 + (len(specific_numbers) * 5) - (len(vague_matches) * 8)
+    score = 50 + (len(specific_numbers) * 5) - (vague_count * 8)
 
     return {
         "specificity_score": max(0, min(score, 100)),
         "details": {
-            "vague_terms_count": len(vague_matches),
+            "vague_terms_count": vague_count,
             "specific_numbers_count": len(specific_numbers),
             "specific_numbers_sample": specific_numbers[:5],
-            "penalty_from_vague": len(vague_matches) * 8,
+            "penalty_from_vague": vague_count * 8,
             "bonus_from_specific": len(specific_numbers) * 5
         }
     }
 
-@weave.op()
+@REGISTRY.metric('authenticity', 'authenticity_score', needs=('profanity', 'conversational', 'rhetorical', 'bold', 'corporate'))
+@op()
+@COLLECTOR.scorer('authenticity', 'authenticity_score')
 async def authenticity_scorer(question: str, output: dict) -> dict:
     """Measure authentic voice vs corporate speak"""
-    response_text = output.get('answer', '')
+    features = ENGINE.analyze(output.get('answer', ''))
 
-    # Authentic voice patterns (profanity + conversational markers)
-    authentic_profanity = ['fuck', 'shit', 'damn', 'clusterfuck', 'bullshit']
-    authentic_conversational = ['huh', 'guess what', "here's the kicker", "let me check", "oh wait", "classic", "genius"]
-
-    profanity_count = sum(len(re.findall(r'\b' + word + r'\b', response_text, re.I)) for word in authentic_profanity)
-    conversational_count = sum(len(re.findall(re.escape(phrase), response_text, re.I)) for phrase in authentic_conversational)
+    profanity_count = features.count('profanity')
+    conversational_count = features.count('conversational')
 
     # Direct rhetorical questions
-    rhetorical_questions = len(re.findall(r'\?\s*(?:[A-Z]|And|So)', response_text))
+    rhetorical_questions = len(features.findall('rhetorical'))
 
     # Bold text (shows emphasis)
-    bold_text = len(re.findall(r'\*\*[^*]+\*\*', response_text))
+    bold_text = len(features.findall('bold'))
 
     # Corporate neutrality (penalty)
-    corporate_words = ['balanced', 'nuanced', 'complex issue', 'however', 'on the other hand', 'multiple perspectives']
-    corporate_count = sum(len(re.findall(r'\b' + word + r'\b', response_text, re.I)) for word in corporate_words)
+    corporate_count = features.count('corporate')
 
     # Scoring: profanity × 20, conversational × 10, rhetorical × 5, bold × 3, corporate penalty × -15
     score = (profanity_count * 20) + (conversational_count * 10) + (rhetorical_questions * 5) + (bold_text * 3) - (corporate_count * 15)
@@ -146,7 +204,7 @@ async def authenticity_scorer(question: str, output: dict) -> dict:
             "rhetorical_questions": rhetorical_questions,
             "bold_text_count": bold_text,
             "corporate_count": corporate_count,
-            "conversational_samples": [phrase for phrase in authentic_conversational if re.search(re.escape(phrase), response_text, re.I)],
+            "conversational_samples": [phrase for phrase in AUTHENTIC_CONVERSATIONAL if features.lexicon_hits['conversational'].get(phrase)],
             "breakdown": {
                 "from_profanity": profanity_count * 20,
                 "from_conversational": conversational_count * 10,
@@ -157,169 +215,253 @@ async def authenticity_scorer(question: str, output: dict) -> dict:
         }
     }
 
-# Model class per docs
-class AIResponseModel(Model):
-    """Model wrapper for evaluation - stores response data"""
-    response_text: str
-    has_context: bool
-    model_name: str = "unknown"
-    word_count: int = 0
-    char_count: int = 0
-
-    @weave.op()
-    async def predict(self, question: str) -> dict:
-        """
-        Predict method called by Evaluation.
-        Returns output dict that scorers receive as 'output' parameter.
-        """
-        return {
-            "answer": self.response_text,
-            "has_context": self.has_context,
-            "model_type": self.model_name,
-            "metadata": {
-                "word_count": self.word_count,
-                "char_count": self.char_count,
-                "question_length": len(question)
-            }
-        }
-
-# HTTP Server
-class WeaveHandler(BaseHTTPRequestHandler):
-    def log_message(self, format, *args):
-        pass  # Suppress default logging
-
-    def do_OPTIONS(self):
-        self.send_response(200)
-        self.send_header('Access-Control-Allow-Origin', '*')
-        self.send_header('Access-Control-Allow-Methods', 'POST, OPTIONS')
-        self.send_header('Access-Control-Allow-Headers', 'Content-Type')
-        self.end_headers()
-
-    def do_POST(self):
-        try:
-            content_length = int(self.headers['Content-Length'])
-            body = self.rfile.read(content_length)
-            data = json.loads(body.decode('utf-8'))
-
-            question = data.get('question', '')
-            response_text = data.get('response', '')
-            model_name = data.get('model', 'unknown')
-            has_context = data.get('has_context', False)
-
-            # Create dataset with single example (matches predict signature)
-            dataset = [{
-                "question": question,
+# Model class per docs (defined once Weave is loaded)
+@functools.cache
+def response_model_class():
+    weave = get_weave()
+
+    class AIResponseModel(weave.Model):
+        """Model wrapper for evaluation - responses come from the dataset rows"""
+
+        @weave.op()
+        async def predict(self, question: str, response_text: str, has_context: bool, model_name: str, row_id: str) -> dict:
+            """
+            Predict method called by Evaluation.
+            Returns output dict that scorers receive as 'output' parameter.
+            """
+            return {
+                "answer": response_text,
                 "has_context": has_context,
-                "response_text": response_text
-            }]
-
-            # Create model instance with response data
-            model = AIResponseModel(
-                response_text=response_text,
-                has_context=has_context
-            )
-
-            # Create evaluation - this will call model.predict() for each example
-            evaluation = Evaluation(
-                dataset=dataset,
-                scorers=[
-                    context_utilization_scorer,
-                    evidence_density_scorer,
-                    specificity_scorer,
-                    authenticity_scorer
-                ]
-            )
-
-            # Run evaluation (logs to Weave dashboard)
-            loop = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop)
-            result = loop.run_until_complete(evaluation.evaluate(model))
-            loop.close()
-
-            # Extract scores from evaluation result
-            scores = {
-                "context": 0,
-                "evidence": 0,
-                "specificity": 0,
-                "authenticity": 0
+                "model_type": model_name,
+                "row_id": row_id,
+                "metadata": {
+                    "word_count": len(response_text.split()),
+                    "char_count": len(response_text),
+                    "question_length": len(question)
+                }
             }
 
-            # Parse result to extract scores
-            # Evaluation returns EvaluationResults with rows
-            if hasattr(result, '__dict__'):
-                result_dict = result.__dict__
-                # Try to find scores in result
-                for key, value in result_dict.items():
-                    if 'context_score' in str(value):
-                        try:
-                            scores["context"] = int(re.search(r'context_score[\'"]:\s*(\d+)', str(value)).group(1))
-                        except:
-                            pass
-
-            # Fallback: recalculate scores for response
-            output = {"answer": response_text, "has_context": has_context}
-            loop2 = asyncio.new_event_loop()
-            asyncio.set_event_loop(loop2)
-
-            context_result = loop2.run_until_complete(context_utilization_scorer(question, output))
-            evidence_result = loop2.run_until_complete(evidence_density_scorer(question, output))
-            specificity_result = loop2.run_until_complete(specificity_scorer(question, output))
-            authenticity_result = loop2.run_until_complete(authenticity_scorer(question, output))
-
-            scores = {
-                "context": context_result.get("context_score", 0),
-                "evidence": evidence_result.get("evidence_score", 0),
-                "specificity": specificity_result.get("specificity_score", 0),
-                "authenticity": authenticity_result.get("authenticity_score", 0)
-            }
+    return AIResponseModel
+
+async def run_evaluation(examples: list, metrics: list = None) -> list:
+    """
+    Score a batch of {question, response, model, has_context} examples with a
+    single Weave Evaluation. Results are returned in input order.
+    """
+    metrics = REGISTRY.select(metrics)
+    row_ids = COLLECTOR.open(len(examples))
+    dataset = [{
+        "question": example.get('question', ''),
+        "has_context": example.get('has_context', False),
+        "response_text": example.get('response', ''),
+        "model_name": example.get('model', 'unknown'),
+        "row_id": row_id
+    } for example, row_id in zip(examples, row_ids)]
+
+    # Large responses are analyzed off the loop; the scorers read the pinned batch
+    prepared = await EXECUTOR.prepare([row["response_text"] for row in dataset], REGISTRY.needs(metrics))
+
+    # One evaluation for the whole batch - calls model.predict() for each row
+    evaluation = get_weave().Evaluation(dataset=dataset, scorers=[traced(REGISTRY[name].fn) for name in metrics])
+
+    try:
+        # Run evaluation (logs to Weave dashboard); scorers record into COLLECTOR
+        with phase('weave_log'), ENGINE.pin(prepared):
+            await evaluation.evaluate(response_model_class()())
+    finally:
+        collected = COLLECTOR.close(row_ids)
+
+    results = []
+    for row, row_scores in zip(dataset, collected):
+        scores = {metric: row_scores.get(metric, 0) for metric in metrics}
+        overall = sum(scores.values()) / len(scores) if scores else 0
+
+        results.append({
+            "model": row["model_name"],
+            "overall_score": round(overall, 2),
+            "metrics": scores,
+            "word_count": len(row["response_text"].split()),
+            "weave_url": "https://wandb.ai/shrinked-ai/craig-evaluation/weave"
+        })
+
+    return results
+
+async def evaluate_examples(examples: list, metrics: list = None) -> list:
+    """Cached front for run_evaluation - hits skip both scoring and Weave logging"""
+    metrics = REGISTRY.select(metrics)
+    evaluate = functools.partial(run_evaluation, metrics=metrics)
+    results = await CACHE.evaluate_cached(REGISTRY.version(SCORER_VERSION, metrics), examples, evaluate)
+    # overall_score of a subset averages only those metrics - not comparable on the leaderboard
+    if HISTORY and REGISTRY.is_complete(metrics):
+        with phase('history'):
+            await asyncio.to_thread(HISTORY.append_many, [(result["model"], result) for result in results])
+    return results
+
+async def evaluate_request(request, metrics: list):
+    """Results of a batch request, scored chunk by chunk while the body streams in"""
+    count = 0
+    async for examples in read_examples(request):
+        for result in await evaluate_examples(examples, metrics):
+            count += 1
+            yield result
+    print(f"✓ Batch of {count} evaluated")
+
+async def score_partial(features, has_context: bool, metrics: list) -> dict:
+    """Untraced scores for a response that is still streaming in"""
+    output = {"answer": features.text, "has_context": has_context}
+    # Pinned rather than primed: partials would otherwise churn the shared LRU
+    with untraced(), ENGINE.pin({features.text: features}):
+        scores = {metric: REGISTRY.score(metric, await REGISTRY[metric].fn('', output)) for metric in metrics}
 
-            loop2.close()
+    return {
+        "partial": True,
+        "overall_score": round(sum(scores.values()) / len(scores), 2),
+        "metrics": scores,
+        "word_count": len(features.text.split())
+    }
 
-            overall = sum(scores.values()) / len(scores) if scores else 0
+SCORE_LABELS = {'context': 'CTX', 'evidence': 'EVD', 'specificity': 'SPC', 'authenticity': 'AUT'}
 
-            response_data = {
-                "model": model_name,
-                "overall_score": round(overall, 2),
-                "metrics": scores,
-                "word_count": len(response_text.split()),
-                "weave_url": "https://wandb.ai/shrinked-ai/craig-evaluation/weave"
-            }
+def format_scores(scores: dict) -> str:
+    """CTX:92 EVD:85 ... for the metrics that were scored"""
+    return ' '.join(f"{SCORE_LABELS[name]}:{score}" for name, score in scores.items())
 
-            self.send_response(200)
-            self.send_header('Content-Type', 'application/json')
-            self.send_header('Access-Control-Allow-Origin', '*')
-            self.end_headers()
+# Module import to ready-to-serve (Weave included when eager)
+COLD_START_MS = round((time.perf_counter() - IMPORT_STARTED) * 1000, 1)
 
-            self.wfile.write(json.dumps(response_data).encode('utf-8'))
+# HTTP Server - all requests share one event loop
+class WeaveHandler(AsyncHandler):
+    websocket_paths = (STREAM_PATH,)
+    stream_paths = (BATCH_PATH,)
 
-            print(f"✓ [{model_name}] {overall:.1f}/100 | CTX:{scores['context']} EVD:{scores['evidence']} SPC:{scores['specificity']} AUT:{scores['authenticity']}")
+    def log_message(self, format, *args):
+        pass  # Suppress default logging
 
+    async def do_WEBSOCKET(self, request, websocket):
+        """
+        Streaming evaluation. Client sends JSON messages:
+          {"question", "model", "has_context"}  - any time before "done"
+          {"metrics": [...]}                    - before the first delta (default: all)
+          {"delta": "..."}                      - next piece of the response
+          {"done": true}                        - response complete
+        Each delta is answered with {"partial": true, ...scores so far}; "done"
+        with the final result (same as POST, logged to Weave) plus "final": true.
+        Only the unsettled tail of the text is rescanned per delta. A message
+        that is not a JSON object, or a non-string delta, gets {"error"} and
+        closes the socket (1008).
+        """
+        example = {}
+        stream = metrics = None
+
+        while (message := await websocket.receive()) is not None:
+            try:
+                data = parse_object(message)
+            except RequestError:
+                await websocket.send_json({"error": "Messages must be JSON objects"})
+                await websocket.close(1008)  # Policy violation
+                break
+            if not isinstance(data.get('delta', ''), str):
+                await websocket.send_json({"error": "delta must be a string"})
+                await websocket.close(1008)
+                break
+
+            for field in ('question', 'model', 'has_context'):
+                if field in data:
+                    example[field] = data[field]
+
+            if stream is None:
+                try:
+                    metrics = REGISTRY.select(data.get('metrics'))
+                except ValueError as e:
+                    await websocket.send_json({"error": str(e)})
+                    continue
+                if data.get('metrics') or data.get('delta') or data.get('done'):
+                    # Only the requested metrics' features are rescanned per delta
+                    stream = ENGINE.stream(REGISTRY.needs(metrics))
+
+            if data.get('delta'):
+                features = stream.feed(data['delta'])
+                await websocket.send_json(await score_partial(features, example.get('has_context', False), metrics))
+
+            if data.get('done'):
+                stream.finish()  # Final scorer pass reuses the streamed analysis
+                result = (await evaluate_examples([dict(example, response=stream.text)], metrics))[0]
+                await websocket.send_json(dict(result, final=True))
+                print(f"✓ [{result['model']}] streamed {result['overall_score']:.1f}/100 | {format_scores(result['metrics'])}")
+                break
+
+    async def do_GET(self, request):
+        path = urlparse(request.path).path.rstrip('/')
+        if path == CACHE_STATS_PATH:
+            return json_response(CACHE.stats())
+        if path == WEAVE_STATUS_PATH:
+            return json_response(dict(WEAVE.status(), cold_start_ms=COLD_START_MS))
+        if path == EXECUTOR_STATS_PATH:
+            return json_response(EXECUTOR.stats())
+        if path == SCORERS_PATH:
+            return json_response(REGISTRY.describe())
+        if path == HISTORY_PATH:
+            if not HISTORY:
+                return json_response({"error": "Score history is off (set SCORE_HISTORY_PATH)"}, 404)
+            try:
+                return json_response(await asyncio.to_thread(HISTORY.query, parse_qs(urlparse(request.path).query)))
+            except ValueError as e:
+                return json_response({"error": str(e)}, 400)
+        return json_response({"error": "Not found"}, 404)
+
+    async def do_POST(self, request):
+        try:
+            url = urlparse(request.path)
+            if url.path.rstrip('/') == BATCH_PATH:
+                # Batch mode: JSON array or NDJSON of examples (Accept: application/x-ndjson streams results back)
+                try:
+                    metrics = REGISTRY.select(parse_qs(url.query).get('metrics'))
+                except ValueError as e:
+                    return json_response({"error": str(e)}, 400)
+                return await batch_response(request, evaluate_request(request, metrics))
+            else:
+                data = parse_object(request.body)
+                try:
+                    metrics = REGISTRY.select(data.get('metrics'))
+                except ValueError as e:
+                    return json_response({"error": str(e)}, 400)
+                response_data = (await evaluate_examples([data], metrics))[0]
+                print(f"✓ [{response_data['model']}] {response_data['overall_score']:.1f}/100 | {format_scores(response_data['metrics'])}")
+
+            return json_response(response_data)
+
+        except RequestError as e:
+            print(f"✗ Bad request: {e}")
+            return json_response({"error": str(e)}, e.status)
         except Exception as e:
             print(f"✗ Error: {e}")
             import traceback
             traceback.print_exc()
 
-            self.send_response(500)
-            self.send_header('Content-Type', 'application/json')
-            self.send_header('Access-Control-Allow-Origin', '*')
-            self.end_headers()
-
             error_response = {"error": str(e), "message": "Evaluation failed"}
-            self.wfile.write(json.dumps(error_response).encode('utf-8'))
+            return json_response(error_response, 500)
 
 def run_server(port=8080):
-    server_address = ('', port)
-    httpd = HTTPServer(server_address, WeaveHandler)
     print('')
     print('🔥 W&B Weave Evaluation API')
     print('')
     print(f'   Port: http://localhost:{port}')
     print(f'   Dashboard: https://wandb.ai/shrinked-ai/craig-evaluation/weave')
     print('')
-    print('   Scorers: Context, Evidence, Specificity, Authenticity')
+    print(f'   Scorers: {", ".join(name.capitalize() for name in REGISTRY.names)} (pick with "metrics", GET {SCORERS_PATH})')
+    print(f'   Batch: POST {BATCH_PATH} (JSON array or NDJSON, streamed in chunks of {BATCH_CHUNK})')
+    print(f'   Stream: WebSocket {STREAM_PATH} (response deltas in, partial scores out)')
+    print(f'   Cache: GET {CACHE_STATS_PATH}' + (f' (persisted to {CACHE.path})' if CACHE.path else ''))
+    print(f'   Metrics: GET {METRICS_PATH} (Prometheus)')
+    print(f'   Ready in {COLD_START_MS:.0f} ms (Weave init: {WEAVE.mode}, GET {WEAVE_STATUS_PATH})')
+    if HISTORY:
+        print(f'   History: {HISTORY.path} (leaderboard on GET {HISTORY_PATH})')
+    if EXECUTOR.backend != 'inline':
+        EXECUTOR.start()
+        print(f'   Executor: responses over {EXECUTOR.threshold} chars on {EXECUTOR.workers} {EXECUTOR.backend} workers (GET {EXECUTOR_STATS_PATH})')
     print('   All evaluations logged to W&B dashboard')
     print('')
-    httpd.serve_forever()
+    run_async_server(WeaveHandler(), port)
 
 if __name__ == '__main__':
     run_server(8080)
@@ -0,0 +1,300 @@
+"""
+Weave tracing helpers shared by the evaluator services
+
+start_weave() - import + weave.init() now (WEAVE_INIT=eager, the default), on the
+                first traced call (lazy) or in a background thread (background),
+                so local scoring can be served before Weave is up
+op()          - drop-in for @weave.op() that can be bypassed with `with untraced():`;
+                the function body is timed as the request's 'score' phase
+TraceUploader - bounded queue + background worker that flushes trace payloads
+                to a sink in batches, keeping Weave network I/O off the request path
+"""
+import os
+import time
+import queue
+import atexit
+import inspect
+import functools
+import threading
+import contextlib
+import contextvars
+import multiprocessing
+from metrics import phase
+
+_untraced = contextvars.ContextVar('weave_untraced', default=False)
+
+INIT_MODES = ('eager', 'lazy', 'background')
+
+
+class WeaveLoader:
+    """Imports and initializes weave exactly once; get() blocks until it is ready"""
+
+    def __init__(self):
+        self.project = None
+        self.mode = None
+        self.state = 'not started'
+        self.import_ms = None
+        self.init_ms = None
+        self.error = None
+        self._module = None
+        self._lock = threading.Lock()
+
+    def start(self, project: str, mode: str = None):
+        self.project = project
+        self.mode = mode or os.getenv('WEAVE_INIT', 'eager')
+        if self.mode not in INIT_MODES:
+            raise ValueError(f"WEAVE_INIT must be one of {', '.join(INIT_MODES)}, got {self.mode!r}")
+        if multiprocessing.current_process().name != 'MainProcess':
+            # Scoring worker (score_executor) re-importing the service module - it never traces.
+            # spawn names the worker before that import; parent_process() is only set after it
+            self.mode = 'lazy'
+
+        if self.mode == 'eager':
+            self.get()
+        elif self.mode == 'background':
+            threading.Thread(target=self._load_quietly, name='weave-init', daemon=True).start()
+        else:
+            self.state = 'deferred'
+
+    def get(self):
+        """The weave module, imported and initialized (first caller pays)"""
+        if self._module is None:
+            with self._lock:
+                if self._module is None:
+                    self._load()
+        return self._module
+
+    def _load(self):
+        self.state = 'loading'
+        try:
+            started = time.perf_counter()
+            import weave
+            imported = time.perf_counter()
+            if self.project:
+                weave.init(self.project)
+            initialized = time.perf_counter()
+        except Exception as e:
+            self.state = 'failed'
+            self.error = str(e)
+            raise
+
+        self.import_ms = round((imported - started) * 1000, 1)
+        self.init_ms = round((initialized - imported) * 1000, 1)
+        self.state = 'ready'
+        self.error = None
+        self._module = weave
+
+    def _load_quietly(self):
+        try:
+            self.get()
+        except Exception as e:
+            print(f"✗ Weave init failed (traced calls will retry): {e}")
+
+    def status(self) -> dict:
+        return {
+            "project": self.project,
+            "mode": self.mode,
+            "state": self.state,
+            "import_ms": self.import_ms,
+            "init_ms": self.init_ms,
+            "error": self.error
+        }
+
+
+WEAVE = WeaveLoader()
+
+
+def start_weave(project: str, mode: str = None):
+    WEAVE.start(project, mode)
+
+
+def get_weave():
+    return WEAVE.get()
+
+
+@contextlib.contextmanager
+def untraced():
+    """Calls to op()-decorated functions inside this block skip Weave entirely"""
+    token = _untraced.set(True)
+    try:
+        yield
+    finally:
+        _untraced.reset(token)
+
+
+def _timed(fn, phase_name: str):
+    """Times fn as a request phase - inside the Weave op, so tracing overhead is not counted"""
+    if inspect.iscoroutinefunction(fn):
+        @functools.wraps(fn)
+        async def timed(*args, **kwargs):
+            with phase(phase_name):
+                return await fn(*args, **kwargs)
+    else:
+        @functools.wraps(fn)
+        def timed(*args, **kwargs):
+            with phase(phase_name):
+                return fn(*args, **kwargs)
+    return timed
+
+
+_traced_lock = threading.Lock()
+
+
+def traced(fn):
+    """
+    The real Weave op behind an op()-decorated function, created (and Weave
+    loaded) on first use - pass it to Evaluation(scorers=...) so it is not wrapped twice.
+    """
+    weave_op = fn.__dict__.get('_weave_op')
+    if weave_op is None:
+        weave = get_weave()
+        with _traced_lock:
+            weave_op = fn.__dict__.get('_weave_op')
+            if weave_op is None:
+                weave_op = fn._weave_op = weave.op()(fn._plain)
+    return weave_op
+
+
+def op(phase_name: str = 'score'):
+    """
+    Like @weave.op(), but honours untraced() and does not need Weave loaded until
+    the first traced call. phase_name=None skips the request-phase timing.
+    """
+    def decorate(fn):
+        if phase_name:
+            fn = _timed(fn, phase_name)
+
+        if inspect.iscoroutinefunction(fn):
+            @functools.wraps(fn)
+            async def wrapper(*args, **kwargs):
+                return await (fn if _untraced.get() else traced(wrapper))(*args, **kwargs)
+        else:
+            @functools.wraps(fn)
+            def wrapper(*args, **kwargs):
+                return (fn if _untraced.get() else traced(wrapper))(*args, **kwargs)
+
+        wrapper._plain = fn
+        return wrapper
+    return decorate
+
+
+def weave_sink(log_op):
+    """Sink that records each payload as one call of the given Weave op"""
+    def sink(batch: list):
+        for payload in batch:
+            log_op(**payload)
+    return sink
+
+
+class TraceUploader:
+    """
+    Background trace logging. submit() never does network I/O: payloads go on a
+    bounded queue and a worker thread hands them to `sink(batch)` in batches.
+    When the queue is full, submit() waits up to block_timeout seconds
+    (backpressure) and then drops the payload.
+    """
+
+    def __init__(self, sink, max_queue: int = 1000, batch_size: int = 50,
+                 flush_interval: float = 1.0, block_timeout: float = 0.0):
+        self.sink = sink
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.block_timeout = block_timeout
+        self._queue = queue.Queue(maxsize=max_queue)
+        self._stop = threading.Event()
+        self._thread = None
+        self._counts_lock = threading.Lock()
+        self.counts = {
+            "submitted": 0,
+            "dropped": 0,
+            "backpressure_waits": 0,
+            "flushed": 0,
+            "failed": 0,
+            "batches": 0
+        }
+
+    @classmethod
+    def from_env(cls, sink):
+        """
+        Returns a started uploader when WEAVE_ASYNC_TRACES=1, else None.
+        Tuning: WEAVE_TRACE_QUEUE_SIZE, WEAVE_TRACE_BATCH_SIZE,
+        WEAVE_TRACE_FLUSH_INTERVAL (s), WEAVE_TRACE_BLOCK_TIMEOUT (s).
+        """
+        if os.getenv('WEAVE_ASYNC_TRACES', '0') not in ('1', 'true', 'yes'):
+            return None
+        if multiprocessing.current_process().name != 'MainProcess':
+            return None  # Scoring worker process - nothing to upload
+        uploader = cls(
+            sink,
+            max_queue=int(os.getenv('WEAVE_TRACE_QUEUE_SIZE', '1000')),
+            batch_size=int(os.getenv('WEAVE_TRACE_BATCH_SIZE', '50')),
+            flush_interval=float(os.getenv('WEAVE_TRACE_FLUSH_INTERVAL', '1.0')),
+            block_timeout=float(os.getenv('WEAVE_TRACE_BLOCK_TIMEOUT', '0'))
+        )
+        uploader.start()
+        return uploader
+
+    def _count(self, name: str, amount: int = 1):
+        with self._counts_lock:
+            self.counts[name] += amount
+
+    def submit(self, payload: dict) -> bool:
+        self._count("submitted")
+        try:
+            self._queue.put_nowait(payload)
+            return True
+        except queue.Full:
+            pass
+
+        if self.block_timeout > 0:
+            self._count("backpressure_waits")
+            try:
+                self._queue.put(payload, timeout=self.block_timeout)
+                return True
+            except queue.Full:
+                pass
+
+        self._count("dropped")
+        return False
+
+    def start(self):
+        if self._thread is None:
+            self._thread = threading.Thread(target=self._run, name='weave-trace-uploader', daemon=True)
+            self._thread.start()
+            atexit.register(self.stop)
+
+    def stop(self, timeout: float = 5.0):
+        """Flush what is queued and stop the worker"""
+        self._stop.set()
+        if self._thread is not None:
+            self._thread.join(timeout)
+            self._thread = None
+
+    def _next_batch(self) -> list:
+        try:
+            batch = [self._queue.get(timeout=self.flush_interval)]
+        except queue.Empty:
+            return []
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while not (self._stop.is_set() and self._queue.empty()):
+            batch = self._next_batch()
+            if not batch:
+                continue
+            try:
+                self.sink(batch)
+                self._count("flushed", len(batch))
+            except Exception as e:
+                print(f"✗ Trace upload failed ({len(batch)} dropped): {e}")
+                self._count("failed", len(batch))
+            self._count("batches")
+
+    def stats(self) -> dict:
+        with self._counts_lock:
+            return dict(self.counts, queued=self._queue.qsize(), max_queue=self._queue.maxsize)